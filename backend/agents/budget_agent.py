@@ -7,6 +7,8 @@ import logging
 from backend.agents.base_agent import BaseAgent
 from backend.models.agent_response import AvatarState
 from backend.tools.budget_calculator import BudgetCalculator
+from backend.analytics.summarizer import TransactionSummarizer
+from backend.analytics.forecast import CashFlowForecaster
 
 logger = logging.getLogger(__name__)
 
@@ -20,13 +22,16 @@ class BudgetAgent(BaseAgent):
     - Suggests budget reallocation
     """
 
-    def __init__(self, llm_provider=None):
+    def __init__(self, llm_provider=None, summarizer=None, recurring_detector=None, forecaster=None):
         super().__init__(
             name="budget_agent",
             description="Tracks budgets, predicts savings, prevents unsafe spending",
             llm_provider=llm_provider,
         )
         self.calculator = BudgetCalculator()
+        self.summarizer = summarizer or TransactionSummarizer()
+        self.recurring_detector = recurring_detector
+        self.forecaster = forecaster or CashFlowForecaster()
 
     async def execute(self, state: dict) -> dict:
         """Evaluate budget health and purchase affordability."""
@@ -61,6 +66,31 @@ class BudgetAgent(BaseAgent):
                 "result": affordability,
             }, AvatarState.ANALYZING)
 
+        # Recurring commitments detected at ingest (subscriptions, rent, salary)
+        commitments = None
+        if self.recurring_detector and user_profile:
+            commitments = self.recurring_detector.commitments(user_profile.user_id)
+            self.emit_event("tool_call", {
+                "tool": "recurring_detector",
+                "action": "recurring_commitments",
+                "result": commitments,
+            }, AvatarState.ANALYZING)
+
+        # Balance projection and depletion risk (cached per store version)
+        forecast = None
+        store = state.get("transaction_store")
+        if store is not None and user_profile:
+            series = commitments["outflows"] + commitments["inflows"] if commitments else []
+            forecast = self.forecaster.forecast(store, user_profile, series)
+            self.emit_event("tool_call", {
+                "tool": "cash_flow_forecaster",
+                "action": "savings_projection",
+                "result": forecast,
+            }, AvatarState.ANALYZING)
+
+        # Month-by-month trend over the full history (cached per store version)
+        spending_history = self.summarizer.render_for(state, sections=("monthly", "merchants"))
+
         # LLM analysis
         system_prompt = """You are the Budget Guardian Agent for FinVerse AI.
 Your role is to:
@@ -83,6 +113,15 @@ Financial Summary:
 Budget Status:
 {chr(10).join(f"  {b['category']}: ₹{b['spent']:,.0f}/₹{b['limit']:,.0f} ({b['utilization_pct']}%)" for b in financial_summary['budgets'])}
 
+Spending History:
+{spending_history}
+
+Recurring Commitments:
+{self._format_commitments(commitments)}
+
+Cash-Flow Forecast:
+{self._format_forecast(forecast)}
+
 {f'Purchase Evaluation: ₹{purchase_amount:,.0f} in {purchase_category}' if purchase_amount else 'No specific purchase to evaluate.'}
 {f'Affordable: {affordability["affordable"]}' if affordability else ''}
 {f'Warnings: {", ".join(affordability["warnings"])}' if affordability and affordability["warnings"] else ''}
@@ -109,6 +148,46 @@ Provide your budget analysis and recommendation."""
         state["budget_analysis"] = analysis
         state["financial_summary"] = financial_summary
         state["affordability"] = affordability
+        state["recurring_commitments"] = commitments
+        state["cash_flow_forecast"] = forecast
         state["agents_used"] = state.get("agents_used", []) + [self.name]
         state["events"] = state.get("events", []) + self.get_events()
         return state
+
+    def _format_commitments(self, commitments: dict) -> str:
+        """Prompt lines for detected recurring series."""
+        if not commitments or not (commitments["outflows"] or commitments["inflows"]):
+            return "  None detected."
+        lines = [
+            f"  Fixed monthly outflow: ₹{commitments['monthly_outflow']:,.0f}",
+            f"  Recurring monthly income: ₹{commitments['monthly_inflow']:,.0f}",
+        ]
+        for s in commitments["outflows"] + commitments["inflows"]:
+            sign = "+" if s["is_credit"] else "-"
+            lines.append(f"  {sign} {s['merchant']} ({s['category']}): ₹{s['amount']:,.0f} {s['period']}, "
+                         f"next expected {s['expected_next'][:10]}")
+        return "\n".join(lines)
+
+    def _format_forecast(self, forecast: dict) -> str:
+        """Prompt lines for the balance projection."""
+        if not forecast:
+            return "  Not available."
+        expected, budget = forecast["expected"], forecast["budget_scenario"]
+        lines = [
+            f"  Starting balance: ₹{forecast['starting_balance']:,.0f}",
+            f"  Expected balance in 30 days: ₹{expected['balance_30d']:,.0f}; "
+            f"in {forecast['horizon_days']} days: ₹{expected['end_balance']:,.0f}",
+            f"  If spending matches budgets: ₹{budget['end_balance']:,.0f} in {forecast['horizon_days']} days",
+        ]
+        mc = forecast.get("monte_carlo")
+        if mc:
+            dates = mc["depletion_date"]
+            lines.append(f"  Probability of savings running out within {forecast['horizon_days']} days: "
+                         f"{mc['depletion_probability'] * 100:.0f}%")
+            if dates["p10"]:
+                lines.append(f"  Depletion date (pessimistic p10 / median): {dates['p10']} / {dates['p50'] or 'beyond horizon'}")
+            lines.append(f"  Balance range in {forecast['horizon_days']} days (p10–p90): "
+                         f"₹{mc['end_balance']['p10']:,.0f} – ₹{mc['end_balance']['p90']:,.0f}")
+        elif expected["depletion_date"]:
+            lines.append(f"  Projected depletion date: {expected['depletion_date']}")
+        return "\n".join(lines)
@@ -6,7 +6,7 @@ Validates responses against compliance rules, checks fraud risk.
 import logging
 from backend.agents.base_agent import BaseAgent
 from backend.models.agent_response import AvatarState
-from backend.tools.compliance_rules import ComplianceEngine
+from backend.tools.compliance_rules import ComplianceEngine, risk_level
 
 logger = logging.getLogger(__name__)
 
@@ -20,38 +20,54 @@ class ComplianceAgent(BaseAgent):
     - Generates audit trails
     """
 
-    def __init__(self, llm_provider=None):
+    def __init__(self, llm_provider=None, engine=None):
         super().__init__(
             name="compliance_agent",
             description="Validates transactions and responses against financial regulations",
             llm_provider=llm_provider,
         )
-        self.engine = ComplianceEngine()
+        self.engine = engine or ComplianceEngine()
+        self.sweep = None  # Full-history sweep, set by the orchestrator
+        self.audit_log = None  # Audit trail of query-time decisions, set by the orchestrator
 
     async def execute(self, state: dict) -> dict:
         """Run compliance checks on the current state."""
         query = state.get("query", "")
         transactions = state.get("transactions", [])
+        user_profile = state.get("user_profile")
+        context = {"budgets": {b.category: (b.limit, b.spent) for b in user_profile.budgets}} if user_profile else None
 
         self.emit_event("thinking", {
             "message": "Running compliance and fraud risk checks..."
         }, AvatarState.ANALYZING)
 
-        # Validate transactions
-        compliance_results = []
-        for txn in transactions[-5:]:  # Check recent transactions
-            result = self.engine.validate_transaction(txn if isinstance(txn, dict) else txn.dict())
-            compliance_results.append(result)
-
-            if not result["compliant"]:
-                self.emit_event("tool_call", {
-                    "tool": "compliance_engine",
-                    "action": "transaction_validation",
-                    "violations": result["violations"],
-                    "risk_level": result["risk_level"],
-                }, AvatarState.ALERT)
+        # Verdicts are computed once at ingest; review only aggregates them (and refreshes
+        # any left over from a previous rule set or risk-graph propagation), cached until
+        # the store, the rules or the graph change. Refreshed verdicts go back to the
+        # partition under its lock, so they are persisted with it
+        store = state.get("transaction_store")
+        partition = state.get("partition")
+        if store is not None:
+            store_verdicts = partition.store_verdicts if partition is not None else None
+            review = store.cached(f"compliance:review:{self.engine.version}:{self.engine.graph_version}",
+                                  lambda: self.engine.review(store.all(), store_verdicts=store_verdicts))
+        else:
+            review = self.engine.review([t if isinstance(t, dict) else t.dict() for t in transactions])
+        budget_alerts = self.engine.budget_alerts(context["budgets"]) if context else []
+        swept = self.sweep.rollup(user_profile.user_id) if self.sweep and user_profile else None
+
+        if review["non_compliant"]:
+            self.emit_event("tool_call", {
+                "tool": "compliance_engine",
+                "action": "transaction_validation",
+                "transactions_checked": review["transactions_checked"],
+                "violations_by_rule": review["violations_by_rule"],
+                "recent_flagged": review["recent_flagged"],
+                "risk_level": risk_level(review["max_risk_score"]),
+            }, AvatarState.ALERT)
 
         # Check any generated recommendations
+        rec_check = None
         prior_analysis = state.get("transaction_analysis", "") + " " + state.get("budget_analysis", "")
         if prior_analysis.strip():
             rec_check = self.engine.validate_recommendation(prior_analysis)
@@ -72,17 +88,22 @@ Your role is to:
 
 Be precise and authoritative. Use formal language."""
 
-        violations_summary = []
-        for r in compliance_results:
-            if not r["compliant"]:
-                for v in r["violations"]:
-                    violations_summary.append(f"- [{v['rule_id']}] {v['message']} (Severity: {v['severity']})")
+        violations_summary = [f"- [{rule_id}] {count} transaction(s)"
+                              for rule_id, count in sorted(review["violations_by_rule"].items())]
+        for item in review["recent_flagged"]:
+            for v in item["violations"]:
+                violations_summary.append(f"- {item['timestamp']} {item['merchant']}: [{v['rule_id']}] "
+                                          f"{v['message']} (Severity: {v['severity']})")
+        for v in budget_alerts:
+            violations_summary.append(f"- [{v['rule_id']}] {v['message']} (Severity: {v['severity']})")
 
         prompt = f"""Query: {query}
 
 Compliance Check Results:
-- Transactions checked: {len(compliance_results)}
-- Violations found: {sum(1 for r in compliance_results if not r['compliant'])}
+- Transactions checked: {review['transactions_checked']}
+- Violations found: {review['non_compliant']}
+- Budget warnings: {len(budget_alerts)}
+{f"- Last full-history sweep: {swept['non_compliant']} of {swept['transactions']} transactions flagged, risk level {swept['risk_level']}" if swept else ''}
 
 {chr(10).join(violations_summary) if violations_summary else 'No violations detected. All transactions are compliant.'}
 
@@ -90,17 +111,29 @@ Provide a compliance summary."""
 
         analysis = await self.think(prompt, system_prompt)
 
-        has_violations = any(not r["compliant"] for r in compliance_results)
+        has_violations = review["non_compliant"] > 0
 
         self.emit_event("result", {
             "agent": self.name,
             "analysis": analysis,
             "compliant": not has_violations,
-            "violations_count": sum(1 for r in compliance_results if not r["compliant"]),
+            "violations_count": review["non_compliant"],
         }, AvatarState.ALERT if has_violations else AvatarState.RECOMMENDING)
 
+        if self.audit_log is not None:
+            self.audit_log.append({
+                "kind": "review",
+                "user_id": user_profile.user_id if user_profile else None,
+                "query": query,
+                "ruleset_version": review["ruleset_version"],
+                "rule_ids": sorted(review["violations_by_rule"]) + [v["rule_id"] for v in budget_alerts]
+                            + [v["rule_id"] for v in (rec_check or {}).get("violations", [])],
+                "transactions_checked": review["transactions_checked"],
+                "non_compliant": review["non_compliant"],
+            })
+
         state["compliance_analysis"] = analysis
-        state["compliance_results"] = compliance_results
+        state["compliance_results"] = {**review, "budget_alerts": budget_alerts}
         state["agents_used"] = state.get("agents_used", []) + [self.name]
         state["events"] = state.get("events", []) + self.get_events()
         return state
@@ -7,6 +7,7 @@ Never exposes internal chain-of-thought.
 import logging
 from backend.agents.base_agent import BaseAgent
 from backend.models.agent_response import AvatarState
+from backend.tools.output_guard import ABORT_NOTICE
 
 logger = logging.getLogger(__name__)
 
@@ -20,12 +21,13 @@ class ExplanationAgent(BaseAgent):
     - Never exposes internal chain-of-thought
     """
 
-    def __init__(self, llm_provider=None):
+    def __init__(self, llm_provider=None, output_guard=None):
         super().__init__(
             name="explanation_agent",
             description="Synthesizes multi-agent outputs into clear, structured explanations",
             llm_provider=llm_provider,
         )
+        self.output_guard = output_guard
 
     async def execute(self, state: dict) -> dict:
         """Synthesize all agent outputs into a final, clean response."""
@@ -62,7 +64,7 @@ Be concise, structured, and actionable.
 If this is a general financial question, provide expert-level advice.
 If you need specific data you don't have, say so."""
 
-            response = await self.think(query, system_prompt)
+            response = await self._respond(query, system_prompt, state)
         else:
             # Synthesize all agent outputs
             combined = "\n\n---\n\n".join(sections)
@@ -92,7 +94,7 @@ Agents Used: {", ".join(state.get("agents_used", []))}
 
 Create a polished, final response. Structure it clearly with sections."""
 
-            response = await self.think(prompt, system_prompt)
+            response = await self._respond(prompt, system_prompt, state)
 
         self.emit_event("result", {
             "agent": self.name,
@@ -104,3 +106,38 @@ Create a polished, final response. Structure it clearly with sections."""
         state["agents_used"] = state.get("agents_used", []) + [self.name]
         state["events"] = state.get("events", []) + self.get_events()
         return state
+
+    async def _respond(self, prompt: str, system_prompt: str, state: dict) -> str:
+        """
+        Generate the final response. With a `token_callback` in the state, tokens are
+        streamed through the output guard as they arrive (unsafe phrases redacted, or
+        the stream cut off, before they reach the user).
+        """
+        token_callback = state.get("token_callback")
+        if token_callback is None or self.llm is None or self.output_guard is None:
+            return await self.think(prompt, system_prompt)
+
+        self.emit_event("thinking", {"message": f"{self.name} is reasoning..."}, AvatarState.THINKING)
+        guard = self.output_guard.session()
+        async for chunk in self.llm.stream(prompt, system_prompt):
+            released = guard.feed(chunk)
+            if released:
+                await token_callback(released)
+            if guard.aborted:
+                break
+        tail = guard.finish()
+        if tail:
+            await token_callback(tail)
+
+        if guard.violations:
+            logger.warning(f"🛡️ Output guard {'aborted' if guard.aborted else 'redacted'} response: "
+                           f"{len(guard.violations)} unsafe phrase(s)")
+            self.emit_event("tool_call", {
+                "tool": "output_guard",
+                "action": "abort" if guard.aborted else "redact",
+                "violations": guard.violations,
+            }, AvatarState.ALERT)
+        if guard.aborted:
+            await token_callback(ABORT_NOTICE)
+            return guard.text + ABORT_NOTICE
+        return guard.text
@@ -18,6 +18,9 @@ from backend.models.agent_response import AgentResponse, AgentEvent, AvatarState
 from backend.llm.provider import LLMProvider
 from backend.tools.web_search import WebSearchTool
 from backend.tools.budget_calculator import BudgetCalculator
+from backend.tools.compliance_rules import ComplianceEngine
+from backend.analytics.summarizer import TransactionSummarizer
+from backend.analytics.forecast import CashFlowForecaster
 
 logger = logging.getLogger(__name__)
 
@@ -43,19 +46,26 @@ class AgentOrchestrator:
         self.llm = LLMProvider(settings)
         self.search_tool = WebSearchTool(settings)
         self.budget_calculator = BudgetCalculator()
+        self.compliance_engine = ComplianceEngine(settings)
+        self.summarizer = TransactionSummarizer()
+        self.forecaster = CashFlowForecaster(
+            horizon_days=settings.FORECAST_HORIZON_DAYS,
+            paths=settings.FORECAST_PATHS,
+            lookback_days=settings.FORECAST_LOOKBACK_DAYS,
+        )
 
         # Initialize agents
         self.agents = {
-            "transaction": TransactionAgent(llm_provider=self.llm),
-            "budget": BudgetAgent(llm_provider=self.llm),
-            "compliance": ComplianceAgent(llm_provider=self.llm),
+            "transaction": TransactionAgent(llm_provider=self.llm, summarizer=self.summarizer),
+            "budget": BudgetAgent(llm_provider=self.llm, summarizer=self.summarizer, forecaster=self.forecaster),
+            "compliance": ComplianceAgent(llm_provider=self.llm, engine=self.compliance_engine),
             "shopping": ShoppingAgent(
                 llm_provider=self.llm,
                 search_tool=self.search_tool,
                 budget_calculator=self.budget_calculator,
             ),
             "rag": RAGAgent(llm_provider=self.llm),
-            "explanation": ExplanationAgent(llm_provider=self.llm),
+            "explanation": ExplanationAgent(llm_provider=self.llm, output_guard=self.compliance_engine.output_guard),
         }
 
         # Hybrid retriever (initialized lazily)
@@ -66,7 +76,21 @@ class AgentOrchestrator:
         self._retriever = retriever
         self.agents["rag"].retriever = retriever
 
-    async def process_query(self, query: str, user_profile=None, transactions=None, event_callback=None) -> AgentResponse:
+    def set_ingest_pipeline(self, pipeline):
+        """Give agents access to the analytics engines maintained at ingest."""
+        self.agents["transaction"].drift_engine = pipeline.get_stage("drift_engine")
+        self.agents["budget"].recurring_detector = pipeline.get_stage("recurring_detector")
+
+    def set_compliance_sweep(self, sweep):
+        """Give the compliance agent the risk rollups of the full-history sweep."""
+        self.agents["compliance"].sweep = sweep
+
+    def set_audit_log(self, audit_log):
+        """Record the compliance agent's query-time decisions in the audit log."""
+        self.agents["compliance"].audit_log = audit_log
+
+    async def process_query(self, query: str, user_profile=None, transactions=None, event_callback=None,
+                            transaction_store=None, partition=None) -> AgentResponse:
         """
         Process a user query through the multi-agent graph.
 
@@ -75,6 +99,8 @@ class AgentOrchestrator:
             user_profile: User's financial profile
             transactions: Recent transaction data
             event_callback: Async callback for streaming events to frontend
+            transaction_store: Shared TransactionStore (its version keys cached results)
+            partition: The user's UserPartition, for writes back to the shared store
 
         Returns:
             AgentResponse with full results
@@ -86,9 +112,21 @@ class AgentOrchestrator:
             "query": query,
             "user_profile": user_profile,
             "transactions": transactions or [],
+            "transaction_store": transaction_store,
+            "partition": partition,
             "agents_used": [],
             "events": [],
         }
+        if event_callback:
+            # The final answer is streamed token by token through the output guard
+            async def token_callback(text: str):
+                await event_callback(AgentEvent(
+                    type="token",
+                    agent="explanation_agent",
+                    content={"delta": text},
+                    avatar_state=AvatarState.RECOMMENDING,
+                ))
+            state["token_callback"] = token_callback
 
         # Step 1: Classify intent
         intents = self._classify_intent(query)
@@ -47,7 +47,7 @@ class RAGAgent(BaseAgent):
                 "query": query,
             }, AvatarState.SEARCHING)
 
-            retrieval_result = self.retriever.retrieve(query, top_k=5)
+            retrieval_result = await self.retriever.aretrieve(query, top_k=5)
 
             self.emit_event("tool_call", {
                 "tool": "hybrid_retriever",
@@ -6,6 +6,7 @@ Categorizes transactions, detects anomalies, tracks behavioral drift.
 import logging
 from backend.agents.base_agent import BaseAgent
 from backend.models.agent_response import AvatarState
+from backend.analytics.summarizer import TransactionSummarizer
 
 logger = logging.getLogger(__name__)
 
@@ -19,35 +20,45 @@ class TransactionAgent(BaseAgent):
     - Updates user financial profile
     """
 
-    def __init__(self, llm_provider=None):
+    def __init__(self, llm_provider=None, drift_engine=None, summarizer=None):
         super().__init__(
             name="transaction_agent",
             description="Analyzes transactions for patterns, anomalies, and behavioral drift",
             llm_provider=llm_provider,
         )
+        self.drift_engine = drift_engine
+        self.summarizer = summarizer or TransactionSummarizer()
 
     async def execute(self, state: dict) -> dict:
         """Analyze transactions in the current state."""
         query = state.get("query", "")
         transactions = state.get("transactions", [])
+        store = state.get("transaction_store")
         user_profile = state.get("user_profile")
 
         self.emit_event("thinking", {
             "message": "Analyzing transaction patterns and behavioral data..."
         }, AvatarState.ANALYZING)
 
-        # Build transaction summary
-        if transactions:
-            txn_summary = self._summarize_transactions(transactions)
-        else:
-            txn_summary = "No recent transactions available."
+        # Multi-resolution summary of the full history (cached per store version)
+        txn_summary = self.summarizer.render_for(state)
+
+        # Behavioral drift is computed numerically at ingest; the LLM only interprets it
+        drift_facts = []
+        if self.drift_engine and user_profile:
+            drift_facts = self.drift_engine.facts(user_profile.user_id)
+            self.emit_event("tool_call", {
+                "tool": "drift_engine",
+                "action": "behavioral_drift",
+                "result": drift_facts,
+            }, AvatarState.ANALYZING)
 
         # Build analysis prompt
         system_prompt = """You are a Transaction Intelligence Agent for FinVerse AI.
 Your role is to:
 1. Analyze transaction patterns and spending behavior
 2. Detect anomalies and unusual spending
-3. Identify behavioral drift (changes in spending patterns)
+3. Explain the behavioral drift measurements provided (changes in spending patterns)
 4. Provide insights about financial health
 
 Always respond with structured, actionable insights.
@@ -58,6 +69,9 @@ Never fabricate transaction data. Only analyze what is provided."""
 Transaction Summary:
 {txn_summary}
 
+Behavioral Drift (category spend mix vs the preceding window):
+{chr(10).join(f"  - {line}" for line in drift_facts) if drift_facts else '  Not available.'}
+
 User Profile:
 - Monthly Income: ₹{user_profile.monthly_income:,.0f} if user_profile else 'N/A'
 - Total Balance: ₹{user_profile.total_balance:,.0f} if user_profile else 'N/A'
@@ -73,45 +87,10 @@ Analyze the transactions and provide insights. Include:
         self.emit_event("result", {
             "agent": self.name,
             "analysis": analysis,
-            "transaction_count": len(transactions),
+            "transaction_count": len(store) if store is not None else len(transactions),
         }, AvatarState.RECOMMENDING)
 
         state["transaction_analysis"] = analysis
         state["agents_used"] = state.get("agents_used", []) + [self.name]
         state["events"] = state.get("events", []) + self.get_events()
         return state
-
-    def _summarize_transactions(self, transactions: list) -> str:
-        """Create a text summary of recent transactions."""
-        if not transactions:
-            return "No transactions."
-
-        lines = []
-        total_spent = 0
-        total_income = 0
-        categories = {}
-
-        for txn in transactions[-20:]:  # Last 20 transactions
-            amount = txn.get("amount", 0)
-            cat = txn.get("category", "other")
-            merchant = txn.get("merchant", "Unknown")
-            is_credit = txn.get("is_credit", False)
-
-            if is_credit:
-                total_income += amount
-                lines.append(f"  + ₹{amount:,.0f} from {merchant} ({cat})")
-            else:
-                total_spent += amount
-                lines.append(f"  - ₹{amount:,.0f} at {merchant} ({cat})")
-
-            categories[cat] = categories.get(cat, 0) + (amount if not is_credit else 0)
-
-        summary = f"Recent Transactions ({len(transactions)} total):\n"
-        summary += "\n".join(lines[:10])
-        summary += f"\n\nTotal Spent: ₹{total_spent:,.0f}"
-        summary += f"\nTotal Income: ₹{total_income:,.0f}"
-        summary += "\n\nCategory Breakdown:"
-        for cat, amount in sorted(categories.items(), key=lambda x: -x[1])[:5]:
-            summary += f"\n  {cat}: ₹{amount:,.0f}"
-
-        return summary
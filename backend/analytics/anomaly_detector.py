@@ -0,0 +1,367 @@
+"""
+FinVerse AI — Online Anomaly Detector
+Scores each incoming transaction in O(1) against running per-user, per-category
+and per-merchant statistics, and writes `is_flagged` / `fraud_score` back.
+"""
+
+import logging
+import math
+from datetime import datetime, timezone
+from typing import Optional
+import numpy as np
+
+from backend.storage.ingest import IngestStage
+from backend.streaming.columnar import NAT, records_to_columns
+
+logger = logging.getLogger(__name__)
+
+
+class RunningStats:
+    """Welford mean/variance plus an exponentially weighted mean/variance."""
+
+    __slots__ = ("count", "mean", "m2", "ewma", "ewm_var")
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.ewma = 0.0
+        self.ewm_var = 0.0
+
+    def update(self, x: float, alpha: float):
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+
+        if self.count == 1:
+            self.ewma = x
+        else:
+            diff = x - self.ewma
+            self.ewma += alpha * diff
+            self.ewm_var = (1 - alpha) * (self.ewm_var + alpha * diff * diff)
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else 0.0
+
+    def zscore(self, x: float, min_std: float) -> float:
+        return (x - self.mean) / max(self.std, min_std)
+
+
+class _UserState:
+    """All running statistics for one user."""
+
+    __slots__ = ("overall", "categories", "merchants", "hours")
+
+    def __init__(self):
+        self.overall = RunningStats()
+        self.categories: dict[str, RunningStats] = {}
+        self.merchants: dict[str, RunningStats] = {}
+        self.hours = np.zeros(24, dtype=np.int64)
+
+
+class OnlineAnomalyDetector(IngestStage):
+    """
+    Streaming anomaly scorer.
+
+    Signals (all computed on log-amounts, against history *before* the transaction):
+    - amount z-score vs the user's category and merchant statistics
+    - hour-of-day rarity from the user's hour histogram
+    - first-seen merchant for an established user
+
+    `process()` scores then updates in O(1); `backfill()` scores historic
+    columnar data in one vectorized pass with the same semantics.
+    """
+
+    name = "anomaly_detector"
+
+    AMOUNT_WEIGHT = 0.7
+    HOUR_WEIGHT = 0.2
+    NOVELTY_WEIGHT = 0.1
+
+    def __init__(self, threshold: float = 0.45, alpha: float = 0.1, min_history: int = 5,
+                 z_floor: float = 1.5, z_span: float = 2.0, min_std: float = 0.25):
+        self.threshold = threshold
+        self.alpha = alpha
+        self.min_history = min_history
+        self.z_floor = z_floor      # z-scores below this are normal
+        self.z_span = z_span        # z_floor + z_span maps to a full amount score
+        self.min_std = min_std      # guards against near-constant series (e.g. fixed subscriptions)
+        self._users: dict[str, _UserState] = {}
+
+    # ── Streaming ───────────────────────────────────
+
+    def process(self, txn: dict) -> Optional[dict]:
+        """Score a new transaction, write the verdict into it, then learn from it."""
+        score, reasons = self.score(txn)
+        txn["fraud_score"] = round(score, 2)
+        txn["is_flagged"] = score >= self.threshold
+        tags = [t for t in txn.get("tags", []) if t != "anomaly" and not t.startswith("anomaly:")]
+        if txn["is_flagged"]:
+            tags += ["anomaly"] + [f"anomaly:{r}" for r in reasons]
+        txn["tags"] = tags
+
+        self.observe(txn)
+        return txn
+
+    def score(self, txn: dict) -> tuple[float, list[str]]:
+        """Anomaly score in [0, 1] and the signals that contributed, without updating state."""
+        state = self._users.get(txn.get("user_id", "default_user"))
+        if state is None or state.overall.count < self.min_history:
+            return 0.0, []
+
+        x = math.log1p(max(txn.get("amount", 0), 0))
+        reasons = []
+
+        # Most specific established baseline wins; fall back to the user's overall spend
+        cat_stats = state.categories.get(txn.get("category", "other"))
+        merchant_stats = state.merchants.get(txn.get("merchant", ""))
+        specific = [s.zscore(x, self.min_std) for s in (cat_stats, merchant_stats)
+                    if s is not None and s.count >= self.min_history]
+        z = max(specific) if specific else state.overall.zscore(x, self.min_std)
+        amount_score = min(1.0, max(0.0, (z - self.z_floor) / self.z_span))
+        if amount_score > 0:
+            reasons.append("amount")
+
+        hour = _hour_of(txn.get("timestamp"))
+        hour_score = 0.0
+        if hour is not None:
+            hour_score = self._hour_rarity(state.hours[hour], state.overall.count)
+            if hour_score > 0.5:
+                reasons.append("hour")
+
+        novelty = 0.0 if merchant_stats else 1.0
+        if novelty:
+            reasons.append("new_merchant")
+
+        score = (self.AMOUNT_WEIGHT * amount_score + self.HOUR_WEIGHT * hour_score
+                 + self.NOVELTY_WEIGHT * novelty)
+        return min(1.0, score), reasons
+
+    def observe(self, txn: dict):
+        """Fold a transaction into the running statistics."""
+        state = self._users.setdefault(txn.get("user_id", "default_user"), _UserState())
+        x = math.log1p(max(txn.get("amount", 0), 0))
+
+        state.overall.update(x, self.alpha)
+        state.categories.setdefault(txn.get("category", "other"), RunningStats()).update(x, self.alpha)
+        state.merchants.setdefault(txn.get("merchant", ""), RunningStats()).update(x, self.alpha)
+
+        hour = _hour_of(txn.get("timestamp"))
+        if hour is not None:
+            state.hours[hour] += 1
+
+    def _hour_rarity(self, hour_count, total: int) -> float:
+        # 1.0 for an hour the user has never transacted in, 0.0 at or above the uniform share
+        p = (hour_count + 0.5) / (total + 12.0)
+        return float(np.clip(1.0 - p * 24, 0.0, 1.0))
+
+    # ── Partition lifecycle ─────────────────────────
+
+    def load_user(self, user_id: str, transactions: list[dict]):
+        """Rebuild a user's statistics from their history when their partition is loaded."""
+        self._users.pop(user_id, None)
+        if transactions:
+            columns = records_to_columns(transactions)
+            columns["user_id"] = np.full(len(transactions), user_id, dtype=object)
+            self.backfill(columns, write_back=False)
+
+    def evict_user(self, user_id: str):
+        self._users.pop(user_id, None)
+
+    def user_profile(self, user_id: str) -> dict:
+        """Typical spend per category (from the running statistics) for agent context."""
+        state = self._users.get(user_id)
+        if state is None:
+            return {}
+        return {
+            cat: {
+                "count": s.count,
+                "typical_amount": round(math.expm1(s.mean), 2),
+                "recent_typical_amount": round(math.expm1(s.ewma), 2),
+            }
+            for cat, s in state.categories.items()
+        }
+
+    # ── Backfill ────────────────────────────────────
+
+    def backfill(self, columns: dict, write_back: bool = True) -> np.ndarray:
+        """
+        Score a columnar batch (oldest first per user) against each row's prior history,
+        then absorb the batch into the running statistics.
+        Returns the scores; with `write_back` also fills `fraud_score` / `is_flagged`.
+        """
+        n = len(columns["amount"])
+        if n == 0:
+            return np.empty(0, dtype=np.float32)
+
+        x = np.log1p(np.maximum(columns["amount"].astype(np.float64), 0))
+        timestamps = columns["timestamp"]
+        # Rows without a timestamp have no hour: like streaming, they skip the hour histogram
+        timed = timestamps != NAT
+        hours = ((timestamps[timed] // 3600) % 24).astype(np.int64)  # UTC, as in `_hour_of`
+        users = columns["user_id"]
+
+        # Existing state (from earlier streaming/backfills) acts as each group's starting point
+        user_codes, user_keys = _factorize(users)
+        overall = _prior_stats(user_codes, x, columns["timestamp"],
+                               self._seed_stats(user_keys, lambda s, _: s.overall))
+        cat_codes, cat_keys = _factorize_pairs(users, columns["category"])
+        cat = _prior_stats(cat_codes, x, columns["timestamp"],
+                           self._seed_stats(cat_keys, lambda s, k: s.categories.get(k)))
+        merch_codes, merch_keys = _factorize_pairs(users, columns["merchant"])
+        merch = _prior_stats(merch_codes, x, columns["timestamp"],
+                             self._seed_stats(merch_keys, lambda s, k: s.merchants.get(k)))
+        hour_codes, hour_keys = _factorize_pairs(users[timed], hours)
+        hour_seed = np.array([
+            self._users[u].hours[h] if u in self._users else 0 for u, h in hour_keys
+        ], dtype=np.float64)
+        hour_prior = _prior_counts(hour_codes, timestamps[timed]) + hour_seed[hour_codes]
+
+        def z_of(stats):
+            count, mean, std = stats
+            z = (x - mean) / np.maximum(std, self.min_std)
+            return np.where(count >= self.min_history, z, -np.inf)
+
+        z = np.maximum(z_of(cat), z_of(merch))
+        z = np.where(np.isneginf(z), z_of(overall), z)
+        amount_score = np.clip((z - self.z_floor) / self.z_span, 0.0, 1.0)
+
+        p = (hour_prior + 0.5) / (overall[0][timed] + 12.0)
+        hour_score = np.zeros(n)
+        hour_score[timed] = np.clip(1.0 - p * 24, 0.0, 1.0)
+        novelty = (merch[0] == 0).astype(np.float64)
+
+        scores = (self.AMOUNT_WEIGHT * amount_score + self.HOUR_WEIGHT * hour_score
+                  + self.NOVELTY_WEIGHT * novelty)
+        scores = np.where(overall[0] >= self.min_history, np.minimum(scores, 1.0), 0.0).astype(np.float32)
+
+        if write_back:
+            columns["fraud_score"] = scores.round(2)
+            columns["is_flagged"] = scores >= self.threshold
+
+        self._absorb(user_keys, user_codes, cat_keys, cat_codes, merch_keys, merch_codes, hour_keys, hour_codes, x)
+        return scores
+
+    def _seed_stats(self, keys: list, getter) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Count/mean/M2 of existing running statistics for each group key."""
+        count = np.zeros(len(keys))
+        mean = np.zeros(len(keys))
+        m2 = np.zeros(len(keys))
+        for i, key in enumerate(keys):
+            user, sub = key if isinstance(key, tuple) else (key, None)
+            state = self._users.get(user)
+            stats = getter(state, sub) if state is not None else None
+            if stats is not None:
+                count[i], mean[i], m2[i] = stats.count, stats.mean, stats.m2
+        return count, mean, m2
+
+    def _absorb(self, user_keys, user_codes, cat_keys, cat_codes, merch_keys, merch_codes,
+                hour_keys, hour_codes, x):
+        """Merge a batch's per-group moments into the running statistics (Chan's parallel update)."""
+        def merge(keys, codes, target):
+            count = np.bincount(codes, minlength=len(keys))
+            total = np.bincount(codes, weights=x, minlength=len(keys))
+            mean = total / np.maximum(count, 1)
+            m2 = np.bincount(codes, weights=(x - mean[codes]) ** 2, minlength=len(keys))
+            for i, key in enumerate(keys):
+                stats = target(key)
+                n_a, n_b = stats.count, int(count[i])
+                delta = mean[i] - stats.mean
+                n = n_a + n_b
+                stats.m2 += m2[i] + delta * delta * n_a * n_b / n
+                stats.mean += delta * n_b / n
+                stats.count = n
+                stats.ewma = stats.mean if n_a == 0 else stats.ewma + self.alpha * (mean[i] - stats.ewma)
+
+        state_of = lambda u: self._users.setdefault(u, _UserState())
+        merge(user_keys, user_codes, lambda u: state_of(u).overall)
+        merge(cat_keys, cat_codes, lambda k: state_of(k[0]).categories.setdefault(k[1], RunningStats()))
+        merge(merch_keys, merch_codes, lambda k: state_of(k[0]).merchants.setdefault(k[1], RunningStats()))
+
+        hour_counts = np.bincount(hour_codes, minlength=len(hour_keys))
+        for (user, hour), c in zip(hour_keys, hour_counts):
+            state_of(user).hours[hour] += c
+
+
+def _hour_of(timestamp) -> Optional[int]:
+    if timestamp is None:
+        return None
+    if isinstance(timestamp, str):
+        try:
+            timestamp = datetime.fromisoformat(timestamp)
+        except ValueError:
+            return None
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(timezone.utc)  # Naive timestamps are already UTC
+    return timestamp.hour
+
+
+def _factorize(values: np.ndarray) -> tuple[np.ndarray, list]:
+    if values.dtype.kind not in "iu":
+        values = values.astype(str)
+    keys, codes = np.unique(values, return_inverse=True)
+    return codes.ravel(), keys.tolist()
+
+
+def _factorize_pairs(a: np.ndarray, b: np.ndarray) -> tuple[np.ndarray, list]:
+    a_codes, a_keys = _factorize(a)
+    b_codes, b_keys = _factorize(b)
+    combined = a_codes.astype(np.int64) * len(b_keys) + b_codes
+    uniq, codes = np.unique(combined, return_inverse=True)
+    keys = [(a_keys[k // len(b_keys)], b_keys[k % len(b_keys)]) for k in uniq]
+    return codes.ravel(), keys
+
+
+def _group_order(codes: np.ndarray, timestamps: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Sort order by (group, time) and the position of each row within its group."""
+    order = np.lexsort((np.arange(len(codes)), timestamps, codes))
+    sorted_codes = codes[order]
+    starts = np.r_[0, np.flatnonzero(np.diff(sorted_codes)) + 1]
+    group_start = np.repeat(starts, np.diff(np.r_[starts, len(codes)]))
+    return order, np.arange(len(codes)) - group_start
+
+
+def _prior_counts(codes: np.ndarray, timestamps: np.ndarray) -> np.ndarray:
+    """For each row, how many earlier rows share its group."""
+    order, rank = _group_order(codes, timestamps)
+    prior = np.empty(len(codes), dtype=np.float64)
+    prior[order] = rank
+    return prior
+
+
+def _prior_stats(codes: np.ndarray, x: np.ndarray, timestamps: np.ndarray, seed) -> tuple:
+    """
+    For each row: count, mean and std of earlier rows in the same group,
+    combined with the group's pre-existing running statistics (`seed`).
+    """
+    seed_count, seed_mean, seed_m2 = seed
+    order, rank = _group_order(codes, timestamps)
+    xs = x[order]
+    sc = codes[order]
+
+    # Exclusive prefix sums within each group
+    c1 = np.cumsum(xs) - xs
+    c2 = np.cumsum(xs * xs) - xs * xs
+    starts = rank == 0
+    base1 = np.maximum.accumulate(np.where(starts, np.arange(len(xs)), 0))
+    c1 = c1 - c1[base1]
+    c2 = c2 - c2[base1]
+
+    # Combine with the seed moments: sum and sum of squares
+    n0 = seed_count[sc]
+    s1 = c1 + n0 * seed_mean[sc]
+    s2 = c2 + seed_m2[sc] + n0 * seed_mean[sc] ** 2
+    count = rank + n0
+    mean = np.where(count > 0, s1 / np.maximum(count, 1), 0.0)
+    var = np.where(count > 1, (s2 - count * mean * mean) / np.maximum(count - 1, 1), 0.0)
+    std = np.sqrt(np.maximum(var, 0.0))
+
+    out_count = np.empty_like(count)
+    out_mean = np.empty_like(mean)
+    out_std = np.empty_like(std)
+    out_count[order] = count
+    out_mean[order] = mean
+    out_std[order] = std
+    return out_count, out_mean, out_std
@@ -0,0 +1,343 @@
+"""
+FinVerse AI — Merchant Categorization Engine
+Maps raw bank descriptors (e.g. "UPI/ZOMATO*ORDER/1234") to a clean merchant
+name and category: exact dictionary → token trie → trigram fuzzy match →
+optional embedding fallback, with a result cache and a vectorized batch API.
+"""
+
+import logging
+import re
+import threading
+from collections import OrderedDict
+from typing import Optional
+import numpy as np
+
+from backend.models.transaction import TransactionCategory
+from backend.storage.ingest import IngestStage
+from backend.streaming.transaction_simulator import MERCHANTS
+
+logger = logging.getLogger(__name__)
+
+# Payment-rail prefixes and filler words that carry no merchant information
+NOISE_TOKENS = {
+    "UPI", "POS", "NEFT", "IMPS", "RTGS", "ACH", "ECS", "NACH", "VPS", "IPS", "ECOM", "ONL",
+    "BIL", "BILLPAY", "DEBIT", "CREDIT", "CARD", "TXN", "REF", "PAYMENT", "PAY", "ORDER",
+    "PVT", "LTD", "PRIVATE", "LIMITED", "INDIA", "IN", "COM", "WWW", "HTTP", "HTTPS",
+    "MUMBAI", "DELHI", "BANGALORE", "BENGALURU", "HYDERABAD", "CHENNAI", "PUNE", "KOLKATA",
+}
+
+# Common descriptor spellings and keywords beyond the simulator's merchant table
+MERCHANT_ALIASES = {
+    "AMZN": ("Amazon", TransactionCategory.SHOPPING),
+    "AMAZON PAY": ("Amazon", TransactionCategory.SHOPPING),
+    "FLIPKART INTERNET": ("Flipkart", TransactionCategory.SHOPPING),
+    "IOCL": ("Indian Oil", TransactionCategory.TRANSPORT),
+    "HPCL": ("HP Petrol", TransactionCategory.TRANSPORT),
+    "BPCL": ("Bharat Petroleum", TransactionCategory.TRANSPORT),
+    "PETROL": ("Fuel", TransactionCategory.TRANSPORT),
+    "FUEL": ("Fuel", TransactionCategory.TRANSPORT),
+    "RAPIDO": ("Rapido", TransactionCategory.TRANSPORT),
+    "MAKEMYTRIP": ("MakeMyTrip", TransactionCategory.TRAVEL),
+    "INDIGO": ("IndiGo", TransactionCategory.TRAVEL),
+    "AIRTEL": ("Airtel", TransactionCategory.UTILITIES),
+    "BESCOM": ("Electricity Bill", TransactionCategory.UTILITIES),
+    "TATA POWER": ("Electricity Bill", TransactionCategory.UTILITIES),
+    "BLINKIT": ("Blinkit", TransactionCategory.FOOD),
+    "ZEPTO": ("Zepto", TransactionCategory.FOOD),
+    "PHARMEASY": ("PharmEasy", TransactionCategory.HEALTHCARE),
+    "PHARMACY": ("Pharmacy", TransactionCategory.HEALTHCARE),
+    "RENT": ("House Rent", TransactionCategory.RENT),
+    "SALARY": ("Salary", TransactionCategory.SALARY),
+    "SAL": ("Salary", TransactionCategory.SALARY),
+    "ZERODHA": ("Zerodha", TransactionCategory.INVESTMENT),
+    "GROWW": ("Groww", TransactionCategory.INVESTMENT),
+    "MUTUAL FUND": ("Mutual Fund", TransactionCategory.INVESTMENT),
+    "SIP": ("Mutual Fund SIP", TransactionCategory.INVESTMENT),
+    "UDEMY": ("Udemy", TransactionCategory.EDUCATION),
+}
+
+# Short texts describing each category, embedded once for the semantic fallback
+CATEGORY_DESCRIPTIONS = {
+    TransactionCategory.FOOD: "food delivery restaurant cafe groceries supermarket",
+    TransactionCategory.TRANSPORT: "taxi cab ride metro train fuel petrol parking",
+    TransactionCategory.SHOPPING: "online shopping retail store electronics clothing",
+    TransactionCategory.ENTERTAINMENT: "movies games concerts events streaming",
+    TransactionCategory.UTILITIES: "electricity water gas broadband mobile recharge bill",
+    TransactionCategory.HEALTHCARE: "pharmacy hospital doctor clinic medical lab",
+    TransactionCategory.EDUCATION: "school college course tuition books",
+    TransactionCategory.RENT: "house rent landlord lease",
+    TransactionCategory.SALARY: "salary payroll employer wages",
+    TransactionCategory.INVESTMENT: "mutual fund stocks brokerage investment sip",
+    TransactionCategory.TRANSFER: "bank transfer to friend family self account",
+    TransactionCategory.SUBSCRIPTION: "monthly subscription membership plan renewal",
+    TransactionCategory.TRAVEL: "flight hotel travel booking holiday",
+}
+
+_SPLIT = re.compile(r"[^A-Z0-9]+")
+_REFERENCE = re.compile(r"^(?:\d+|[A-Z]{0,4}\d{4,}[A-Z0-9]*|X+\d*)$")  # order ids, card masks, refs
+
+UNMATCHED = {"merchant": None, "category": TransactionCategory.OTHER.value, "confidence": 0.0, "method": "none"}
+
+
+def normalize_descriptor(raw: str) -> str:
+    """Upper-case, split on punctuation and drop rail prefixes, reference numbers and filler."""
+    tokens = _SPLIT.split(str(raw).upper())
+    return " ".join(t for t in tokens if t and t not in NOISE_TOKENS and not _REFERENCE.match(t))
+
+
+def _trigrams(text: str) -> set[str]:
+    padded = f"  {text.replace(' ', '')} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class MerchantCategorizer(IngestStage):
+    """
+    Layered descriptor → (merchant, category) resolution.
+
+    1. Exact: the whole normalized descriptor is a known merchant key
+    2. Token trie: longest run of descriptor tokens that spells a merchant key
+       ("ZOMATO ORDER 1234" → ZOMATO), also trying adjacent tokens joined ("BIG BASKET")
+    3. Fuzzy: trigram inverted index scored by Dice coefficient (typos, glued words)
+    4. Embedding (optional): nearest category description for anything still unmatched
+
+    Results are cached per normalized descriptor in an LRU shared by every thread
+    (guarded by a lock; matching itself runs outside it). As an ingest stage it
+    fills in the merchant and category of transactions that arrive uncategorized.
+    """
+
+    name = "categorizer"
+
+    def __init__(self, fuzzy_threshold: float = 0.6, embedder=None, embedding_threshold: float = 0.3,
+                 cache_size: int = 100_000):
+        self.fuzzy_threshold = fuzzy_threshold
+        self.embedder = embedder                       # anything with .embed(texts) -> normalized vectors
+        self.embedding_threshold = embedding_threshold
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, dict]" = OrderedDict()
+        self._cache_lock = threading.Lock()  # Ingest workers and API requests share the cache
+        self._category_names = [c.value for c in CATEGORY_DESCRIPTIONS]
+        self._category_vectors = None
+        self.stats = {"exact": 0, "token": 0, "fuzzy": 0, "embedding": 0, "none": 0, "cache_hits": 0}
+
+        self._exact: dict[str, tuple[str, str]] = {}
+        self._trie: dict = {}
+        self._trigram_index: dict[str, list[int]] = {}
+        self._keys: list[str] = []
+        self._key_sizes: list[int] = []
+
+        for category, merchants in MERCHANTS.items():
+            for merchant, _, _ in merchants:
+                # Later tables win, so e.g. Netflix resolves to subscription, not entertainment
+                self.add_merchant(merchant, category.value)
+        for alias, (merchant, category) in MERCHANT_ALIASES.items():
+            self.add_merchant(alias, category.value, display_name=merchant)
+
+    # ── Dictionary ──────────────────────────────────
+
+    def add_merchant(self, name: str, category: str, display_name: Optional[str] = None):
+        """Register a merchant (or alias) under its normalized key."""
+        key = normalize_descriptor(name)
+        if not key:
+            return
+        entry = (display_name or name, category)
+        is_new = key not in self._exact
+        self._exact[key] = entry
+        self._exact.setdefault(key.replace(" ", ""), entry)
+
+        node = self._trie
+        for token in key.split():
+            node = node.setdefault(token, {})
+        node[None] = entry  # Terminal marker
+
+        if is_new:
+            idx = len(self._keys)
+            grams = _trigrams(key)
+            self._keys.append(key)
+            self._key_sizes.append(len(grams))
+            for gram in grams:
+                self._trigram_index.setdefault(gram, []).append(idx)
+        with self._cache_lock:
+            self._cache.clear()
+
+    # ── Single descriptor ───────────────────────────
+
+    def categorize(self, descriptor: str) -> dict:
+        """Resolve one descriptor to {merchant, category, confidence, method}."""
+        key = normalize_descriptor(descriptor)
+        hit = self._cached(key)
+        if hit is not None:
+            return hit
+
+        result = self._match(key)
+        if result is None and self.embedder is not None and key:
+            result = self._embed_match([key])[0]
+        result = result or UNMATCHED
+        self._remember(key, result)
+        return result
+
+    def _match(self, key: str) -> Optional[dict]:
+        if not key:
+            return None
+        entry = self._exact.get(key)
+        if entry is not None:
+            return _result(entry, 1.0, "exact")
+
+        entry = self._trie_match(key.split())
+        if entry is not None:
+            return _result(entry, 0.9, "token")
+
+        return self._fuzzy_match(key)
+
+    def _trie_match(self, tokens: list[str]) -> Optional[tuple[str, str]]:
+        # Longest match starting at each position, leftmost first
+        for start in range(len(tokens)):
+            node, best = self._trie, None
+            for token in tokens[start:]:
+                node = node.get(token)
+                if node is None:
+                    break
+                best = node.get(None, best)
+            if best is not None:
+                return best
+            if start + 1 < len(tokens):
+                entry = self._exact.get(tokens[start] + tokens[start + 1])
+                if entry is not None:
+                    return entry
+        return None
+
+    def _fuzzy_match(self, key: str) -> Optional[dict]:
+        # Score the whole descriptor and each longer token, so filler like "ORDR" does not dilute a typo
+        best_score, best_idx = 0.0, None
+        for text in dict.fromkeys([key] + [t for t in key.split() if len(t) >= 4]):
+            grams = _trigrams(text)
+            overlap: dict[int, int] = {}
+            for gram in grams:
+                for idx in self._trigram_index.get(gram, ()):
+                    overlap[idx] = overlap.get(idx, 0) + 1
+            for idx, shared in overlap.items():
+                score = 2 * shared / (self._key_sizes[idx] + len(grams))  # Dice coefficient
+                if score > best_score:
+                    best_score, best_idx = score, idx
+        if best_idx is None or best_score < self.fuzzy_threshold:
+            return None
+        return _result(self._exact[self._keys[best_idx]], round(best_score * 0.8, 3), "fuzzy")
+
+    def _embed_match(self, keys: list[str]) -> list[Optional[dict]]:
+        if self._category_vectors is None:
+            self._category_vectors = np.asarray(self.embedder.embed(list(CATEGORY_DESCRIPTIONS.values())))
+        try:
+            vectors = np.asarray(self.embedder.embed([k.lower() for k in keys]))
+        except Exception as e:
+            logger.error(f"Embedding fallback failed: {e}")
+            return [None] * len(keys)
+
+        sims = vectors @ self._category_vectors.T
+        best = sims.argmax(axis=1)
+        results = []
+        for key, i, sim in zip(keys, best, sims[np.arange(len(keys)), best]):
+            if sim < self.embedding_threshold:
+                results.append(None)
+            else:
+                results.append(_result((key.title(), self._category_names[i]), round(float(sim), 3), "embedding"))
+        return results
+
+    def _cached(self, key: str) -> Optional[dict]:
+        with self._cache_lock:
+            hit = self._cache.get(key)
+            if hit is not None:
+                self._cache.move_to_end(key)
+                self.stats["cache_hits"] += 1
+            return hit
+
+    def _remember(self, key: str, result: dict):
+        with self._cache_lock:
+            self.stats[result["method"]] += 1
+            self._cache[key] = result
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    # ── Batch API ───────────────────────────────────
+
+    def categorize_batch(self, descriptors) -> dict:
+        """
+        Categorize many descriptors at once. Duplicates are resolved once, cache
+        misses go to the embedder in a single call, and the result is columnar:
+        {"merchant", "category", "confidence", "method"} arrays aligned with the input.
+        """
+        raw = np.asarray(descriptors, dtype=object)
+        uniques, inverse = np.unique(raw.astype(str), return_inverse=True)
+
+        keys = [normalize_descriptor(d) for d in uniques]
+        results: list[Optional[dict]] = [None] * len(keys)
+        pending = []
+        hits = [False] * len(keys)
+        for i, key in enumerate(keys):
+            hit = self._cached(key)
+            if hit is not None:
+                results[i], hits[i] = hit, True
+                continue
+            results[i] = self._match(key)
+            if results[i] is None and key:
+                pending.append(i)
+
+        if pending and self.embedder is not None:
+            pending_keys = list(dict.fromkeys(keys[i] for i in pending))
+            embedded = dict(zip(pending_keys, self._embed_match(pending_keys)))
+            for i in pending:
+                results[i] = embedded[keys[i]]
+
+        remembered = set()
+        for i, key in enumerate(keys):
+            results[i] = results[i] or UNMATCHED
+            if not hits[i] and key not in remembered:  # Distinct descriptors can share a key
+                remembered.add(key)
+                self._remember(key, results[i])
+
+        merchants = np.array([r["merchant"] or d for r, d in zip(results, uniques)], dtype=object)
+        return {
+            "merchant": merchants[inverse],
+            "category": np.array([r["category"] for r in results], dtype=object)[inverse],
+            "confidence": np.array([r["confidence"] for r in results], dtype=np.float32)[inverse],
+            "method": np.array([r["method"] for r in results], dtype=object)[inverse],
+        }
+
+    def categorize_records(self, transactions: list[dict]) -> list[dict]:
+        """Fill merchant/category in place for a bulk import (uncategorized rows only)."""
+        todo = [t for t in transactions if _needs_category(t)]
+        if not todo:
+            return transactions
+        batch = self.categorize_batch([_descriptor_of(t) for t in todo])
+        for i, txn in enumerate(todo):
+            _apply(txn, batch["merchant"][i], batch["category"][i], batch["method"][i])
+        return transactions
+
+    # ── Ingest stage ────────────────────────────────
+
+    def process(self, txn: dict) -> Optional[dict]:
+        if _needs_category(txn):
+            result = self.categorize(_descriptor_of(txn))
+            _apply(txn, result["merchant"] or txn.get("merchant", ""), result["category"], result["method"])
+        return txn
+
+
+def _result(entry: tuple[str, str], confidence: float, method: str) -> dict:
+    merchant, category = entry
+    return {"merchant": merchant, "category": category, "confidence": confidence, "method": method}
+
+
+def _needs_category(txn: dict) -> bool:
+    return txn.get("category") in (None, "", TransactionCategory.OTHER.value)
+
+
+def _descriptor_of(txn: dict) -> str:
+    return txn.get("merchant") or txn.get("description", "")
+
+
+def _apply(txn: dict, merchant: str, category: str, method: str):
+    if method == "none":
+        txn["category"] = TransactionCategory.OTHER.value
+        return
+    txn.setdefault("raw_descriptor", _descriptor_of(txn))
+    txn["merchant"] = str(merchant)
+    txn["category"] = str(category)
+    txn["tags"] = list(txn.get("tags", [])) + [f"category:{method}"]
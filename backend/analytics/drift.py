@@ -0,0 +1,264 @@
+"""
+FinVerse AI — Behavioral Drift Engine
+Rolling per-category spend histograms over sliding windows (e.g. 7/30/90 days),
+compared against the preceding window of the same length with Jensen-Shannon
+divergence and PSI. Window sums are maintained incrementally as days slide.
+"""
+
+import logging
+import threading
+from datetime import datetime
+from typing import Optional
+import numpy as np
+
+from backend.models.transaction import TransactionCategory
+from backend.storage.ingest import IngestStage
+from backend.streaming.columnar import parse_timestamps
+
+logger = logging.getLogger(__name__)
+
+CATEGORIES = [c.value for c in TransactionCategory]
+_CATEGORY_INDEX = {c: i for i, c in enumerate(CATEGORIES)}
+_OTHER = _CATEGORY_INDEX[TransactionCategory.OTHER.value]
+
+# Smoothing so empty categories do not produce infinite PSI terms
+_EPS = 1e-4
+
+
+def _category_index(category: str) -> int:
+    return _CATEGORY_INDEX.get(category, _OTHER)
+
+
+def _day_of(timestamp) -> Optional[int]:
+    if timestamp is None:
+        return None
+    if isinstance(timestamp, str):
+        try:
+            timestamp = datetime.fromisoformat(timestamp)
+        except ValueError:
+            return None
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.replace(tzinfo=None) - timestamp.utcoffset()
+    return (timestamp - datetime(1970, 1, 1)).days
+
+
+class _WindowPair:
+    """Spend per category in the current window and the window immediately before it."""
+
+    __slots__ = ("days", "current", "reference")
+
+    def __init__(self, days: int):
+        self.days = days
+        self.current = np.zeros(len(CATEGORIES))
+        self.reference = np.zeros(len(CATEGORIES))
+
+
+class _UserDrift:
+    __slots__ = ("buckets", "day", "windows")
+
+    def __init__(self, windows: list[int]):
+        self.buckets: dict[int, np.ndarray] = {}  # day index -> spend per category
+        self.day: Optional[int] = None            # newest day the windows are anchored at
+        self.windows = [_WindowPair(w) for w in windows]
+
+
+class DriftEngine(IngestStage):
+    """
+    Incremental behavioral drift detection.
+
+    For each window length W the engine keeps two running histograms:
+    current = days (D-W, D], reference = days (D-2W, D-W], anchored at day D.
+    New expenses add to the current histogram; when D advances, buckets slide
+    from current to reference and out of reference — O(categories) per day moved.
+
+    Reports slide the windows too, so ingest and reporting share one lock.
+    """
+
+    name = "drift_engine"
+
+    def __init__(self, windows: Optional[list[int]] = None, top_k: int = 3, min_spend: float = 1.0):
+        self.windows = sorted(windows or [7, 30, 90])
+        self.top_k = top_k
+        self.min_spend = min_spend
+        self._users: dict[str, _UserDrift] = {}
+        self._lock = threading.Lock()
+
+    # ── Ingestion ───────────────────────────────────
+
+    def process(self, txn: dict) -> Optional[dict]:
+        self.observe(txn)
+        return txn
+
+    def observe(self, txn: dict):
+        """Add an expense to the user's histograms."""
+        if txn.get("is_credit", False):
+            return
+        day = _day_of(txn.get("timestamp"))
+        if day is None:
+            return
+        amount = float(txn.get("amount", 0))
+        cat = _category_index(txn.get("category", "other"))
+
+        with self._lock:
+            state = self._users.setdefault(txn.get("user_id", "default_user"), _UserDrift(self.windows))
+            if state.day is None:
+                state.day = day
+            elif day > state.day:
+                self._advance(state, day)
+
+            age = state.day - day
+            if age >= 2 * self.windows[-1]:
+                return  # Older than any window
+
+            state.buckets.setdefault(day, np.zeros(len(CATEGORIES)))[cat] += amount
+            for pair in state.windows:
+                if age < pair.days:
+                    pair.current[cat] += amount
+                elif age < 2 * pair.days:
+                    pair.reference[cat] += amount
+
+    def _advance(self, state: _UserDrift, new_day: int):
+        """Slide every window forward to `new_day` (engine lock held)."""
+        old_day = state.day
+        for pair in state.windows:
+            w = pair.days
+            if new_day - old_day >= 2 * w:
+                # Jumped past both windows — recompute from the remaining buckets
+                pair.current[:] = 0
+                pair.reference[:] = 0
+                for day, spend in state.buckets.items():
+                    age = new_day - day
+                    if age < w:
+                        pair.current += spend
+                    elif age < 2 * w:
+                        pair.reference += spend
+                continue
+
+            for day in range(old_day - 2 * w + 1, new_day - 2 * w + 1):
+                spend = state.buckets.get(day)
+                if spend is not None:
+                    pair.reference -= spend      # Leaves the reference window
+            for day in range(old_day - w + 1, new_day - w + 1):
+                spend = state.buckets.get(day)
+                if spend is not None:
+                    pair.current -= spend        # Moves from current to reference
+                    pair.reference += spend
+
+        horizon = new_day - 2 * self.windows[-1]
+        for day in [d for d in state.buckets if d <= horizon]:
+            del state.buckets[day]
+        state.day = new_day
+
+    # ── Partition lifecycle ─────────────────────────
+
+    def load_user(self, user_id: str, transactions: list[dict]):
+        """Rebuild a user's histograms from their history in one vectorized pass."""
+        expenses = [t for t in transactions if not t.get("is_credit", False)]
+        if not expenses:
+            self.evict_user(user_id)
+            return
+
+        days = parse_timestamps([t.get("timestamp") for t in expenses]) // 86400
+        cats = np.array([_category_index(t.get("category", "other")) for t in expenses])
+        amounts = np.array([t.get("amount", 0) for t in expenses], dtype=np.float64)
+
+        state = _UserDrift(self.windows)
+        state.day = int(days.max())
+        span = 2 * self.windows[-1]
+        keep = state.day - days < span
+        grid = np.zeros((span, len(CATEGORIES)))
+        np.add.at(grid, (state.day - days[keep], cats[keep]), amounts[keep])  # row = age in days
+
+        for age in np.flatnonzero(grid.any(axis=1)):
+            state.buckets[state.day - int(age)] = grid[age].copy()
+        for pair in state.windows:
+            pair.current = grid[:pair.days].sum(axis=0)
+            pair.reference = grid[pair.days:2 * pair.days].sum(axis=0)
+        with self._lock:
+            self._users[user_id] = state
+
+    def evict_user(self, user_id: str):
+        with self._lock:
+            self._users.pop(user_id, None)
+
+    # ── Reporting ───────────────────────────────────
+
+    def report(self, user_id: str, as_of: Optional[datetime] = None) -> dict:
+        """
+        Drift per window as of `as_of` (default: now).
+        Windows without spend in both halves are reported as insufficient data.
+        """
+        as_of_day = _day_of(as_of or datetime.utcnow())
+        with self._lock:
+            state = self._users.get(user_id)
+            if state is None or state.day is None:
+                return {}
+            if as_of_day is not None and as_of_day > state.day:
+                self._advance(state, as_of_day)
+            return {f"{pair.days}d": self._compare(pair) for pair in state.windows}
+
+    def _compare(self, pair: _WindowPair) -> dict:
+        cur_total = pair.current.sum()
+        ref_total = pair.reference.sum()
+        result = {
+            "window_days": pair.days,
+            "current_spend": round(float(cur_total), 2),
+            "reference_spend": round(float(ref_total), 2),
+        }
+        if cur_total < self.min_spend or ref_total < self.min_spend:
+            result["status"] = "insufficient_data"
+            return result
+
+        p = pair.current / cur_total + _EPS
+        q = pair.reference / ref_total + _EPS
+        p /= p.sum()
+        q /= q.sum()
+        m = 0.5 * (p + q)
+        js = 0.5 * np.sum(p * np.log(p / m)) + 0.5 * np.sum(q * np.log(q / m))
+        psi_terms = (p - q) * np.log(p / q)
+
+        top = np.argsort(-psi_terms)[:self.top_k]
+        result.update({
+            "status": "ok",
+            "js_divergence": round(float(js / np.log(2)), 4),  # normalized to [0, 1]
+            "psi": round(float(psi_terms.sum()), 4),
+            "level": _drift_level(float(psi_terms.sum())),
+            "top_categories": [
+                {
+                    "category": CATEGORIES[i],
+                    "share_before": round(float(q[i]) * 100, 1),
+                    "share_now": round(float(p[i]) * 100, 1),
+                    "spend_before": round(float(pair.reference[i]), 2),
+                    "spend_now": round(float(pair.current[i]), 2),
+                    "psi_contribution": round(float(psi_terms[i]), 4),
+                }
+                for i in top if psi_terms[i] > 0.001
+            ],
+        })
+        return result
+
+    def facts(self, user_id: str, as_of: Optional[datetime] = None) -> list[str]:
+        """Drift findings as short structured lines for agent prompts."""
+        lines = []
+        for window, r in self.report(user_id, as_of).items():
+            if r.get("status") != "ok":
+                lines.append(f"{window} vs previous {window}: insufficient history")
+                continue
+            line = (f"{window} vs previous {window}: {r['level']} drift "
+                    f"(PSI {r['psi']:.3f}, JS {r['js_divergence']:.3f}); "
+                    f"spend ₹{r['reference_spend']:,.0f} → ₹{r['current_spend']:,.0f}")
+            shifts = [f"{c['category']} {c['share_before']:.0f}%→{c['share_now']:.0f}%"
+                      for c in r["top_categories"]]
+            if shifts:
+                line += f"; top shifts: {', '.join(shifts)}"
+            lines.append(line)
+        return lines
+
+
+def _drift_level(psi: float) -> str:
+    # Conventional PSI bands
+    if psi < 0.1:
+        return "no significant"
+    if psi < 0.25:
+        return "moderate"
+    return "major"
@@ -0,0 +1,256 @@
+"""
+FinVerse AI — Recurring Payment Detector
+Finds subscriptions, rent, salaries and other recurring series by grouping
+transactions per normalized merchant and checking interval and amount stability.
+"""
+
+import bisect
+import logging
+from datetime import datetime
+from typing import Optional
+import numpy as np
+
+from backend.analytics.categorizer import normalize_descriptor
+from backend.storage.ingest import IngestStage
+from backend.streaming.columnar import format_timestamps, parse_timestamps
+
+logger = logging.getLogger(__name__)
+
+# Nominal periods in days
+PERIODS = {
+    "weekly": 7.0,
+    "biweekly": 14.0,
+    "monthly": 30.44,
+    "quarterly": 91.31,
+    "yearly": 365.25,
+}
+_PERIOD_NAMES = list(PERIODS)
+_PERIOD_DAYS = np.array(list(PERIODS.values()))
+
+DAY = 86400
+
+
+def series_key(txn: dict) -> str:
+    merchant = normalize_descriptor(txn.get("merchant", "")) or str(txn.get("merchant", "")).upper()
+    return f"{'+' if txn.get('is_credit', False) else '-'}{merchant}"
+
+
+class _Group:
+    """Most recent occurrences of one merchant (and direction) for one user, oldest first."""
+
+    __slots__ = ("merchant", "category", "is_credit", "timestamps", "amounts", "series")
+
+    def __init__(self, merchant: str, category: str, is_credit: bool):
+        self.merchant = merchant
+        self.category = category
+        self.is_credit = is_credit
+        self.timestamps: list[int] = []
+        self.amounts: list[float] = []
+        self.series: Optional[dict] = None
+
+
+class RecurringDetector(IngestStage):
+    """
+    Recurring-series detection per user.
+
+    A merchant group is recurring when it has at least `min_occurrences` charges whose
+    inter-arrival intervals average close to a known period (weekly … yearly) with a
+    low coefficient of variation, and whose amounts are stable. `load_user` analyzes
+    every group at once with grouped NumPy reductions; afterwards each new transaction
+    only re-analyzes its own group (at most `max_history` points).
+    """
+
+    name = "recurring_detector"
+
+    def __init__(self, min_occurrences: int = 3, max_history: int = 12, period_tolerance: float = 0.15,
+                 max_interval_cv: float = 0.25, max_amount_cv: float = 0.25):
+        self.min_occurrences = min_occurrences
+        self.max_history = max_history
+        self.period_tolerance = period_tolerance
+        self.max_interval_cv = max_interval_cv
+        self.max_amount_cv = max_amount_cv
+        self._users: dict[str, dict[str, _Group]] = {}
+
+    # ── Ingestion ───────────────────────────────────
+
+    def process(self, txn: dict) -> Optional[dict]:
+        self.observe(txn)
+        return txn
+
+    def observe(self, txn: dict):
+        """Add one transaction to its merchant group and re-analyze that group."""
+        if not txn.get("timestamp") or not txn.get("merchant"):
+            return
+        ts = int(parse_timestamps([txn["timestamp"]])[0])
+        groups = self._users.setdefault(txn.get("user_id", "default_user"), {})
+        key = series_key(txn)
+        group = groups.get(key)
+        if group is None:
+            group = groups[key] = _Group(txn["merchant"], txn.get("category", "other"), txn.get("is_credit", False))
+
+        pos = bisect.bisect(group.timestamps, ts)  # Usually the end; tolerate late arrivals
+        group.timestamps.insert(pos, ts)
+        group.amounts.insert(pos, float(txn.get("amount", 0)))
+        if len(group.timestamps) > self.max_history:
+            del group.timestamps[0], group.amounts[0]
+        group.merchant = txn["merchant"]
+        group.category = txn.get("category", group.category)
+
+        analysis = self._analyze(
+            np.zeros(len(group.timestamps), dtype=np.int64),
+            np.array(group.timestamps, dtype=np.int64),
+            np.array(group.amounts),
+        )
+        group.series = self._to_series(group, analysis, 0)
+
+    # ── Partition lifecycle ─────────────────────────
+
+    def load_user(self, user_id: str, transactions: list[dict]):
+        """Rebuild every merchant group for a user from history in one vectorized pass."""
+        self._users.pop(user_id, None)
+        rows = [t for t in transactions if t.get("timestamp") and t.get("merchant")]
+        groups: dict[str, _Group] = {}
+        self._users[user_id] = groups
+        if not rows:
+            return
+
+        keys = np.array([series_key(t) for t in rows], dtype=object)
+        ts = parse_timestamps([t["timestamp"] for t in rows])
+        amounts = np.array([t.get("amount", 0) for t in rows], dtype=np.float64)
+        uniques, codes = np.unique(keys.astype(str), return_inverse=True)
+
+        order = np.lexsort((ts, codes))
+        codes, ts, amounts = codes[order], ts[order], amounts[order]
+
+        # Keep only each group's newest `max_history` points
+        counts = np.bincount(codes, minlength=len(uniques))
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        from_end = counts[codes] - (np.arange(len(codes)) - starts[codes])
+        keep = from_end <= self.max_history
+        codes, ts, amounts = codes[keep], ts[keep], amounts[keep]
+        kept_rows = np.asarray(order)[keep]
+
+        analysis = self._analyze(codes, ts, amounts)
+
+        bounds = np.flatnonzero(np.diff(codes)) + 1
+        for g_codes, g_ts, g_amounts, g_rows in zip(
+            np.split(codes, bounds), np.split(ts, bounds), np.split(amounts, bounds), np.split(kept_rows, bounds),
+        ):
+            code = int(g_codes[0])
+            last = rows[int(g_rows[-1])]
+            group = _Group(last["merchant"], last.get("category", "other"), last.get("is_credit", False))
+            group.timestamps = g_ts.tolist()
+            group.amounts = g_amounts.tolist()
+            group.series = self._to_series(group, analysis, code)
+            groups[str(uniques[code])] = group
+
+    def evict_user(self, user_id: str):
+        self._users.pop(user_id, None)
+
+    # ── Analysis ────────────────────────────────────
+
+    def _analyze(self, codes: np.ndarray, ts: np.ndarray, amounts: np.ndarray) -> dict:
+        """
+        Grouped statistics for rows sorted by (group, timestamp).
+        Returns per-group arrays indexed by group code.
+        """
+        n_groups = int(codes.max()) + 1 if len(codes) else 0
+        count = np.bincount(codes, minlength=n_groups)
+
+        amt_mean = np.bincount(codes, weights=amounts, minlength=n_groups) / np.maximum(count, 1)
+        amt_var = np.bincount(codes, weights=(amounts - amt_mean[codes]) ** 2, minlength=n_groups) / np.maximum(count, 1)
+
+        # Intervals between consecutive points of the same group
+        same = codes[1:] == codes[:-1]
+        gaps = (np.diff(ts) / DAY)[same]
+        gap_codes = codes[1:][same]
+        n_gaps = np.bincount(gap_codes, minlength=n_groups)
+        gap_mean = np.bincount(gap_codes, weights=gaps, minlength=n_groups) / np.maximum(n_gaps, 1)
+        gap_var = np.bincount(gap_codes, weights=(gaps - gap_mean[gap_codes]) ** 2, minlength=n_groups) / np.maximum(n_gaps, 1)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            gap_cv = np.where(gap_mean > 0, np.sqrt(gap_var) / gap_mean, np.inf)
+            amt_cv = np.where(amt_mean > 0, np.sqrt(amt_var) / amt_mean, np.inf)
+            rel_err = np.abs(gap_mean[:, None] / _PERIOD_DAYS[None, :] - 1)
+            period_idx = rel_err.argmin(axis=1)
+            period_err = rel_err[np.arange(n_groups), period_idx]
+            confidence = np.nan_to_num(np.clip(
+                (1 - gap_cv / self.max_interval_cv * 0.5) * (1 - amt_cv / self.max_amount_cv * 0.5)
+                * np.minimum(1.0, (count - 1) / 5),
+                0.0, 1.0,
+            ))
+
+        recurring = (
+            (count >= self.min_occurrences)
+            & (period_err <= self.period_tolerance)
+            & (gap_cv <= self.max_interval_cv)
+            & (amt_cv <= self.max_amount_cv)
+        )
+
+        last_ts = np.zeros(n_groups, dtype=np.int64)
+        np.maximum.at(last_ts, codes, ts)
+        return {
+            "recurring": recurring,
+            "count": count,
+            "period_idx": period_idx,
+            "gap_mean": gap_mean,
+            "amount_mean": amt_mean,
+            "amount_std": np.sqrt(amt_var),
+            "confidence": confidence,
+            "last_ts": last_ts,
+        }
+
+    def _to_series(self, group: _Group, analysis: dict, code: int) -> Optional[dict]:
+        if not analysis["recurring"][code]:
+            return None
+        period_days = float(analysis["gap_mean"][code])
+        last_ts = int(analysis["last_ts"][code])
+        last_seen, expected_next = format_timestamps(np.array([last_ts, last_ts + int(period_days * DAY)]))
+        return {
+            "merchant": group.merchant,
+            "category": group.category,
+            "is_credit": group.is_credit,
+            "period": _PERIOD_NAMES[int(analysis["period_idx"][code])],
+            "period_days": round(period_days, 1),
+            "amount": round(group.amounts[-1], 2),
+            "average_amount": round(float(analysis["amount_mean"][code]), 2),
+            "amount_std": round(float(analysis["amount_std"][code]), 2),
+            "occurrences": int(analysis["count"][code]),
+            "last_seen": str(last_seen),
+            "expected_next": str(expected_next),
+            "confidence": round(float(analysis["confidence"][code]), 2),
+        }
+
+    # ── Queries ─────────────────────────────────────
+
+    def series(self, user_id: str, as_of: Optional[datetime] = None, active_only: bool = True) -> list[dict]:
+        """
+        Detected recurring series, largest monthly-equivalent amount first.
+        A series is active until it is more than half a period overdue.
+        """
+        now = int(parse_timestamps([as_of or datetime.utcnow()])[0])
+        result = []
+        for group in list(self._users.get(user_id, {}).values()):
+            s = group.series
+            if s is None:
+                continue
+            overdue_days = (now - group.timestamps[-1]) / DAY - s["period_days"]
+            active = overdue_days <= 0.5 * s["period_days"]
+            if active_only and not active:
+                continue
+            result.append({**s, "active": active,
+                           "monthly_amount": round(s["average_amount"] * PERIODS["monthly"] / PERIODS[s["period"]], 2)})
+        result.sort(key=lambda s: -s["monthly_amount"])
+        return result
+
+    def commitments(self, user_id: str, as_of: Optional[datetime] = None) -> dict:
+        """Monthly-equivalent totals of active recurring outflows and inflows."""
+        active = self.series(user_id, as_of)
+        outflows = [s for s in active if not s["is_credit"]]
+        inflows = [s for s in active if s["is_credit"]]
+        return {
+            "monthly_outflow": round(sum(s["monthly_amount"] for s in outflows), 2),
+            "monthly_inflow": round(sum(s["monthly_amount"] for s in inflows), 2),
+            "outflows": outflows,
+            "inflows": inflows,
+        }
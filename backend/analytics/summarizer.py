@@ -0,0 +1,156 @@
+"""
+FinVerse AI — Transaction Summarizer
+Multi-resolution transaction summaries for agent prompts, built from the
+store's running aggregates and memoized by store version.
+"""
+
+import logging
+from typing import Optional
+
+from backend.storage.transaction_store import TransactionStore
+
+logger = logging.getLogger(__name__)
+
+# Sections in the order they are rendered
+SECTIONS = ("overview", "recent", "monthly", "merchants", "anomalies")
+
+
+class TransactionSummarizer:
+    """
+    Summaries at several resolutions over the full history:
+    - overview: all-time totals and top categories
+    - recent: the last few transactions verbatim
+    - monthly: spend / income and top categories per month
+    - merchants: top merchants by spend
+    - anomalies: most recent transactions flagged at ingest
+
+    Everything is derived from `TransactionStore` aggregates, so cost does not grow
+    with history length, and results are cached until the store's version changes.
+    """
+
+    def __init__(self, recent_items: int = 10, months: int = 6, top_categories: int = 5,
+                 top_merchants: int = 5, anomalies: int = 5):
+        self.recent_items = recent_items
+        self.months = months
+        self.top_categories = top_categories
+        self.top_merchants = top_merchants
+        self.anomalies = anomalies
+
+    def summarize(self, store: TransactionStore) -> dict:
+        """Structured summary of the store (cached per version)."""
+        return store.cached("summarizer:data", lambda: self._build(store))
+
+    def render(self, store: TransactionStore, sections: Optional[tuple] = None) -> str:
+        """Prompt-ready text for the requested sections (cached per version)."""
+        sections = tuple(s for s in SECTIONS if s in (sections or SECTIONS))
+        return store.cached(
+            f"summarizer:text:{','.join(sections)}",
+            lambda: self._render(self.summarize(store), sections),
+        )
+
+    def render_for(self, state: dict, sections: Optional[tuple] = None) -> str:
+        """
+        Render from an agent state: uses the shared store when present, otherwise
+        falls back to summarizing the raw `transactions` list (uncached).
+        """
+        store = state.get("transaction_store")
+        if store is None:
+            transactions = state.get("transactions", [])
+            if not transactions:
+                return "No recent transactions available."
+            store = TransactionStore(transactions)
+        elif len(store) == 0:
+            return "No recent transactions available."
+        return self.render(store, sections)
+
+    # ── Building ────────────────────────────────────
+
+    def _build(self, store: TransactionStore) -> dict:
+        totals = store.summary()
+        agg = store.aggregates()
+
+        monthly = []
+        for month in sorted(agg["monthly"], reverse=True)[:self.months]:
+            m = agg["monthly"][month]
+            monthly.append({
+                "month": month,
+                "spent": round(m["spent"], 2),
+                "income": round(m["income"], 2),
+                "count": m["count"],
+                "top_categories": _top(m["categories"], self.top_categories),
+            })
+
+        merchants = sorted(agg["merchants"].items(), key=lambda x: -x[1][1])[:self.top_merchants]
+
+        return {
+            "overview": {
+                "transaction_count": totals["transaction_count"],
+                "total_spent": totals["total_spent"],
+                "total_income": totals["total_income"],
+                "net": totals["net"],
+                "top_categories": _top(totals["categories"], self.top_categories),
+                "flagged_count": totals["flagged_count"],
+            },
+            "recent": store.recent(self.recent_items),
+            "monthly": monthly,
+            "merchants": [
+                {"merchant": name, "count": count, "spent": round(spent, 2)}
+                for name, (count, spent) in merchants
+            ],
+            "anomalies": agg["flagged"][-self.anomalies:],
+            "version": agg["version"],
+        }
+
+    def _render(self, data: dict, sections: tuple) -> str:
+        parts = []
+        overview = data["overview"]
+        if "overview" in sections:
+            lines = [
+                f"Overview ({overview['transaction_count']} transactions):",
+                f"  Total Spent: ₹{overview['total_spent']:,.0f}",
+                f"  Total Income: ₹{overview['total_income']:,.0f}",
+                f"  Net: ₹{overview['net']:,.0f}",
+                "  Top Categories: " + (", ".join(
+                    f"{c['category']} ₹{c['amount']:,.0f}" for c in overview["top_categories"]) or "none"),
+            ]
+            parts.append("\n".join(lines))
+
+        if "recent" in sections and data["recent"]:
+            lines = [f"Recent Transactions (last {len(data['recent'])}):"]
+            for txn in reversed(data["recent"]):
+                sign, prep = ("+", "from") if txn.get("is_credit", False) else ("-", "at")
+                lines.append(f"  {sign} ₹{txn.get('amount', 0):,.0f} {prep} {txn.get('merchant', 'Unknown')} "
+                             f"({txn.get('category', 'other')}, {str(txn.get('timestamp', ''))[:10]})")
+            parts.append("\n".join(lines))
+
+        if "monthly" in sections and data["monthly"]:
+            lines = ["Monthly Breakdown:"]
+            for m in data["monthly"]:
+                cats = ", ".join(f"{c['category']} ₹{c['amount']:,.0f}" for c in m["top_categories"])
+                lines.append(f"  {m['month']}: spent ₹{m['spent']:,.0f}, income ₹{m['income']:,.0f}"
+                             f"{f' — {cats}' if cats else ''}")
+            parts.append("\n".join(lines))
+
+        if "merchants" in sections and data["merchants"]:
+            lines = ["Top Merchants:"]
+            lines += [f"  {m['merchant']}: ₹{m['spent']:,.0f} over {m['count']} transactions"
+                      for m in data["merchants"]]
+            parts.append("\n".join(lines))
+
+        if "anomalies" in sections:
+            # Anomalies scored at ingest by the online detector
+            lines = [f"Flagged Anomalies ({overview['flagged_count']}):"]
+            for txn in reversed(data["anomalies"]):
+                reasons = [tag.split(":", 1)[1] for tag in txn.get("tags", []) if tag.startswith("anomaly:")]
+                lines.append(f"  ₹{txn.get('amount', 0):,.0f} at {txn.get('merchant', 'Unknown')} "
+                             f"(score {txn.get('fraud_score', 0):.2f}; {', '.join(reasons) or 'unusual'})")
+            parts.append("\n".join(lines))
+
+        return "\n\n".join(parts)
+
+
+def _top(amounts: dict, k: int) -> list[dict]:
+    return [
+        {"category": cat, "amount": round(amount, 2)}
+        for cat, amount in sorted(amounts.items(), key=lambda x: -x[1])[:k]
+    ]
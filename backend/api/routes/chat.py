@@ -13,9 +13,8 @@ from pydantic import BaseModel
 from typing import Optional
 
 from backend.agents.orchestrator import AgentOrchestrator
-from backend.models.user import UserProfile
 from backend.models.agent_response import AgentEvent
-from backend.streaming.transaction_simulator import generate_transaction_batch
+from backend.storage.partitions import UserPartitionManager, DEFAULT_USER_ID
 
 logger = logging.getLogger(__name__)
 
@@ -23,26 +22,20 @@ router = APIRouter(prefix="/api/chat", tags=["Chat"])
 
 # Global orchestrator (initialized in main.py)
 _orchestrator: Optional[AgentOrchestrator] = None
-_user_profile: Optional[UserProfile] = None
-_transactions: list = []
+_partitions: Optional[UserPartitionManager] = None
 
 
-def init_chat(orchestrator: AgentOrchestrator):
-    """Initialize the chat route with the orchestrator."""
-    global _orchestrator, _user_profile, _transactions
+def init_chat(orchestrator: AgentOrchestrator, partitions: UserPartitionManager):
+    """Initialize the chat route with the orchestrator and the per-user partitions."""
+    global _orchestrator, _partitions
     _orchestrator = orchestrator
-    _user_profile = UserProfile()
-    _transactions = generate_transaction_batch(30)
-
-    # Update user profile with transaction spending
-    for txn in _transactions:
-        if not txn.get("is_credit", False):
-            _user_profile.update_spending(txn.get("category", "other"), txn.get("amount", 0))
+    _partitions = partitions
 
 
 class ChatRequest(BaseModel):
     query: str
     stream: bool = True
+    user_id: str = DEFAULT_USER_ID
 
 
 class ChatResponse(BaseModel):
@@ -59,9 +52,11 @@ async def chat_query(request: ChatRequest):
     if not _orchestrator:
         raise HTTPException(status_code=503, detail="Orchestrator not initialized")
 
+    partition = await asyncio.to_thread(_partitions.get, request.user_id)  # Cold users load from disk
+
     if request.stream:
         return StreamingResponse(
-            _stream_response(request.query),
+            _stream_response(request.query, partition),
             media_type="text/event-stream",
             headers={
                 "Cache-Control": "no-cache",
@@ -73,8 +68,10 @@ async def chat_query(request: ChatRequest):
         # Non-streaming mode
         result = await _orchestrator.process_query(
             query=request.query,
-            user_profile=_user_profile,
-            transactions=_transactions,
+            user_profile=partition.profile,
+            transactions=partition.store.all(),
+            transaction_store=partition.store,
+            partition=partition,
         )
         return ChatResponse(
             response=result.response,
@@ -85,7 +82,7 @@ async def chat_query(request: ChatRequest):
         )
 
 
-async def _stream_response(query: str):
+async def _stream_response(query: str, partition):
     """Stream agent events as SSE."""
     event_queue = asyncio.Queue()
 
@@ -97,8 +94,10 @@ async def _stream_response(query: str):
         try:
             result = await _orchestrator.process_query(
                 query=query,
-                user_profile=_user_profile,
-                transactions=_transactions,
+                user_profile=partition.profile,
+                transactions=partition.store.all(),
+                transaction_store=partition.store,
+                partition=partition,
                 event_callback=event_callback,
             )
             # Send final response
@@ -149,6 +148,5 @@ async def chat_health():
     return {
         "status": "ok",
         "orchestrator": _orchestrator is not None,
-        "transactions_loaded": len(_transactions),
-        "user_profile_loaded": _user_profile is not None,
+        "partitions": _partitions.stats() if _partitions else None,
     }
@@ -0,0 +1,94 @@
+"""
+FinVerse AI — Compliance API Routes
+Full-history compliance sweep control, its precomputed risk rollups, and
+investigation queries over the audit log.
+"""
+
+import asyncio
+import logging
+from typing import Optional
+from fastapi import APIRouter, HTTPException
+from backend.storage.partitions import DEFAULT_USER_ID
+from backend.analytics.risk_graph import CounterpartyRiskGraph
+from backend.storage.audit_log import AuditLog
+from backend.tools.compliance_sweep import ComplianceSweep
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api/compliance", tags=["Compliance"])
+
+# Background sweep, audit trail and counterparty graph (initialized in main.py)
+_sweep: Optional[ComplianceSweep] = None
+_audit_log: Optional[AuditLog] = None
+_risk_graph: Optional[CounterpartyRiskGraph] = None
+
+
+def init_compliance(sweep: ComplianceSweep, audit_log: AuditLog, risk_graph: Optional[CounterpartyRiskGraph] = None):
+    """Initialize with the full-history compliance sweep, the audit log and the risk graph."""
+    global _sweep, _audit_log, _risk_graph
+    _sweep = sweep
+    _audit_log = audit_log
+    _risk_graph = risk_graph
+
+
+@router.post("/sweep")
+async def start_sweep(resume: bool = True):
+    """Start a full-history sweep (resuming an interrupted one unless `resume` is false)."""
+    if not _sweep.start(resume=resume):
+        raise HTTPException(status_code=409, detail="A compliance sweep is already running")
+    return _sweep.status()
+
+
+@router.delete("/sweep")
+async def cancel_sweep():
+    """Stop the running sweep; it can be resumed later."""
+    _sweep.cancel()
+    return _sweep.status()
+
+
+@router.get("/sweep")
+async def sweep_status():
+    """Progress of the current (or last) sweep."""
+    return _sweep.status()
+
+
+@router.get("/risk")
+async def get_risk(user_id: Optional[str] = DEFAULT_USER_ID):
+    """Risk rollup from the last completed sweep; `user_id=` (empty) returns every user."""
+    if not user_id:
+        return {"users": _sweep.rollup()}
+    return {"user_id": user_id, "rollup": _sweep.rollup(user_id)}
+
+
+@router.get("/violations")
+async def get_violations(user_id: str = DEFAULT_USER_ID, limit: int = 100):
+    """A user's flagged transactions from the last completed sweep."""
+    return {"user_id": user_id, "violations": _sweep.violations(user_id, limit)}
+
+
+@router.get("/risk-graph")
+async def get_risk_graph(kind: str = "merchant", limit: int = 10):
+    """Highest network-risk counterparties ("merchant", "account") or users from the last propagation."""
+    if _risk_graph is None:
+        raise HTTPException(status_code=503, detail="Risk graph not initialized")
+    return {"top": _risk_graph.top_risks(limit=limit, kind=kind), **_risk_graph.stats()}
+
+
+@router.get("/audit")
+async def query_audit(
+    txn_id: Optional[str] = None,
+    rule_id: Optional[str] = None,
+    start: Optional[float] = None,
+    end: Optional[float] = None,
+    limit: int = 100,
+):
+    """Audit records matching every given filter (`start`/`end` in epoch seconds), newest `limit`."""
+    # Disk reads stay off the event loop
+    records = await asyncio.to_thread(_audit_log.query, txn_id=txn_id, rule_id=rule_id, start=start, end=end, limit=limit)
+    return {"records": records}
+
+
+@router.get("/audit/stats")
+async def audit_stats():
+    """Segment, record and group-commit counters of the audit log."""
+    return _audit_log.stats()
@@ -1,64 +1,155 @@
 """
 FinVerse AI — Transaction API Routes
+Supports REST listing plus a server-push feed over SSE and WebSocket.
 """
 
+import asyncio
+import json
 import logging
-from fastapi import APIRouter
-from backend.streaming.transaction_simulator import generate_transaction, generate_transaction_batch
+from typing import Optional
+from fastapi import APIRouter, Header, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from backend.storage.partitions import UserPartitionManager, DEFAULT_USER_ID
+from backend.streaming.broadcaster import TransactionBroadcaster
+from backend.streaming.transaction_simulator import generate_transaction
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/transactions", tags=["Transactions"])
 
-# In-memory transaction store (would be database in production)
-_transactions: list = []
+# Per-user partitions and real-time feed (initialized in main.py)
+_partitions: Optional[UserPartitionManager] = None
+_broadcaster: Optional[TransactionBroadcaster] = None
+_heartbeat: float = 15.0
 
 
-def init_transactions():
-    """Initialize with seed data."""
-    global _transactions
-    _transactions = generate_transaction_batch(30)
+def init_transactions(partitions: UserPartitionManager, broadcaster: TransactionBroadcaster, heartbeat: float = 15.0):
+    """Initialize with the user partitions and the real-time feed."""
+    global _partitions, _broadcaster, _heartbeat
+    _partitions = partitions
+    _broadcaster = broadcaster
+    _heartbeat = heartbeat
 
 
 @router.get("/")
-async def get_transactions(limit: int = 50):
+async def get_transactions(limit: int = 50, user_id: str = DEFAULT_USER_ID):
     """Get recent transactions."""
+    # Loading a cold partition reads from disk — keep it off the event loop
+    store = (await asyncio.to_thread(_partitions.get, user_id)).store
     return {
-        "transactions": _transactions[-limit:],
-        "total": len(_transactions),
+        "transactions": store.recent(limit),
+        "total": len(store),
+        "version": store.version,
+        "seq": _broadcaster.last_seq,
     }
 
 
 @router.post("/generate")
-async def generate_new_transaction():
+async def generate_new_transaction(user_id: str = DEFAULT_USER_ID):
     """Generate a new random transaction (for demo)."""
-    txn = generate_transaction()
-    _transactions.append(txn)
-    return {"transaction": txn, "total": len(_transactions)}
+    txn = await asyncio.to_thread(_partitions.ingest, user_id, generate_transaction(), "simulator")
+    store = (await asyncio.to_thread(_partitions.get, user_id)).store
+    return {"transaction": txn, "total": len(store), "seq": _broadcaster.last_seq}
+
+
+@router.get("/stream")
+async def stream_transactions(
+    request: Request,
+    since: Optional[int] = Query(None, description="Resume after this sequence number"),
+    user_id: str = DEFAULT_USER_ID,
+    last_event_id: Optional[str] = Header(None),
+):
+    """
+    Server-Sent Events feed of new transactions.
+    Browsers resume automatically via the Last-Event-ID header on reconnect.
+    """
+    if since is None and last_event_id and last_event_id.isdigit():
+        since = int(last_event_id)
+
+    subscription = _broadcaster.subscribe(since=since, user_id=user_id)
+
+    async def event_stream():
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                if await request.is_disconnected():
+                    break
+                event = await subscription.next_event(timeout=_heartbeat)
+                if event is None:
+                    if subscription.closed:
+                        break
+                    yield ": keep-alive\n\n"
+                    continue
+                # A resync moves the browser's Last-Event-ID forward to where the feed is now
+                seq = event["seq"] if event.get("seq") is not None else event.get("latest_seq")
+                event_id = f"id: {seq}\n" if seq is not None else ""
+                yield f"{event_id}data: {json.dumps(event)}\n\n"
+        finally:
+            subscription.close()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "X-Accel-Buffering": "no",
+        }
+    )
+
+
+@router.websocket("/ws")
+async def transactions_websocket(websocket: WebSocket, since: Optional[int] = None,
+                                 user_id: str = DEFAULT_USER_ID):
+    """WebSocket feed of new transactions. Pass `since` to resume after a sequence number."""
+    await websocket.accept()
+    subscription = _broadcaster.subscribe(since=since, user_id=user_id)
+    try:
+        # Runs until next_event() returns None on a closed subscription, so the events
+        # queued before a slow-consumer drop are still sent ahead of the close frame
+        while True:
+            event = await subscription.next_event(timeout=_heartbeat)
+            if event is None:
+                if subscription.closed:
+                    # Dropped as a slow consumer — the client reconnects with `since`
+                    await websocket.close(code=1013, reason="Slow consumer")
+                    break
+                await websocket.send_json({"type": "heartbeat", "seq": _broadcaster.last_seq})
+                continue
+            await websocket.send_json(event)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        subscription.close()
+
+
+@router.get("/stream/stats")
+async def stream_stats():
+    """Real-time feed, user partition and ingestion statistics."""
+    return {
+        **_broadcaster.stats(),
+        "partitions": _partitions.stats(),
+        "ingest_dropped": dict(_partitions.pipeline.dropped),
+    }
 
 
 @router.get("/summary")
-async def get_transaction_summary():
+async def get_transaction_summary(user_id: str = DEFAULT_USER_ID):
     """Get spending summary."""
-    categories = {}
-    total_spent = 0
-    total_income = 0
-
-    for txn in _transactions:
-        amount = txn.get("amount", 0)
-        cat = txn.get("category", "other")
+    partition = await asyncio.to_thread(_partitions.get, user_id)
+    return partition.store.summary()
 
-        if txn.get("is_credit", False):
-            total_income += amount
-        else:
-            total_spent += amount
-            categories[cat] = categories.get(cat, 0) + amount
 
+@router.get("/recurring")
+async def get_recurring(user_id: str = DEFAULT_USER_ID, active_only: bool = True):
+    """Recurring payments and income detected at ingest."""
+    await asyncio.to_thread(_partitions.get, user_id)  # Loads the partition (and detector state) if needed
+    detector = _partitions.pipeline.get_stage("recurring_detector")
+    if detector is None:
+        return {"series": [], "monthly_outflow": 0.0, "monthly_inflow": 0.0}
+    commitments = detector.commitments(user_id)
     return {
-        "total_spent": round(total_spent, 2),
-        "total_income": round(total_income, 2),
-        "net": round(total_income - total_spent, 2),
-        "categories": {k: round(v, 2) for k, v in sorted(categories.items(), key=lambda x: -x[1])},
-        "transaction_count": len(_transactions),
-        "flagged_count": sum(1 for t in _transactions if t.get("is_flagged", False)),
+        "series": detector.series(user_id, active_only=active_only),
+        "monthly_outflow": commitments["monthly_outflow"],
+        "monthly_inflow": commitments["monthly_inflow"],
     }
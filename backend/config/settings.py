@@ -35,12 +35,92 @@ class Settings(BaseSettings):
     FAISS_INDEX_DIR: str = "./data/faiss_index"
     EMBEDDING_MODEL: str = "all-MiniLM-L6-v2"
     RERANKER_MODEL: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+    FAISS_INDEX_TYPE: str = "flat"  # flat (exact) | ivf_flat | ivf_pq | hnsw — applied when index_documents.py builds the index
+    FAISS_IVF_NLIST: int = 1024  # IVF lists (capped to ~1 per 39 training vectors)
+    FAISS_PQ_M: int = 16  # PQ sub-quantizers (must divide the embedding dimension)
+    FAISS_PQ_NBITS: int = 8  # bits per PQ code
+    FAISS_HNSW_M: int = 32  # HNSW graph degree
+    FAISS_HNSW_EF_CONSTRUCTION: int = 200
+    FAISS_TRAIN_SAMPLE: int = 100_000  # vectors used to train IVF/PQ (0 = all)
+    FAISS_NPROBE: int = 16  # search: IVF lists probed per query (recall vs latency)
+    FAISS_HNSW_EF_SEARCH: int = 64  # search: HNSW candidate list size (recall vs latency)
+    EMBEDDING_CACHE_SIZE: int = 10_000  # LRU of query embeddings shared by retrieval and the categorizer
+    EMBEDDING_CACHE_PATH: Optional[str] = None  # persist that cache here between restarts (e.g. ./data/faiss_index/query_cache.npz)
+    EMBEDDING_BATCH_MAX_SIZE: int = 32  # micro-batching: most texts encoded in one model call
+    EMBEDDING_BATCH_MAX_WAIT_MS: float = 5.0  # wait this long for concurrent requests to join a batch (0 = off)
+    RAG_RETRIEVAL_WORKERS: int = 4  # threads for embedding, FAISS, BM25 and reranking (bounds retrieval CPU)
+    RAG_WARMUP: bool = True  # load the embedding + reranker models in the background at startup (BM25-only until then)
 
     # ── Database ────────────────────────────────────────
     POSTGRES_URL: Optional[str] = None
     MONGODB_URI: Optional[str] = None
     REDIS_URL: Optional[str] = None
 
+    # ── Compliance Rules ────────────────────────────────
+    COMPLIANCE_LARGE_TXN_THRESHOLD: float = 1000000    # AML_001 reporting threshold (₹)
+    COMPLIANCE_STRUCTURING_THRESHOLD: float = 900000   # AML_002 "just below threshold" floor (₹)
+    COMPLIANCE_STRUCTURING_WINDOW_DAYS: int = 7        # AML_002 look-back window
+    COMPLIANCE_STRUCTURING_MIN_COUNT: int = 2          # AML_002 near-threshold transactions that trigger it
+    COMPLIANCE_UNUSUAL_HOURS: list = [1, 5]            # FRAUD_001 inclusive hour range
+    COMPLIANCE_MAX_TXN_PER_HOUR: int = 10              # FRAUD_002 velocity limit
+    COMPLIANCE_BUDGET_WARN_RATIO: float = 0.9          # BUDGET_001 utilization warning
+    COMPLIANCE_HIGH_RISK_TERMS: list = ["gambling", "casino", "crypto", "forex", "betting"]
+    COMPLIANCE_GRAPH_RISK_THRESHOLD: float = 0.3       # RISK_001 counterparty network risk cutoff
+    COMPLIANCE_UNSAFE_TERMS: list = [                  # phrases never allowed in generated advice
+        "guaranteed returns", "no risk", "insider", "tax evasion",
+        "hide income", "unregulated", "ponzi", "pyramid",
+    ]
+    COMPLIANCE_UNSAFE_TERMS_FILE: str = ""             # extra phrases, one per line
+    COMPLIANCE_OUTPUT_POLICY: str = "redact"           # streamed answers: "redact" or "abort" on a match
+    COMPLIANCE_SWEEP_DIR: str = "./data/compliance"    # full-history sweep reports and rollups
+    COMPLIANCE_SWEEP_INTERVAL_HOURS: float = 24.0      # scheduled sweeps (0 = on demand only)
+    COMPLIANCE_SWEEP_WORKERS: int = 0                  # sweep processes (0 = CPU count - 1)
+    COMPLIANCE_UNTRACKED_SOURCES: list = ["simulator"]  # ingest sources kept out of the AML_002/FRAUD_002 windows
+
+    # ── Counterparty Risk Graph ─────────────────────────
+    RISK_GRAPH_DAMPING: float = 0.85           # share of a node's risk taken from its neighbors
+    RISK_GRAPH_INTERVAL_SECONDS: float = 60.0  # propagation schedule
+    RISK_GRAPH_MAX_EDGES: int = 1_000_000      # least recently active users are dropped above this
+
+    # ── Audit Log ───────────────────────────────────────
+    AUDIT_LOG_DIR: str = "./data/audit"        # append-only compliance verdict segments
+    AUDIT_SEGMENT_MB: float = 64.0             # segment size before rotation
+    AUDIT_FLUSH_INTERVAL_MS: float = 5.0       # group-commit interval (one fsync per batch)
+    AUDIT_RETENTION_DAYS: float = 2555.0       # sealed segments older than this are dropped (0 = keep)
+
+    # ── Duplicate Detection ─────────────────────────────
+    DEDUP_TOLERANCE_SECONDS: int = 300         # same amount + merchant within this window is a possible duplicate
+    DEDUP_RETENTION_DAYS: int = 35             # how far back re-imports are still recognized
+
+    # ── Merchant Categorization ─────────────────────────
+    CATEGORIZER_FUZZY_THRESHOLD: float = 0.6   # minimum trigram Dice similarity for a fuzzy match
+    CATEGORIZER_EMBEDDING_FALLBACK: bool = False  # embed descriptors nothing else matched (loads EMBEDDING_MODEL)
+    CATEGORIZER_CACHE_SIZE: int = 100000       # cached descriptor results
+
+    # ── Anomaly Detection ───────────────────────────────
+    ANOMALY_THRESHOLD: float = 0.45            # fraud_score at or above this sets is_flagged
+    ANOMALY_EWMA_ALPHA: float = 0.1            # weight of the newest amount in the EWMA
+    ANOMALY_MIN_HISTORY: int = 5               # transactions needed before a baseline is trusted
+
+    # ── Recurring Payments ──────────────────────────────
+    RECURRING_MIN_OCCURRENCES: int = 3         # charges needed before a series is reported
+    RECURRING_MAX_AMOUNT_CV: float = 0.25      # amount std/mean allowed within a series
+
+    # ── Cash-Flow Forecast ──────────────────────────────
+    FORECAST_HORIZON_DAYS: int = 90            # days projected ahead
+    FORECAST_PATHS: int = 2000                 # Monte Carlo paths
+    FORECAST_LOOKBACK_DAYS: int = 90           # history resampled for non-recurring flows
+
+    # ── Behavioral Drift ────────────────────────────────
+    DRIFT_WINDOWS: list = [7, 30, 90]          # window lengths in days (each vs the preceding window)
+    DRIFT_TOP_K: int = 3                       # drifting categories surfaced per window
+
+    # ── User Partitions ─────────────────────────────────
+    USER_DATA_DIR: str = "./data/users"        # one JSON document per user
+    USER_CACHE_MAX_USERS: int = 1000           # resident partitions before LRU eviction
+    USER_CACHE_MAX_MEMORY_MB: float = 512.0    # estimated memory cap for resident partitions
+    SEED_DEMO_TRANSACTIONS: bool = True        # seed new users with simulated history
+
     # ── Authentication ──────────────────────────────────
     JWT_SECRET_KEY: str = "finverse-ai-secret-key-change-in-production"
     JWT_ALGORITHM: str = "HS256"
@@ -48,6 +128,11 @@ class Settings(BaseSettings):
 
     # ── Streaming ───────────────────────────────────────
     TRANSACTION_STREAM_INTERVAL: float = 3.0  # seconds between simulated txns
+    TRANSACTION_STREAM_ENABLED: bool = True
+    TRANSACTION_FEED_BUFFER_SIZE: int = 1000        # ring buffer for resume/replay
+    TRANSACTION_FEED_SUBSCRIBER_QUEUE: int = 256    # per-consumer backlog before lagging
+    TRANSACTION_FEED_SLOW_CONSUMER_POLICY: str = "resync"  # "resync" or "drop"
+    TRANSACTION_FEED_HEARTBEAT: float = 15.0        # seconds between SSE keep-alives
 
     # ── CORS ────────────────────────────────────────────
     CORS_ORIGINS: list = ["http://localhost:5173", "http://localhost:3000"]
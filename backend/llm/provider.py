@@ -118,6 +118,102 @@ class LLMProvider:
         error_summary = "; ".join(errors) if errors else "No LLM providers configured"
         return f"I apologize, but I'm unable to process your request right now. All language model providers are unavailable. Errors: {error_summary}", "none"
 
+    async def stream(
+        self,
+        prompt: str,
+        system_prompt: str = "",
+        temperature: float = 0.7,
+        max_tokens: int = 2048,
+    ) -> AsyncGenerator[str, None]:
+        """
+        Stream a response as text chunks, trying each provider in order.
+        Falls back to the next provider only if the current one fails before
+        producing any output.
+        """
+        errors = []
+        for provider in self._providers:
+            name = provider["name"]
+            produced = False
+            try:
+                logger.info(f"🧠 Streaming LLM: {name} ({provider['model']})")
+                if name == "gemini":
+                    chunks = self._stream_gemini(prompt, system_prompt, temperature, max_tokens)
+                elif name in ("groq", "openai"):
+                    chunks = self._stream_chat(name, prompt, system_prompt, temperature, max_tokens, provider["model"])
+                else:
+                    continue
+
+                async for chunk in chunks:
+                    if chunk:
+                        produced = True
+                        yield chunk
+                if produced:
+                    logger.info(f"✅ LLM stream from: {name}")
+                    return
+
+            except Exception as e:
+                if produced:
+                    raise
+                error_msg = f"{name}: {str(e)}"
+                errors.append(error_msg)
+                logger.warning(f"⚠️ LLM fallback — {error_msg}")
+
+        error_summary = "; ".join(errors) if errors else "No LLM providers configured"
+        yield f"I apologize, but I'm unable to process your request right now. All language model providers are unavailable. Errors: {error_summary}"
+
+    @staticmethod
+    async def _iterate_in_thread(iterator) -> AsyncGenerator:
+        """Drain a blocking SDK iterator without blocking the event loop."""
+        done = object()
+        while True:
+            item = await asyncio.to_thread(next, iterator, done)
+            if item is done:
+                return
+            yield item
+
+    async def _stream_gemini(self, prompt: str, system_prompt: str, temperature: float, max_tokens: int) -> AsyncGenerator[str, None]:
+        """Stream with Google Gemini."""
+        import google.generativeai as genai
+        genai.configure(api_key=self.settings.GOOGLE_API_KEY)
+
+        model = genai.GenerativeModel(
+            self.settings.GEMINI_MODEL,
+            system_instruction=system_prompt if system_prompt else None,
+        )
+        response = await asyncio.to_thread(
+            model.generate_content, prompt, stream=True,
+            generation_config=genai.types.GenerationConfig(temperature=temperature, max_output_tokens=max_tokens),
+        )
+        async for chunk in self._iterate_in_thread(iter(response)):
+            yield chunk.text
+
+    async def _stream_chat(self, name: str, prompt: str, system_prompt: str, temperature: float, max_tokens: int,
+                           model: str) -> AsyncGenerator[str, None]:
+        """Stream with an OpenAI-compatible chat API (Groq, OpenAI)."""
+        if name == "groq":
+            from groq import Groq
+            client = Groq(api_key=self.settings.GROQ_API_KEY)
+        else:
+            from openai import OpenAI
+            client = OpenAI(api_key=self.settings.OPENAI_API_KEY)
+
+        messages = []
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+        messages.append({"role": "user", "content": prompt})
+
+        response = await asyncio.to_thread(
+            client.chat.completions.create,
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            stream=True,
+        )
+        async for chunk in self._iterate_in_thread(iter(response)):
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
     async def _generate_gemini(self, prompt: str, system_prompt: str, temperature: float, max_tokens: int) -> Optional[str]:
         """Generate with Google Gemini."""
         import google.generativeai as genai
@@ -4,19 +4,38 @@ FinVerse AI — FastAPI Main Entry Point
 
 import sys
 import os
+import asyncio
 import logging
 
 # Add project root to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+from typing import Optional
 
 from backend.config.settings import settings
 from backend.agents.orchestrator import AgentOrchestrator
 from backend.api.routes.chat import router as chat_router, init_chat
 from backend.api.routes.transactions import router as txn_router, init_transactions
+from backend.api.routes.compliance import router as compliance_router, init_compliance
+from backend.analytics.anomaly_detector import OnlineAnomalyDetector
+from backend.analytics.categorizer import MerchantCategorizer
+from backend.analytics.drift import DriftEngine
+from backend.analytics.recurring import RecurringDetector
+from backend.analytics.risk_graph import CounterpartyRiskGraph
+from backend.rag.hybrid_retriever import BM25Retriever, CrossEncoderReranker, HybridRetriever
+from backend.rag.vector_store import VectorStore
+from backend.storage.audit_log import AuditLog
+from backend.storage.dedup import DuplicateFilter
+from backend.storage.ingest import IngestPipeline
+from backend.storage.partitions import JsonPartitionStorage, UserPartitionManager, DEFAULT_USER_ID
+from backend.streaming.broadcaster import TransactionBroadcaster
+from backend.streaming.transaction_simulator import generate_transaction_batch, simulate_transaction_stream
+from backend.tools.compliance_rules import ComplianceMonitor
+from backend.tools.compliance_sweep import ComplianceSweep
 
 # Configure logging
 logging.basicConfig(
@@ -25,18 +44,136 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Document retriever (initialized in lifespan, reported by /api/ready)
+_retriever: Optional[HybridRetriever] = None
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application startup and shutdown."""
+    global _retriever
     logger.info("🚀 Starting FinVerse AI...")
     logger.info(f"   App: {settings.APP_NAME} v{settings.APP_VERSION}")
     logger.info(f"   Debug: {settings.DEBUG}")
 
     # Initialize orchestrator
     orchestrator = AgentOrchestrator(settings)
-    init_chat(orchestrator)
-    init_transactions()
+
+    # Compliance audit trail (written off the request path by a group-commit thread)
+    audit_log = AuditLog(
+        settings.AUDIT_LOG_DIR,
+        segment_bytes=int(settings.AUDIT_SEGMENT_MB * 1024 * 1024),
+        flush_interval=settings.AUDIT_FLUSH_INTERVAL_MS / 1000,
+        retention_days=settings.AUDIT_RETENTION_DAYS,
+    )
+    orchestrator.set_audit_log(audit_log)
+
+    # Document retrieval: persisted indexes load now (BM25 is memory-mapped),
+    # the embedding and reranker models warm up in the background
+    vector_store = VectorStore(
+        index_dir=settings.FAISS_INDEX_DIR,
+        model_name=settings.EMBEDDING_MODEL,
+        cache_size=settings.EMBEDDING_CACHE_SIZE,
+        cache_path=settings.EMBEDDING_CACHE_PATH,
+        batch_size=settings.EMBEDDING_BATCH_MAX_SIZE,
+        batch_wait_ms=settings.EMBEDDING_BATCH_MAX_WAIT_MS,
+        nprobe=settings.FAISS_NPROBE,
+        ef_search=settings.FAISS_HNSW_EF_SEARCH,
+    )
+    retriever = HybridRetriever(
+        vector_store,
+        BM25Retriever(),
+        CrossEncoderReranker(settings.RERANKER_MODEL),
+        warm=not settings.RAG_WARMUP,
+        max_workers=settings.RAG_RETRIEVAL_WORKERS,
+    )
+    retriever.load(settings.FAISS_INDEX_DIR)
+    orchestrator.set_retriever(retriever)
+    _retriever = retriever
+
+    # Ingestion: every transaction is enriched here before it is stored
+    risk_graph = CounterpartyRiskGraph(
+        high_risk_terms=settings.COMPLIANCE_HIGH_RISK_TERMS,
+        damping=settings.RISK_GRAPH_DAMPING,
+        threshold=settings.COMPLIANCE_GRAPH_RISK_THRESHOLD,
+        max_edges=settings.RISK_GRAPH_MAX_EDGES,
+    )
+    orchestrator.compliance_engine.risk_graph = risk_graph
+    embedder = vector_store if settings.CATEGORIZER_EMBEDDING_FALLBACK else None  # Shares the loaded model
+    pipeline = IngestPipeline([
+        DuplicateFilter(
+            tolerance_seconds=settings.DEDUP_TOLERANCE_SECONDS,
+            retention_seconds=settings.DEDUP_RETENTION_DAYS * 86400,
+        ),
+        MerchantCategorizer(
+            fuzzy_threshold=settings.CATEGORIZER_FUZZY_THRESHOLD,
+            embedder=embedder,
+            cache_size=settings.CATEGORIZER_CACHE_SIZE,
+        ),
+        OnlineAnomalyDetector(
+            threshold=settings.ANOMALY_THRESHOLD,
+            alpha=settings.ANOMALY_EWMA_ALPHA,
+            min_history=settings.ANOMALY_MIN_HISTORY,
+        ),
+        DriftEngine(windows=settings.DRIFT_WINDOWS, top_k=settings.DRIFT_TOP_K),
+        RecurringDetector(
+            min_occurrences=settings.RECURRING_MIN_OCCURRENCES,
+            max_amount_cv=settings.RECURRING_MAX_AMOUNT_CV,
+        ),
+        risk_graph,
+        ComplianceMonitor(orchestrator.compliance_engine, audit_log=audit_log),
+    ])
+    orchestrator.set_ingest_pipeline(pipeline)
+
+    # Per-user partitions — the single source of profiles and transactions for routes and agents
+    partitions = UserPartitionManager(
+        JsonPartitionStorage(settings.USER_DATA_DIR),
+        max_users=settings.USER_CACHE_MAX_USERS,
+        max_memory_mb=settings.USER_CACHE_MAX_MEMORY_MB,
+        seed_factory=(lambda user_id: generate_transaction_batch(30)) if settings.SEED_DEMO_TRANSACTIONS else None,
+        pipeline=pipeline,
+    )
+
+    # Real-time transaction feed
+    broadcaster = TransactionBroadcaster(
+        buffer_size=settings.TRANSACTION_FEED_BUFFER_SIZE,
+        subscriber_queue_size=settings.TRANSACTION_FEED_SUBSCRIBER_QUEUE,
+        slow_consumer_policy=settings.TRANSACTION_FEED_SLOW_CONSUMER_POLICY,
+    )
+    partitions.add_listener(broadcaster.publish)
+
+    # Full-history compliance sweep (off the request path, in worker processes)
+    sweep = ComplianceSweep(
+        partitions,
+        orchestrator.compliance_engine,
+        report_dir=settings.COMPLIANCE_SWEEP_DIR,
+        workers=settings.COMPLIANCE_SWEEP_WORKERS,
+    )
+    orchestrator.set_compliance_sweep(sweep)
+
+    init_chat(orchestrator, partitions)
+    init_transactions(partitions, broadcaster, heartbeat=settings.TRANSACTION_FEED_HEARTBEAT)
+    init_compliance(sweep, audit_log, risk_graph)
+
+    stream_task = None
+    if settings.TRANSACTION_STREAM_ENABLED:
+        stream_task = asyncio.create_task(
+            simulate_transaction_stream(
+                settings.TRANSACTION_STREAM_INTERVAL,
+                lambda txn: partitions.ingest(DEFAULT_USER_ID, txn, source="simulator"),
+            )
+        )
+
+    warmup_task = None
+    if settings.RAG_WARMUP:
+        warmup_task = asyncio.create_task(asyncio.to_thread(retriever.warmup))
+
+    if sweep.has_unfinished():
+        sweep.start()  # Resume a sweep interrupted by the last shutdown
+    graph_task = asyncio.create_task(_schedule_propagation(risk_graph, settings.RISK_GRAPH_INTERVAL_SECONDS))
+    sweep_task = None
+    if settings.COMPLIANCE_SWEEP_INTERVAL_HOURS > 0:
+        sweep_task = asyncio.create_task(_schedule_sweeps(sweep, settings.COMPLIANCE_SWEEP_INTERVAL_HOURS * 3600))
 
     logger.info("✅ FinVerse AI is ready!")
     logger.info(f"   API Docs: http://localhost:{settings.PORT}/docs")
@@ -44,6 +181,36 @@ async def lifespan(app: FastAPI):
     yield
 
     logger.info("👋 Shutting down FinVerse AI...")
+    for task in (stream_task, sweep_task, graph_task, warmup_task):
+        if task:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+    sweep.cancel()
+    retriever.close()
+    vector_store.close()
+    vector_store.cache.save()
+    partitions.flush()
+    audit_log.close()
+
+
+async def _schedule_propagation(graph: CounterpartyRiskGraph, interval: float):
+    """Re-propagate counterparty risk every `interval` seconds (off the event loop)."""
+    while True:
+        try:
+            await asyncio.to_thread(graph.propagate)
+        except Exception as e:
+            logger.error(f"Risk graph propagation failed: {e}")
+        await asyncio.sleep(interval)
+
+
+async def _schedule_sweeps(sweep: ComplianceSweep, interval: float):
+    """Start a compliance sweep every `interval` seconds (skipped while one is still running)."""
+    while True:
+        await asyncio.sleep(interval)
+        sweep.start()
 
 
 # Create FastAPI app
@@ -66,6 +233,7 @@ app.add_middleware(
 # Register routes
 app.include_router(chat_router)
 app.include_router(txn_router)
+app.include_router(compliance_router)
 
 
 @app.get("/")
@@ -103,6 +271,15 @@ async def health():
     }
 
 
+@app.get("/api/ready")
+async def ready():
+    """Readiness: 200 once the retrieval models are warm, 503 while queries still use BM25 only."""
+    if _retriever is None:
+        return JSONResponse(status_code=503, content={"ready": False, "retrieval": None})
+    stats = _retriever.stats()
+    return JSONResponse(status_code=200 if stats["ready"] else 503, content={"ready": stats["ready"], "retrieval": stats})
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
@@ -32,7 +32,7 @@ class AgentEvent(BaseModel):
     A single streaming event from the agent system.
     Sent via WebSocket/SSE to the frontend.
     """
-    type: str  # "plan", "search", "tool_call", "result", "thinking", "error", "avatar_state", "final"
+    type: str  # "plan", "search", "tool_call", "result", "thinking", "error", "avatar_state", "token", "final"
     agent: Optional[str] = None  # Which agent generated this event
     content: Any = None  # Event payload
     avatar_state: AvatarState = AvatarState.IDLE
@@ -39,6 +39,9 @@ class Transaction(BaseModel):
     is_flagged: bool = False
     fraud_score: float = 0.0
     tags: list[str] = []
+    source: Optional[str] = None  # Set by the ingest path ("simulator" for demo traffic), never by the payload
+    external_id: Optional[str] = None  # Bank / payment-network reference, used for de-duplication
+    import_batch: Optional[str] = None  # Statement import or delivery batch the record arrived in
 
     class Config:
         json_schema_extra = {
@@ -0,0 +1,194 @@
+"""
+FinVerse AI — ANN Index Types
+Builds the FAISS index behind the vector store (exact Flat, IVF-Flat, IVF-PQ or
+HNSW), applies search-time knobs, and benchmarks an index type against Flat for
+recall@k, query latency and memory.
+"""
+
+import logging
+import time
+from typing import Optional
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+INDEX_TYPES = ("flat", "ivf_flat", "ivf_pq", "hnsw")
+
+# FAISS needs roughly this many training points per IVF centroid / PQ codebook entry
+MIN_POINTS_PER_CENTROID = 39
+
+
+def index_params_from_settings(settings) -> dict:
+    """Build-time `build_index` parameters from the FAISS_* settings."""
+    return {
+        "nlist": settings.FAISS_IVF_NLIST,
+        "pq_m": settings.FAISS_PQ_M,
+        "pq_nbits": settings.FAISS_PQ_NBITS,
+        "hnsw_m": settings.FAISS_HNSW_M,
+        "ef_construction": settings.FAISS_HNSW_EF_CONSTRUCTION,
+    }
+
+
+def index_spec(dim: int, index_type: str = "flat", nlist: int = 1024, pq_m: int = 16, pq_nbits: int = 8,
+               hnsw_m: int = 32) -> str:
+    """FAISS index-factory string for an index type."""
+    if index_type == "flat":
+        return "Flat"
+    if index_type == "ivf_flat":
+        return f"IVF{nlist},Flat"
+    if index_type == "ivf_pq":
+        if dim % pq_m:
+            raise ValueError(f"FAISS_PQ_M={pq_m} must divide the embedding dimension {dim}")
+        return f"IVF{nlist},PQ{pq_m}x{pq_nbits}"
+    if index_type == "hnsw":
+        return f"HNSW{hnsw_m},Flat"
+    raise ValueError(f"Unknown FAISS index type '{index_type}' (expected one of {', '.join(INDEX_TYPES)})")
+
+
+def build_index(dim: int, index_type: str = "flat", nlist: int = 1024, pq_m: int = 16, pq_nbits: int = 8,
+                hnsw_m: int = 32, ef_construction: int = 200, training_size: Optional[int] = None):
+    """
+    Create an empty inner-product index (cosine similarity on normalized vectors).
+
+    With `training_size` known, `nlist` is capped so every IVF centroid gets enough
+    training points; a corpus too small for any IVF training falls back to Flat.
+    """
+    import faiss
+
+    if index_type in ("ivf_flat", "ivf_pq") and training_size is not None:
+        usable = training_size // MIN_POINTS_PER_CENTROID
+        if index_type == "ivf_pq" and training_size < MIN_POINTS_PER_CENTROID * 2 ** pq_nbits:
+            usable = 0  # Not enough points for the PQ codebooks
+        if usable < 1:
+            logger.warning(f"⚠️ {training_size} vectors are too few to train {index_type}; using a flat index")
+            index_type = "flat"
+        elif usable < nlist:
+            logger.info(f"IVF nlist lowered from {nlist} to {usable} for {training_size} training vectors")
+            nlist = usable
+
+    index = faiss.index_factory(dim, index_spec(dim, index_type, nlist, pq_m, pq_nbits, hnsw_m),
+                                faiss.METRIC_INNER_PRODUCT)
+    if index_type == "hnsw":
+        index.hnsw.efConstruction = ef_construction
+    return index
+
+
+def training_sample(vectors: np.ndarray, max_points: int, seed: int = 0) -> np.ndarray:
+    """Uniform random subset used to train IVF centroids / PQ codebooks (all vectors if fewer)."""
+    if max_points <= 0 or len(vectors) <= max_points:
+        return vectors
+    rng = np.random.default_rng(seed)
+    return vectors[np.sort(rng.choice(len(vectors), size=max_points, replace=False))]
+
+
+def configure_search(index, nprobe: int = 16, ef_search: int = 64):
+    """Apply search-time knobs: IVF lists probed per query, HNSW candidate list size."""
+    import faiss
+
+    try:
+        faiss.extract_index_ivf(index).nprobe = nprobe
+    except RuntimeError:
+        pass  # Not an IVF index
+    if hasattr(index, "hnsw"):
+        index.hnsw.efSearch = ef_search
+
+
+def index_kind(index) -> str:
+    """Which of INDEX_TYPES an index is (after any fallback in `build_index`)."""
+    import faiss
+
+    if hasattr(index, "hnsw"):
+        return "hnsw"
+    try:
+        ivf = faiss.extract_index_ivf(index)
+    except RuntimeError:
+        return "flat"
+    return "ivf_pq" if hasattr(ivf, "pq") else "ivf_flat"
+
+
+def describe_index(index) -> dict:
+    """Cheap summary for status endpoints (memory is estimated, not serialized)."""
+    return {
+        "type": type(index).__name__,
+        "index_type": index_kind(index),
+        "vectors": int(index.ntotal),
+        "trained": bool(index.is_trained),
+        "memory_mb": round(estimate_memory_bytes(index) / (1024 * 1024), 2),
+    }
+
+
+def estimate_memory_bytes(index) -> int:
+    """
+    Resident size from ntotal × per-vector code size plus the fixed structures
+    (IVF centroids, PQ codebooks). Constant time, unlike `index_memory_bytes`.
+    """
+    import faiss
+
+    dim, count = index.d, index.ntotal
+    kind = index_kind(index)
+    if kind == "flat":
+        return count * dim * 4
+    if kind == "hnsw":
+        return count * (dim * 4 + index.hnsw.nb_neighbors(0) * 4)  # Vectors + level-0 links
+    ivf = faiss.extract_index_ivf(index)
+    fixed = ivf.nlist * dim * 4
+    if kind == "ivf_pq":
+        fixed += ivf.pq.ksub * dim * 4
+    return fixed + count * (ivf.code_size + 8)  # Codes + 64-bit ids
+
+
+def index_memory_bytes(index) -> int:
+    """Serialized size of the index, a close proxy for its resident memory (copies the whole index)."""
+    import faiss
+
+    return int(faiss.serialize_index(index).nbytes)
+
+
+def benchmark(vectors: np.ndarray, queries: np.ndarray, index_types: list[str], k: int = 10,
+              train_points: int = 0, **params) -> list[dict]:
+    """
+    Build each index type over `vectors` and compare it with exact Flat search.
+
+    Reports recall@k (share of the true top-k found), per-query latency p50/p95 in
+    milliseconds (queries issued one at a time, as the API does), build time and
+    memory. Trainable indexes train on up to `train_points` vectors (0 = all).
+    `params` are passed to `build_index` / `configure_search`.
+    """
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    queries = np.ascontiguousarray(queries, dtype=np.float32)
+    k = min(k, len(vectors))
+    search_params = {key: params.pop(key) for key in ("nprobe", "ef_search") if key in params}
+
+    reports, truth = [], None
+    for index_type in ["flat"] + [t for t in index_types if t != "flat"]:
+        started = time.perf_counter()
+        sample = training_sample(vectors, train_points)
+        index = build_index(vectors.shape[1], index_type, training_size=len(sample), **params)
+        if not index.is_trained:
+            index.train(sample)
+        index.add(vectors)
+        build_seconds = time.perf_counter() - started
+        configure_search(index, **search_params)
+
+        latencies, found = [], []
+        for query in queries:
+            started = time.perf_counter()
+            _, ids = index.search(query[None, :], k)
+            latencies.append((time.perf_counter() - started) * 1000)
+            found.append(ids[0])
+        found = np.array(found)
+        if truth is None:
+            truth = found  # Flat is exact: the ground truth for the others
+        recall = np.mean([len(np.intersect1d(f, t)) / k for f, t in zip(found, truth)])
+
+        if index_type == "flat" and "flat" not in index_types:
+            continue
+        reports.append({
+            "index_type": index_type,
+            f"recall@{k}": round(float(recall), 4),
+            "latency_p50_ms": round(float(np.percentile(latencies, 50)), 3),
+            "latency_p95_ms": round(float(np.percentile(latencies, 95)), 3),
+            "build_seconds": round(build_seconds, 2),
+            "memory_mb": round(index_memory_bytes(index) / (1024 * 1024), 2),
+        })
+    return reports
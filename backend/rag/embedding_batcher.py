@@ -0,0 +1,137 @@
+"""
+FinVerse AI — Embedding Micro-Batcher
+Coalesces concurrent embedding requests into one batched model call, so many
+single-query callers share a forward pass instead of each running a batch of one.
+"""
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Optional
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class _Request:
+    __slots__ = ("texts", "future")
+
+    def __init__(self, texts: list[str]):
+        self.texts = texts
+        self.future: Future = Future()
+
+
+class EmbeddingBatcher:
+    """
+    Background thread in front of an `encode(texts) -> vectors` function.
+
+    - Requests queue up; the thread waits at most `max_wait_ms` after the first one
+      (or until `max_batch` texts are pending) and encodes them in a single call
+    - Each caller gets its own rows back; `encode()` blocks until they are ready
+    - Requests of `max_batch` texts or more are already a full batch and are
+      encoded directly on the caller's thread
+    - After `close()`, new requests raise and any that raced the shutdown fail
+    """
+
+    def __init__(self, encode_fn: Callable[[list[str]], np.ndarray], max_batch: int = 32, max_wait_ms: float = 5.0):
+        self.encode_fn = encode_fn
+        self.max_batch = max(max_batch, 1)
+        self.max_wait = max_wait_ms / 1000
+        self._queue: "queue.Queue[Optional[_Request]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._closed = False
+        self.batches = 0
+        self.items = 0
+
+    def submit(self, texts: list[str]) -> Future:
+        """Queue texts for the next batch; the future resolves to their embeddings."""
+        request = _Request(texts)
+        # Under the lock, so every request lands ahead of close()'s sentinel
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Embedding batcher is closed")
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+                self._thread.start()
+            self._queue.put(request)
+        return request.future
+
+    def encode(self, texts: list[str]) -> np.ndarray:
+        if len(texts) >= self.max_batch:
+            return self.encode_fn(texts)
+        return self.submit(texts).result()
+
+    def close(self):
+        """Finish the requests queued so far and stop the thread."""
+        with self._lock:
+            self._closed = True
+            thread, self._thread = self._thread, None
+            if thread is not None:
+                self._queue.put(None)
+        if thread is not None:
+            thread.join(timeout=5)
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "max_batch": self.max_batch,
+            "max_wait_ms": self.max_wait * 1000,
+        }
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            first = self._queue.get()
+            if first is None:
+                break
+            pending, count = [first], len(first.texts)
+            deadline = time.monotonic() + self.max_wait
+            while count < self.max_batch:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    request = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if request is None:
+                    stopping = True
+                    break
+                pending.append(request)
+                count += len(request.texts)
+            self._encode(pending)
+        self._fail_leftovers()
+
+    def _fail_leftovers(self):
+        # Nothing should follow the sentinel; never leave a caller waiting if it does
+        while True:
+            try:
+                request = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if request is not None and request.future.set_running_or_notify_cancel():
+                request.future.set_exception(RuntimeError("Embedding batcher is closed"))
+
+    def _encode(self, pending: list[_Request]):
+        # Callers that gave up (cancelled futures) are left out of the batch
+        pending = [r for r in pending if r.future.set_running_or_notify_cancel()]
+        if not pending:
+            return
+        texts = [text for r in pending for text in r.texts]
+        try:
+            vectors = self.encode_fn(texts)
+        except Exception as e:
+            for r in pending:
+                r.future.set_exception(e)
+            return
+        self.batches += 1
+        self.items += len(texts)
+        offset = 0
+        for r in pending:
+            r.future.set_result(vectors[offset:offset + len(r.texts)])
+            offset += len(r.texts)
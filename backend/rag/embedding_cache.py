@@ -0,0 +1,119 @@
+"""
+FinVerse AI — Query Embedding Cache
+Bounded LRU of normalized text → float32 embedding shared by every embedding
+consumer, so repeated questions skip the transformer forward pass.
+"""
+
+import logging
+import os
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Optional
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Cache key: Unicode-normalized with whitespace collapsed (case is kept for cased models)."""
+    return _WHITESPACE_RE.sub(" ", unicodedata.normalize("NFKC", text)).strip()
+
+
+class EmbeddingCache:
+    """
+    Thread-safe LRU of embeddings keyed by normalized text.
+
+    - `get_many()` / `put_many()` work on batches so callers can encode only the misses
+    - Hit/miss counters are kept for the hit rate
+    - `save()` / `load()` persist the entries (with the model name, so a cache
+      written for another model is ignored) as an `.npz` file
+    """
+
+    def __init__(self, max_entries: int = 10_000, model_name: str = "", path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.model_name = model_name
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        if path:
+            self.load()
+
+    def get_many(self, texts: list[str]) -> list[Optional[np.ndarray]]:
+        """Cached embedding per text (None on a miss)."""
+        found = []
+        with self._lock:
+            for text in texts:
+                key = normalize_text(text)
+                vector = self._entries.get(key)
+                if vector is None:
+                    self.misses += 1
+                else:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                found.append(vector)
+        return found
+
+    def put_many(self, texts: list[str], vectors: np.ndarray):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            for text, vector in zip(texts, vectors):
+                key = normalize_text(text)
+                self._entries[key] = np.asarray(vector, dtype=np.float32)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+    # ── Persistence ─────────────────────────────────
+
+    def save(self):
+        """Write the entries (least recently used first) to `path`."""
+        if not self.path:
+            return
+        with self._lock:
+            keys = list(self._entries.keys())
+            vectors = np.stack(list(self._entries.values())) if keys else np.zeros((0, 0), dtype=np.float32)
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp.npz"
+        np.savez(tmp_path, keys=np.array(keys, dtype=str), vectors=vectors, model=np.array(self.model_name))
+        os.replace(tmp_path, self.path)
+        logger.info(f"💾 Saved embedding cache: {len(keys)} entries")
+
+    def load(self) -> bool:
+        if not self.path or not os.path.exists(self.path):
+            return False
+        try:
+            with np.load(self.path, allow_pickle=False) as data:
+                if str(data["model"]) != self.model_name:
+                    logger.info(f"Embedding cache at {self.path} was built for another model, ignoring it")
+                    return False
+                keys, vectors = data["keys"].tolist(), data["vectors"].astype(np.float32)
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"⚠️ Could not load embedding cache: {e}")
+            return False
+        with self._lock:
+            start = max(len(keys) - self.max_entries, 0)  # Most recently used entries are last
+            self._entries = OrderedDict(zip(keys[start:], vectors[start:]))
+        logger.info(f"📂 Loaded embedding cache: {len(self._entries)} entries")
+        return True
@@ -4,71 +4,137 @@ Combines BM25 keyword search + FAISS vector search + Cross-encoder reranking.
 Implements the full Agentic RAG pipeline with multi-level fallback.
 """
 
+import asyncio
 import logging
-import math
+import mmap
+import os
+import re
+import struct
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
 from collections import Counter
+import numpy as np
 
 logger = logging.getLogger(__name__)
 
+_TOKEN_RE = re.compile(r'\b\w+\b')
+_EMPTY_IDS = np.zeros(0, dtype=np.int32)
+
+# Binary BM25 index: magic, format version, k1, b, documents, terms, postings, vocabulary bytes
+_BM25_MAGIC = b"FVBM25\x00\x00"
+_BM25_VERSION = 1
+_BM25_HEADER = struct.Struct("<8sI4xddqqqq")  # 64 bytes, keeps the arrays 8-byte aligned
+BM25_INDEX_FILE = "bm25.idx"
+
 
 class BM25Retriever:
-    """Simple BM25 retriever for keyword-based search."""
+    """
+    BM25 keyword search over an inverted index.
+
+    - Each document is tokenized once into postings (doc ids + term frequencies)
+    - IDF, document-length norms and per-term score upper bounds are cached and
+      refreshed lazily after `add_documents`, without re-tokenizing the corpus
+    - Queries score term-at-a-time in descending upper-bound order with MaxScore
+      pruning: once the terms left cannot lift an unseen document into the top-k,
+      they only rescore the existing candidates
+    - `save()` writes a compact binary index; `load()` memory-maps it, so startup
+      does not re-tokenize and the pages are shared between worker processes
+    """
 
     def __init__(self, k1: float = 1.5, b: float = 0.75):
         self.k1 = k1
         self.b = b
+        self._lock = threading.Lock()
         self._documents = []
-        self._doc_freqs = Counter()
-        self._doc_lens = []
-        self._avg_dl = 0
-        self._tokenized_docs = []
+        self._vocab: dict[str, int] = {}
+        # Postings: contiguous base arrays sliced by term offsets (memory-mapped after load),
+        # plus per-term overrides for terms that gained documents since
+        self._base_ids = _EMPTY_IDS
+        self._base_tfs = _EMPTY_IDS
+        self._base_offsets = np.zeros(1, dtype=np.int64)
+        self._overlay: dict[int, tuple[np.ndarray, np.ndarray]] = {}
+        self._mmap: Optional[mmap.mmap] = None
+        self._pending: dict[int, tuple[list[int], list[int]]] = {}  # Postings added since the last refresh
+        self._doc_lens = np.zeros(0, dtype=np.int32)
+        self._idf = np.zeros(0)
+        self._norms = np.zeros(0)
+        self._upper_bounds: dict[int, float] = {}
+        self._stale = False
 
     def add_documents(self, documents: list[dict]):
-        """Index documents for BM25 search."""
-        for doc in documents:
-            tokens = self._tokenize(doc["text"])
-            self._tokenized_docs.append(tokens)
-            self._documents.append(doc)
-            self._doc_freqs.update(set(tokens))
-
-        total_len = sum(len(t) for t in self._tokenized_docs)
-        self._avg_dl = total_len / len(self._tokenized_docs) if self._tokenized_docs else 0
-        self._doc_lens = [len(t) for t in self._tokenized_docs]
+        """Index documents for BM25 search (appends to the existing index)."""
+        if not documents:
+            return
+        lengths = []
+        with self._lock:
+            base = len(self._documents)
+            for offset, doc in enumerate(documents):
+                counts = Counter(self._tokenize(doc["text"]))
+                lengths.append(sum(counts.values()))
+                for term, tf in counts.items():
+                    term_id = self._vocab.get(term)
+                    if term_id is None:
+                        term_id = self._vocab[term] = len(self._vocab)
+                    doc_ids, tfs = self._pending.setdefault(term_id, ([], []))
+                    doc_ids.append(base + offset)
+                    tfs.append(tf)
+            self._documents.extend(documents)
+            self._doc_lens = np.concatenate([self._doc_lens, np.array(lengths, dtype=np.int32)])
+            self._stale = True
 
     def search(self, query: str, top_k: int = 5) -> list[dict]:
         """Search using BM25 scoring."""
-        if not self._documents:
+        if not self._documents or top_k <= 0:
             return []
+        self._refresh()
 
-        query_tokens = self._tokenize(query)
-        scores = []
-        n = len(self._documents)
-
-        for i, doc_tokens in enumerate(self._tokenized_docs):
-            score = 0
-            doc_len = self._doc_lens[i]
-            token_freq = Counter(doc_tokens)
-
-            for qt in query_tokens:
-                if qt not in token_freq:
-                    continue
-
-                tf = token_freq[qt]
-                df = self._doc_freqs.get(qt, 0)
-                idf = math.log((n - df + 0.5) / (df + 0.5) + 1)
-
-                numerator = tf * (self.k1 + 1)
-                denominator = tf + self.k1 * (1 - self.b + self.b * doc_len / self._avg_dl)
-                score += idf * numerator / denominator
+        # Repeated query tokens count once per occurrence, as in plain BM25
+        query_terms = Counter(self._vocab[t] for t in self._tokenize(query) if t in self._vocab)
+        terms = sorted(((self._upper_bound(t) * qtf, t, qtf) for t, qtf in query_terms.items()), reverse=True)
+        if not terms:
+            return []
 
-            scores.append((score, i))
+        candidates = _EMPTY_IDS
+        scores = np.zeros(0)
+        # Best score still reachable from the terms at and after each position
+        bounds = [bound for bound, _, _ in terms]
+        reachable = [sum(bounds[i:]) for i in range(len(bounds) + 1)]
+        threshold = 0.0
+        for i, (_, term_id, qtf) in enumerate(terms):
+            doc_ids, tfs = self._postings(term_id)
+            if reachable[i] > threshold or len(candidates) < top_k:
+                # Unseen documents can still reach the top-k: merge the whole posting list
+                contrib = qtf * self._term_scores(term_id, doc_ids, tfs)
+                merged_ids, inverse = np.unique(np.concatenate([candidates, doc_ids]), return_inverse=True)
+                scores = np.bincount(inverse, weights=np.concatenate([scores, contrib]), minlength=len(merged_ids))
+                candidates = merged_ids
+            else:
+                # MaxScore: only rescore candidates that appear in this posting list
+                pos = np.searchsorted(doc_ids, candidates)
+                hit = pos < len(doc_ids)
+                hit[hit] = doc_ids[pos[hit]] == candidates[hit]
+                matched = pos[hit]
+                scores[hit] += qtf * self._term_scores(term_id, doc_ids[matched], tfs[matched])
+                # Drop candidates that can no longer catch up with the k-th best
+                keep = scores + reachable[i + 1] >= threshold
+                candidates, scores = candidates[keep], scores[keep]
+            if len(candidates) >= top_k:
+                threshold = float(np.partition(scores, len(scores) - top_k)[len(scores) - top_k])
+
+        # Partial selection of the k best, then order just those
+        if len(scores) > top_k:
+            best = np.argpartition(-scores, top_k - 1)[:top_k]
+        else:
+            best = np.arange(len(scores))
+        best = best[np.argsort(-scores[best], kind="stable")]
 
-        scores.sort(reverse=True)
         results = []
-        for score, idx in scores[:top_k]:
+        for i in best.tolist():
+            score = scores[i]
             if score > 0:
-                doc = self._documents[idx]
+                doc = self._documents[int(candidates[i])]
                 results.append({
                     "text": doc["text"],
                     "metadata": doc.get("metadata", {}),
@@ -78,12 +144,139 @@ class BM25Retriever:
 
         return results
 
+    @property
+    def document_count(self) -> int:
+        return len(self._documents)
+
+    # ── Persistence ─────────────────────────────────
+
+    def save(self, path: str):
+        """
+        Write the index as one binary file: header, document lengths, term offsets,
+        postings (doc ids, then term frequencies) and the newline-separated vocabulary.
+        Documents themselves are not stored; they live in the vector store metadata.
+        """
+        self._refresh()
+        with self._lock:
+            terms = sorted(self._vocab, key=self._vocab.get)
+            postings = [self._postings(t) for t in range(len(terms))]
+            offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+            offsets[1:] = np.cumsum([len(ids) for ids, _ in postings])
+            doc_ids = np.concatenate([ids for ids, _ in postings] or [_EMPTY_IDS]).astype("<i4")
+            tfs = np.concatenate([t for _, t in postings] or [_EMPTY_IDS]).astype("<i4")
+            vocabulary = "\n".join(terms).encode("utf-8")
+            header = _BM25_HEADER.pack(_BM25_MAGIC, _BM25_VERSION, self.k1, self.b,
+                                       len(self._doc_lens), len(terms), len(doc_ids), len(vocabulary))
+
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(header)
+                f.write(offsets.astype("<i8").tobytes())
+                f.write(self._doc_lens.astype("<i4").tobytes())
+                f.write(doc_ids.tobytes())
+                f.write(tfs.tobytes())
+                f.write(vocabulary)
+            os.replace(tmp_path, path)
+        logger.info(f"💾 Saved BM25 index: {len(self._doc_lens)} documents, {len(terms)} terms, {len(doc_ids)} postings")
+
+    def load(self, path: str, documents: list[dict]) -> bool:
+        """
+        Memory-map an index written by `save()`. `documents` must be the indexed
+        documents in the same order (the vector store metadata). Returns False,
+        leaving the index untouched, if the file is missing or does not match.
+        """
+        if not os.path.exists(path):
+            logger.info("No existing BM25 index found")
+            return False
+        mapped = None
+        try:
+            with open(path, "rb") as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, version, k1, b, n_docs, n_terms, n_postings, vocab_bytes = _BM25_HEADER.unpack_from(mapped)
+        except (ValueError, struct.error):
+            magic = None  # Empty or truncated file
+        if magic != _BM25_MAGIC or version != _BM25_VERSION or n_docs != len(documents):
+            if mapped is not None:
+                mapped.close()
+            logger.warning(f"⚠️ BM25 index at {path} is incompatible or out of date; rebuild it with index_documents.py")
+            return False
+
+        def section(dtype: str, count: int, offset: int) -> tuple[np.ndarray, int]:
+            array = np.frombuffer(mapped, dtype=dtype, count=count, offset=offset)
+            return array, offset + array.nbytes
+
+        offset = _BM25_HEADER.size
+        offsets, offset = section("<i8", n_terms + 1, offset)
+        doc_lens, offset = section("<i4", n_docs, offset)
+        doc_ids, offset = section("<i4", n_postings, offset)
+        tfs, offset = section("<i4", n_postings, offset)
+        terms = bytes(mapped[offset:offset + vocab_bytes]).decode("utf-8").split("\n") if n_terms else []
+
+        with self._lock:
+            self.k1, self.b = k1, b
+            self._documents = list(documents)
+            self._vocab = dict(zip(terms, range(n_terms)))
+            self._base_offsets, self._base_ids, self._base_tfs = offsets, doc_ids, tfs
+            self._doc_lens = doc_lens
+            self._overlay = {}
+            self._pending = {}
+            self._mmap = mapped  # Kept open: the arrays above are views into it
+            self._stale = True
+        logger.info(f"📂 Loaded BM25 index: {n_docs} documents, {n_terms} terms")
+        return True
+
+    def _refresh(self):
+        """Merge pending postings and recompute the corpus-level statistics."""
+        if not self._stale:
+            return
+        with self._lock:
+            if not self._stale:
+                return
+            for term_id, (doc_ids, tfs) in self._pending.items():
+                old_ids, old_tfs = self._postings(term_id)
+                self._overlay[term_id] = (
+                    np.concatenate([old_ids, np.array(doc_ids, dtype=np.int32)]),
+                    np.concatenate([old_tfs, np.array(tfs, dtype=np.int32)]),
+                )
+            self._pending.clear()
+
+            n = len(self._doc_lens)
+            df = np.zeros(len(self._vocab))
+            df[:len(self._base_offsets) - 1] = np.diff(self._base_offsets)
+            for term_id, (doc_ids, _) in self._overlay.items():
+                df[term_id] = len(doc_ids)
+            self._idf = np.log((n - df + 0.5) / (df + 0.5) + 1)
+            avg_dl = float(self._doc_lens.mean()) if n else 0.0
+            self._norms = self.k1 * (1 - self.b + self.b * self._doc_lens / avg_dl) if avg_dl else np.full(n, self.k1)
+            self._upper_bounds = {}
+            self._stale = False
+
+    def _postings(self, term_id: int) -> tuple[np.ndarray, np.ndarray]:
+        """Sorted doc ids and term frequencies of a term."""
+        postings = self._overlay.get(term_id)
+        if postings is not None:
+            return postings
+        if term_id + 1 < len(self._base_offsets):
+            start, end = self._base_offsets[term_id], self._base_offsets[term_id + 1]
+            return self._base_ids[start:end], self._base_tfs[start:end]
+        return _EMPTY_IDS, _EMPTY_IDS
+
+    def _term_scores(self, term_id: int, doc_ids: np.ndarray, tfs: np.ndarray) -> np.ndarray:
+        return self._idf[term_id] * tfs * (self.k1 + 1) / (tfs + self._norms[doc_ids])
+
+    def _upper_bound(self, term_id: int) -> float:
+        """Highest score the term contributes to any document (cached until the corpus changes)."""
+        bound = self._upper_bounds.get(term_id)
+        if bound is None:
+            doc_ids, tfs = self._postings(term_id)
+            scores = self._term_scores(term_id, doc_ids, tfs)
+            bound = self._upper_bounds[term_id] = float(scores.max()) if len(scores) else 0.0
+        return bound
+
     def _tokenize(self, text: str) -> list[str]:
         """Simple whitespace + lowercase tokenization."""
-        import re
-        text = text.lower()
-        tokens = re.findall(r'\b\w+\b', text)
-        return tokens
+        return _TOKEN_RE.findall(text.lower())
 
 
 class CrossEncoderReranker:
@@ -123,13 +316,76 @@ class HybridRetriever:
     """
     Combines vector search + BM25 + cross-encoder reranking.
     Implements multi-level retrieval fallback.
+
+    `aretrieve()` runs the stages on a dedicated bounded thread pool so a query
+    never blocks the event loop; with an embedding batcher the query embedding is
+    awaited on the loop instead, so concurrent queries share model batches. Created with `warm=False`, the retriever answers
+    with BM25 only until `warmup()` has loaded the embedding and reranker models,
+    so queries that arrive right after startup never wait for a model load.
     """
 
     def __init__(self, vector_store, bm25_retriever: Optional[BM25Retriever] = None,
-                 reranker: Optional[CrossEncoderReranker] = None):
+                 reranker: Optional[CrossEncoderReranker] = None, warm: bool = True, max_workers: int = 4):
         self.vector_store = vector_store
         self.bm25 = bm25_retriever or BM25Retriever()
         self.reranker = reranker
+        # Bounded pool for the CPU-bound stages of `aretrieve` (FAISS, BM25, rerank; embedding without a batcher)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="retrieval")
+        self._warm = threading.Event()
+        if warm:
+            self._warm.set()
+        self.warmup_seconds: Optional[float] = None
+
+    @property
+    def ready(self) -> bool:
+        """Whether vector search and reranking are in use (models loaded)."""
+        return self._warm.is_set()
+
+    def load(self, index_dir: str):
+        """
+        Load the persisted FAISS index and the memory-mapped BM25 index from `index_dir`.
+        Without a BM25 index file the keyword index is rebuilt from the vector metadata.
+        """
+        try:
+            self.vector_store.load()
+        except ImportError:
+            logger.warning("faiss not installed, vector search disabled")
+        documents = self.vector_store.documents
+        if not documents:
+            return
+        if not self.bm25.load(os.path.join(index_dir, BM25_INDEX_FILE), documents):
+            logger.info(f"Rebuilding BM25 index from {len(documents)} stored documents")
+            self.bm25.add_documents(documents)
+
+    def warmup(self):
+        """Load the embedding and reranker models with a dummy inference, then enable them."""
+        started = time.perf_counter()
+        if self.vector_store.document_count:
+            try:
+                self.vector_store.embed(["warmup"])
+            except Exception as e:
+                logger.warning(f"Embedding model warmup failed: {e}")
+        if self.reranker and (self.vector_store.document_count or self.bm25.document_count):
+            try:
+                if self.reranker.model is not None:
+                    self.reranker.model.predict([("warmup", "warmup")])
+            except Exception as e:
+                logger.warning(f"Reranker warmup failed: {e}")
+        self.warmup_seconds = time.perf_counter() - started
+        self._warm.set()
+        logger.info(f"🔥 Retrieval models warmed up in {self.warmup_seconds:.1f}s")
+
+    def stats(self) -> dict:
+        return {
+            "ready": self.ready,
+            "warmup_seconds": round(self.warmup_seconds, 2) if self.warmup_seconds is not None else None,
+            "vector_documents": self.vector_store.document_count,
+            "vector_index": self.vector_store.index_stats(),
+            "bm25_documents": self.bm25.document_count,
+            "reranker": self.reranker is not None,
+            "embedding_cache": self.vector_store.cache.stats(),
+            "embedding_batches": self.vector_store.batcher.stats() if self.vector_store.batcher else None,
+        }
 
     def retrieve(self, query: str, top_k: int = 5) -> dict:
         """
@@ -142,29 +398,84 @@ class HybridRetriever:
         If primary fails → use secondary only.
         If both fail → return empty with notification.
         """
-        vector_results = []
-        bm25_results = []
-        retrieval_method = []
+        warm = self.ready  # Until the models are loaded, BM25 alone answers
+        vector_results = self._vector_search(query, top_k * 2) if warm else []
+        bm25_results = self._bm25_search(query, top_k * 2)
+        merged = self._merge_results(vector_results, bm25_results)
+        reranked = self._rerank(query, merged, top_k) if warm else None
+        return self._result(vector_results, bm25_results, merged, reranked, top_k)
+
+    async def aretrieve(self, query: str, top_k: int = 5) -> dict:
+        """
+        `retrieve()` without blocking the event loop: vector and BM25 search run
+        concurrently on the retrieval executor, then the rerank runs there too.
+        Cancelling the caller drops stages that have not started yet.
+        """
+        loop = asyncio.get_running_loop()
+        warm = self.ready
+        searches = [loop.run_in_executor(self._executor, self._bm25_search, query, top_k * 2)]
+        if warm and self.vector_store.batcher is not None:
+            searches.append(asyncio.ensure_future(self._avector_search(query, top_k * 2)))
+        elif warm:
+            searches.append(loop.run_in_executor(self._executor, self._vector_search, query, top_k * 2))
+        try:
+            bm25_results, *vector = await asyncio.gather(*searches)
+        except asyncio.CancelledError:
+            for future in searches:
+                future.cancel()
+            raise
+        vector_results = vector[0] if vector else []
+
+        merged = self._merge_results(vector_results, bm25_results)
+        reranked = None
+        if warm:
+            reranked = await loop.run_in_executor(self._executor, self._rerank, query, merged, top_k)
+        return self._result(vector_results, bm25_results, merged, reranked, top_k)
+
+    def close(self):
+        """Stop the retrieval executor (queued work is dropped)."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
 
+    def _vector_search(self, query: str, top_k: int) -> list:
         # Level 1: Vector search
         try:
-            vector_results = self.vector_store.search(query, top_k=top_k * 2)
-            if vector_results:
-                retrieval_method.append("vector")
+            return self.vector_store.search(query, top_k=top_k)
         except Exception as e:
             logger.warning(f"Vector search failed: {e}")
+            return []
 
+    async def _avector_search(self, query: str, top_k: int) -> list:
+        # Level 1, with the query embedding awaited from the batcher rather than on a pool thread
+        if not self.vector_store.document_count:
+            return self._vector_search(query, top_k)
+        try:
+            embedding = await self.vector_store.aembed([query])
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, self.vector_store.search_embedding, embedding, top_k)
+        except Exception as e:
+            logger.warning(f"Vector search failed: {e}")
+            return []
+
+    def _bm25_search(self, query: str, top_k: int) -> list:
         # Level 2: BM25 search
         try:
-            bm25_results = self.bm25.search(query, top_k=top_k * 2)
-            if bm25_results:
-                retrieval_method.append("bm25")
+            return self.bm25.search(query, top_k=top_k)
         except Exception as e:
             logger.warning(f"BM25 search failed: {e}")
+            return []
 
-        # Merge results
-        merged = self._merge_results(vector_results, bm25_results)
+    def _rerank(self, query: str, merged: list, top_k: int) -> Optional[list]:
+        # Level 3: Rerank (None when skipped or failed)
+        if not self.reranker or len(merged) <= 1:
+            return None
+        try:
+            return self.reranker.rerank(query, merged, top_k=top_k)
+        except Exception as e:
+            logger.warning(f"Reranking failed: {e}")
+            return None
 
+    def _result(self, vector_results: list, bm25_results: list, merged: list,
+                reranked: Optional[list], top_k: int) -> dict:
         if not merged:
             return {
                 "results": [],
@@ -172,13 +483,14 @@ class HybridRetriever:
                 "message": "No relevant documents found. Please try a different query or upload relevant documents.",
             }
 
-        # Level 3: Rerank
-        if self.reranker and len(merged) > 1:
-            try:
-                merged = self.reranker.rerank(query, merged, top_k=top_k)
-                retrieval_method.append("reranked")
-            except Exception as e:
-                logger.warning(f"Reranking failed: {e}")
+        retrieval_method = []
+        if vector_results:
+            retrieval_method.append("vector")
+        if bm25_results:
+            retrieval_method.append("bm25")
+        if reranked is not None:
+            merged = reranked
+            retrieval_method.append("reranked")
 
         return {
             "results": merged[:top_k],
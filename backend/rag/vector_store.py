@@ -3,24 +3,47 @@ FinVerse AI — FAISS Vector Store
 Semantic vector search using sentence-transformers + FAISS.
 """
 
+import asyncio
 import os
 import json
 import logging
+import time
 import numpy as np
 from typing import Optional
 
+from backend.rag.ann_index import build_index, configure_search, describe_index, index_kind
+from backend.rag.embedding_batcher import EmbeddingBatcher
+from backend.rag.embedding_cache import EmbeddingCache
+
 logger = logging.getLogger(__name__)
 
 
 class VectorStore:
     """
     FAISS-based vector store for RAG retrieval.
-    Uses sentence-transformers for embedding generation.
+    Uses sentence-transformers for embedding generation, behind an LRU of query
+    embeddings that every consumer of `embed()` shares. With `batch_wait_ms > 0`,
+    concurrent cache misses are coalesced into batched model calls.
+
+    The FAISS index type comes from `index_params` (see `ann_index.build_index`):
+    exact Flat by default, or IVF-Flat / IVF-PQ / HNSW for large corpora, with
+    `nprobe` / `ef_search` applied at search time.
     """
 
-    def __init__(self, index_dir: str = "./data/faiss_index", model_name: str = "all-MiniLM-L6-v2"):
+    def __init__(self, index_dir: str = "./data/faiss_index", model_name: str = "all-MiniLM-L6-v2",
+                 cache_size: int = 10_000, cache_path: Optional[str] = None,
+                 batch_size: int = 32, batch_wait_ms: float = 0.0,
+                 index_type: str = "flat", index_params: Optional[dict] = None,
+                 nprobe: int = 16, ef_search: int = 64):
         self.index_dir = index_dir
         self.model_name = model_name
+        self.cache = EmbeddingCache(max_entries=cache_size, model_name=model_name, path=cache_path)
+        self.batcher = EmbeddingBatcher(self._encode, max_batch=batch_size, max_wait_ms=batch_wait_ms) \
+            if batch_wait_ms > 0 else None
+        self.index_type = index_type
+        self.index_params = index_params or {}
+        self.nprobe = nprobe
+        self.ef_search = ef_search
         self._model = None
         self._index = None
         self._documents = []  # Store document texts and metadata
@@ -40,29 +63,79 @@ class VectorStore:
                 raise
         return self._model
 
-    def embed(self, texts: list[str]) -> np.ndarray:
-        """Generate embeddings for a list of texts."""
-        return self.model.encode(texts, normalize_embeddings=True, show_progress_bar=False)
-
-    def add_documents(self, documents: list[dict]):
+    def embed(self, texts: list[str], use_cache: bool = True) -> np.ndarray:
+        """
+        Generate embeddings for a list of texts.
+        Cached texts skip the model; the misses are encoded in one batch.
+        Bulk document indexing passes `use_cache=False` so it does not flush the queries.
+        """
+        encode = self.batcher.encode if self.batcher else self._encode
+        if not use_cache:
+            return encode(texts)
+        cached = self.cache.get_many(texts)
+        missing = [i for i, vector in enumerate(cached) if vector is None]
+        if missing:
+            self._fill_misses(texts, cached, missing, encode([texts[i] for i in missing]))
+        return np.stack(cached) if cached else np.zeros((0, 0), dtype=np.float32)
+
+    async def aembed(self, texts: list[str]) -> np.ndarray:
+        """
+        `embed()` for async callers. Cache misses wait on the batcher's future without
+        holding a thread, so every concurrent query can join the same batch.
+        Without a batcher the model runs on a worker thread instead.
+        """
+        if self.batcher is None:
+            return await asyncio.to_thread(self.embed, texts)
+        cached = self.cache.get_many(texts)
+        missing = [i for i, vector in enumerate(cached) if vector is None]
+        if missing:
+            encoded = await asyncio.wrap_future(self.batcher.submit([texts[i] for i in missing]))
+            self._fill_misses(texts, cached, missing, encoded)
+        return np.stack(cached) if cached else np.zeros((0, 0), dtype=np.float32)
+
+    def _fill_misses(self, texts: list[str], cached: list, missing: list[int], encoded: np.ndarray):
+        self.cache.put_many([texts[i] for i in missing], encoded)
+        for i, vector in zip(missing, encoded):
+            cached[i] = vector
+
+    def _encode(self, texts: list[str]) -> np.ndarray:
+        embeddings = self.model.encode(texts, normalize_embeddings=True, show_progress_bar=False)
+        return np.asarray(embeddings, dtype=np.float32)
+
+    def train(self, embeddings: np.ndarray):
+        """
+        Create the configured index and train it on a sample of the corpus
+        (IVF centroids, PQ codebooks). Flat and HNSW need no training.
+        """
+        if self._index is None:
+            self._index = build_index(embeddings.shape[1], self.index_type,
+                                      training_size=len(embeddings), **self.index_params)
+            configure_search(self._index, nprobe=self.nprobe, ef_search=self.ef_search)
+        if not self._index.is_trained:
+            started = time.perf_counter()
+            self._index.train(np.ascontiguousarray(embeddings, dtype=np.float32))
+            # The built type, which may differ from index_type after a fallback
+            logger.info(f"🎯 Trained {index_kind(self._index)} index on {len(embeddings)} vectors "
+                        f"in {time.perf_counter() - started:.1f}s")
+
+    def add_documents(self, documents: list[dict], embeddings: Optional[np.ndarray] = None):
         """
         Add documents to the vector store.
         Each document: {text: str, metadata: dict}
+        Precomputed `embeddings` (one row per document) skip the model.
+        An untrained index is trained on this batch first.
         """
-        import faiss
-
         if not documents:
             return
 
-        texts = [doc["text"] for doc in documents]
-        embeddings = self.embed(texts)
-
-        dim = embeddings.shape[1]
+        if embeddings is None:
+            texts = [doc["text"] for doc in documents]
+            embeddings = self.embed(texts, use_cache=False)
 
-        if self._index is None:
-            self._index = faiss.IndexFlatIP(dim)  # Inner product (cosine sim for normalized vecs)
+        if self._index is None or not self._index.is_trained:
+            self.train(embeddings)
 
-        self._index.add(embeddings.astype(np.float32))
+        self._index.add(np.ascontiguousarray(embeddings, dtype=np.float32))
         self._documents.extend(documents)
 
         logger.info(f"📥 Added {len(documents)} documents. Total: {len(self._documents)}")
@@ -75,8 +148,13 @@ class VectorStore:
         if self._index is None or len(self._documents) == 0:
             logger.warning("Vector store is empty")
             return []
+        return self.search_embedding(self.embed([query]), top_k)
 
-        query_embedding = self.embed([query]).astype(np.float32)
+    def search_embedding(self, query_embedding: np.ndarray, top_k: int = 5) -> list[dict]:
+        """`search()` for a query that is already embedded (one row)."""
+        if self._index is None or len(self._documents) == 0:
+            return []
+        query_embedding = np.ascontiguousarray(query_embedding, dtype=np.float32)
         scores, indices = self._index.search(query_embedding, min(top_k, len(self._documents)))
 
         results = []
@@ -106,17 +184,32 @@ class VectorStore:
         logger.info(f"💾 Saved vector store: {len(self._documents)} documents")
 
     def load(self):
-        """Load index and metadata from disk."""
-        import faiss
-
+        """
+        Load index and metadata from disk.
+        Metadata is read first, so the documents stay available to keyword search
+        even when faiss itself is not installed (the ImportError still propagates).
+        """
         if os.path.exists(self._index_path) and os.path.exists(self._metadata_path):
-            self._index = faiss.read_index(self._index_path)
             with open(self._metadata_path, "r", encoding="utf-8") as f:
                 self._documents = json.load(f)
+            import faiss
+            self._index = faiss.read_index(self._index_path)
+            configure_search(self._index, nprobe=self.nprobe, ef_search=self.ef_search)
             logger.info(f"📂 Loaded vector store: {len(self._documents)} documents")
         else:
             logger.info("No existing index found, starting fresh")
 
+    def index_stats(self) -> Optional[dict]:
+        return describe_index(self._index) if self._index is not None else None
+
+    def close(self):
+        if self.batcher:
+            self.batcher.close()
+
+    @property
+    def documents(self) -> list[dict]:
+        return self._documents
+
     @property
     def document_count(self) -> int:
         return len(self._documents)
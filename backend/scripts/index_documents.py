@@ -1,5 +1,6 @@
 import os
 import sys
+import argparse
 
 # Add project root to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -7,12 +8,25 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from backend.config.settings import settings
 from backend.rag.document_processor import DocumentProcessor
 from backend.rag.vector_store import VectorStore
+from backend.rag.ann_index import INDEX_TYPES, benchmark, index_params_from_settings, training_sample
+from backend.rag.hybrid_retriever import BM25Retriever, BM25_INDEX_FILE
+import numpy as np
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 def main():
+    parser = argparse.ArgumentParser(description="Build the FAISS and BM25 indexes over the compliance documents.")
+    parser.add_argument("--index-type", choices=INDEX_TYPES, default=settings.FAISS_INDEX_TYPE,
+                        help="FAISS index type (default: FAISS_INDEX_TYPE)")
+    parser.add_argument("--benchmark", nargs="*", choices=INDEX_TYPES, metavar="TYPE",
+                        help="Also report recall@k, latency and memory of these index types against Flat "
+                             "(no types: the selected --index-type)")
+    parser.add_argument("--benchmark-queries", type=int, default=200, help="Chunks sampled as benchmark queries")
+    parser.add_argument("--k", type=int, default=10, help="Recall cut-off for the benchmark")
+    args = parser.parse_args()
+
     logger.info("🚀 Indexing compliance documents...")
     
     docs_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "data", "compliance_docs")
@@ -30,16 +44,46 @@ def main():
     # 2. Build vector store
     store = VectorStore(
         index_dir=settings.FAISS_INDEX_DIR,
-        model_name=settings.EMBEDDING_MODEL
+        model_name=settings.EMBEDDING_MODEL,
+        index_type=args.index_type,
+        index_params=index_params_from_settings(settings),
+        nprobe=settings.FAISS_NPROBE,
+        ef_search=settings.FAISS_HNSW_EF_SEARCH,
     )
     
-    # Generate embeddings and add to index
-    logger.info("Generating embeddings and building FAISS index...")
-    store.add_documents(chunks)
+    # Generate embeddings, train the index on a sample (IVF / PQ only), then add everything
+    logger.info("Generating embeddings...")
+    embeddings = store.embed([chunk["text"] for chunk in chunks], use_cache=False)
+    logger.info(f"Building {args.index_type} FAISS index...")
+    store.train(training_sample(embeddings, settings.FAISS_TRAIN_SAMPLE))
+    store.add_documents(chunks, embeddings=embeddings)
     
     # Save to disk
     store.save()
     logger.info("✅ FAISS index successfully built and saved!")
 
+    # 3. Build the keyword index over the same chunks (same order as the vector metadata)
+    logger.info("Building BM25 index...")
+    bm25 = BM25Retriever()
+    bm25.add_documents(chunks)
+    bm25.save(os.path.join(settings.FAISS_INDEX_DIR, BM25_INDEX_FILE))
+    logger.info("✅ BM25 index successfully built and saved!")
+
+    # 4. Optional: compare ANN index types with exact search on this corpus
+    if args.benchmark is not None:
+        index_types = args.benchmark or [args.index_type]
+        rng = np.random.default_rng(0)
+        queries = embeddings[rng.choice(len(embeddings), size=min(args.benchmark_queries, len(embeddings)), replace=False)]
+        logger.info(f"📏 Benchmarking {', '.join(index_types)} against flat on {len(queries)} queries...")
+        reports = benchmark(
+            embeddings, queries, index_types, k=args.k,
+            train_points=settings.FAISS_TRAIN_SAMPLE,
+            nprobe=settings.FAISS_NPROBE,
+            ef_search=settings.FAISS_HNSW_EF_SEARCH,
+            **index_params_from_settings(settings),
+        )
+        for report in reports:
+            logger.info("   " + "  ".join(f"{key}={value}" for key, value in report.items()))
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,368 @@
+"""
+FinVerse AI — Compliance Audit Log
+Append-only binary log of compliance verdicts: length-prefixed, checksummed records
+in rotating segment files, written by a background group-commit thread and read
+back through sparse per-segment indexes over memory-mapped segments.
+"""
+
+import json
+import logging
+import mmap
+import os
+import re
+import struct
+import threading
+import time
+import zlib
+from collections import deque
+from typing import Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+# payload length, CRC32 of timestamp + payload, timestamp (ms since epoch)
+HEADER = struct.Struct("<IIq")
+# Indexes point at blocks of this many records, not at individual records
+BLOCK_RECORDS = 256
+SEGMENT_PATTERN = re.compile(r"^segment-(\d{10})\.log$")
+
+
+def _txn_bucket(txn_id: str) -> str:
+    # Hash buckets keep the transaction index bounded however many ids a segment holds
+    return format(zlib.crc32(txn_id.encode()) & 0xFFFF, "04x")
+
+
+def _add_block(index: dict, key: str, block: int):
+    blocks = index.setdefault(key, [])
+    if not blocks or blocks[-1] != block:
+        blocks.append(block)
+
+
+class _SegmentIndex:
+    """Sparse index of one segment: block start (time, offset), rule id → blocks, txn bucket → blocks."""
+
+    def __init__(self):
+        self.count = 0
+        self.first_ts: Optional[int] = None
+        self.last_ts: Optional[int] = None
+        self.blocks: list[list[int]] = []
+        self.rules: dict[str, list[int]] = {}
+        self.txns: dict[str, list[int]] = {}
+
+    def add(self, offset: int, ts: int, record: dict):
+        if self.count % BLOCK_RECORDS == 0:
+            self.blocks.append([ts, offset])
+        block = len(self.blocks) - 1
+        for rule_id in record.get("rule_ids") or ():
+            _add_block(self.rules, rule_id, block)
+        if record.get("txn_id"):
+            _add_block(self.txns, _txn_bucket(str(record["txn_id"])), block)
+        self.first_ts = ts if self.first_ts is None else min(self.first_ts, ts)
+        self.last_ts = ts if self.last_ts is None else max(self.last_ts, ts)
+        self.count += 1
+
+    def candidates(self, txn_id: Optional[str], rule_id: Optional[str],
+                   start: Optional[int], end: Optional[int]) -> list[int]:
+        """Blocks that may hold matching records (exact filtering happens on decode)."""
+        if not self.count or (start is not None and self.last_ts < start) or (end is not None and self.first_ts > end):
+            return []
+        blocks = set(range(len(self.blocks)))
+        if rule_id is not None:
+            blocks &= set(self.rules.get(rule_id, ()))
+        if txn_id is not None:
+            blocks &= set(self.txns.get(_txn_bucket(txn_id), ()))
+        return sorted(blocks)
+
+    def to_dict(self) -> dict:
+        return {"count": self.count, "first_ts": self.first_ts, "last_ts": self.last_ts,
+                "blocks": self.blocks, "rules": self.rules, "txns": self.txns}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "_SegmentIndex":
+        index = cls()
+        index.count, index.first_ts, index.last_ts = data["count"], data["first_ts"], data["last_ts"]
+        index.blocks, index.rules, index.txns = data["blocks"], data["rules"], data["txns"]
+        return index
+
+
+class _Segment:
+    __slots__ = ("seq", "path", "size", "index", "sealed")
+
+    def __init__(self, seq: int, path: str, size: int = 0, index: Optional[_SegmentIndex] = None,
+                 sealed: bool = False):
+        self.seq = seq
+        self.path = path
+        self.size = size
+        self.index = index or _SegmentIndex()
+        self.sealed = sealed
+
+    @property
+    def index_path(self) -> str:
+        return self.path[:-4] + ".idx"
+
+
+def _scan(buf, start: int = 0, end: Optional[int] = None) -> Iterator[tuple[int, int, bytes]]:
+    """(offset, timestamp, payload) of each intact record; stops at the first torn or corrupt one."""
+    end = len(buf) if end is None else end
+    offset = start
+    while offset + HEADER.size <= end:
+        length, crc, ts = HEADER.unpack_from(buf, offset)
+        body = offset + HEADER.size
+        if body + length > end:
+            return
+        payload = bytes(buf[body:body + length])
+        if zlib.crc32(payload, zlib.crc32(struct.pack("<q", ts))) != crc:
+            return
+        yield offset, ts, payload
+        offset = body + length
+
+
+def _encode(ts: int, record: dict) -> bytes:
+    payload = json.dumps(record, separators=(",", ":"), default=str).encode()
+    return HEADER.pack(len(payload), zlib.crc32(payload, zlib.crc32(struct.pack("<q", ts))), ts) + payload
+
+
+class AuditLog:
+    """
+    Append-only audit log.
+
+    - `append()` only enqueues, so callers on the request path never touch the disk
+    - A writer thread drains the queue every `flush_interval` seconds and commits the
+      whole batch with one write and one fsync (group commit)
+    - Segments rotate at `segment_bytes`; sealed segments get a sparse index file and
+      are immutable, except for `compact()`, which drops segments past retention and
+      merges runs of small segments
+    - `query()` narrows segments by time and blocks by rule/transaction index, then
+      decodes only those blocks from a memory map
+    - On open, a torn tail left by a crash is truncated and the active index rebuilt
+    """
+
+    def __init__(self, directory: str, segment_bytes: int = 64 * 1024 * 1024, flush_interval: float = 0.005,
+                 retention_days: float = 0):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.flush_interval = flush_interval
+        self.retention_ms = int(retention_days * 86400 * 1000)
+        self._queue: deque = deque()
+        self._lock = threading.Lock()          # Segment list and active segment state
+        self._write_lock = threading.Lock()    # One drainer at a time (writer thread or flush())
+        self._stop = threading.Event()
+        self.records_written = 0
+        self.commits = 0
+
+        os.makedirs(directory, exist_ok=True)
+        self._segments = self._recover()
+        self._file = open(self._segments[-1].path, "ab")
+        self._writer = threading.Thread(target=self._run, name="audit-log-writer", daemon=True)
+        self._writer.start()
+
+    # ── Writing ─────────────────────────────────────
+
+    def append(self, record: dict):
+        """Enqueue a record; it is durable once the next group commit completes."""
+        self._queue.append((int(time.time() * 1000), record))
+
+    def flush(self):
+        """Commit everything enqueued so far."""
+        self._drain()
+
+    def close(self):
+        self._stop.set()
+        self._writer.join()
+        self._drain()
+        with self._lock:
+            self._file.close()
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self._drain()
+            except Exception as e:
+                logger.error(f"Audit log write failed: {e}")
+
+    def _drain(self):
+        with self._write_lock:
+            if not self._queue:
+                return
+            batch = []
+            while self._queue:
+                batch.append(self._queue.popleft())
+
+            rotated = False
+            with self._lock:
+                segment = self._segments[-1]
+                buf = bytearray()
+                for ts, record in batch:
+                    segment.index.add(segment.size + len(buf), ts, record)
+                    buf += _encode(ts, record)
+                    if segment.size + len(buf) >= self.segment_bytes:
+                        self._commit(segment, buf)
+                        buf = bytearray()
+                        segment = self._rotate()
+                        rotated = True
+                if buf:
+                    self._commit(segment, buf)
+                self.records_written += len(batch)
+
+            if rotated:
+                self.compact()
+
+    def _commit(self, segment: _Segment, buf: bytearray):
+        self._file.write(buf)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        segment.size += len(buf)
+        self.commits += 1
+
+    def _rotate(self) -> _Segment:
+        sealed = self._segments[-1]
+        self._seal(sealed)
+        self._file.close()
+        segment = self._new_segment(sealed.seq + 1)
+        self._segments.append(segment)
+        self._file = open(segment.path, "ab")
+        logger.info(f"🗂️ Audit log rotated to {os.path.basename(segment.path)}")
+        return segment
+
+    def _seal(self, segment: _Segment):
+        tmp = segment.index_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(segment.index.to_dict(), f, separators=(",", ":"))
+        os.replace(tmp, segment.index_path)
+        segment.sealed = True
+
+    def _new_segment(self, seq: int) -> _Segment:
+        path = os.path.join(self.directory, f"segment-{seq:010d}.log")
+        open(path, "ab").close()
+        return _Segment(seq, path)
+
+    # ── Reading ─────────────────────────────────────
+
+    def query(self, txn_id: Optional[str] = None, rule_id: Optional[str] = None,
+              start: Optional[float] = None, end: Optional[float] = None, limit: int = 100) -> list[dict]:
+        """
+        Records matching every given filter, oldest first (the newest `limit` of them).
+        `start`/`end` are epoch seconds.
+        """
+        start_ms = None if start is None else int(start * 1000)
+        end_ms = None if end is None else int(end * 1000)
+        with self._lock:
+            # Committed bytes only; sealed segments never change, the active one only grows
+            plan = [(s.path, s.size, [list(b) for b in s.index.blocks],
+                     s.index.candidates(txn_id, rule_id, start_ms, end_ms))
+                    for s in self._segments]
+
+        out: deque = deque(maxlen=limit if limit > 0 else None)
+        for path, size, blocks, candidates in plan:
+            if not candidates or size == 0:
+                continue
+            with open(path, "rb") as f, mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ) as buf:
+                for b in candidates:
+                    block_end = blocks[b + 1][1] if b + 1 < len(blocks) else size
+                    for _, ts, payload in _scan(buf, blocks[b][1], block_end):
+                        if (start_ms is not None and ts < start_ms) or (end_ms is not None and ts > end_ms):
+                            continue
+                        record = json.loads(payload)
+                        if txn_id is not None and record.get("txn_id") != txn_id:
+                            continue
+                        if rule_id is not None and rule_id not in (record.get("rule_ids") or ()):
+                            continue
+                        out.append({"ts": ts / 1000, **record})
+        return list(out)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "segments": len(self._segments),
+                "bytes": sum(s.size for s in self._segments),
+                "records": sum(s.index.count for s in self._segments),
+                "records_written": self.records_written,
+                "group_commits": self.commits,
+                "queued": len(self._queue),
+            }
+
+    # ── Maintenance ─────────────────────────────────
+
+    def compact(self):
+        """Drop sealed segments past retention and merge runs of small sealed segments."""
+        with self._lock:
+            sealed = [s for s in self._segments if s.sealed]
+        if self.retention_ms:
+            horizon = int(time.time() * 1000) - self.retention_ms
+            expired = [s for s in sealed if s.index.last_ts is None or s.index.last_ts < horizon]
+            if expired:
+                self._replace(expired, None)
+                sealed = [s for s in sealed if s not in expired]
+
+        run: list[_Segment] = []
+        for segment in sealed + [None]:
+            if segment is not None and sum(s.size for s in run) + segment.size <= self.segment_bytes:
+                run.append(segment)
+                continue
+            if len(run) > 1:
+                self._merge(run)
+            run = [segment] if segment is not None else []
+
+    def _merge(self, run: list[_Segment]):
+        # Sealed segments are immutable, so the copy needs no lock
+        merged = _Segment(run[0].seq, run[0].path[:-4] + ".compact")
+        with open(merged.path, "wb") as out:
+            for segment in run:
+                with open(segment.path, "rb") as f:
+                    data = f.read()
+                for offset, ts, payload in _scan(data):
+                    merged.index.add(merged.size + offset, ts, json.loads(payload))
+                out.write(data)
+                merged.size += len(data)
+            out.flush()
+            os.fsync(out.fileno())
+        self._replace(run, merged)
+        logger.info(f"🗜️ Compacted {len(run)} audit segments into {os.path.basename(run[0].path)}")
+
+    def _replace(self, segments: list[_Segment], merged: Optional[_Segment]):
+        with self._lock:
+            if merged is not None:
+                os.replace(merged.path, segments[0].path)
+                merged.path = segments[0].path
+                self._seal(merged)
+            for segment in segments:
+                if merged is None or segment is not segments[0]:
+                    os.remove(segment.path)
+                    if os.path.exists(segment.index_path):
+                        os.remove(segment.index_path)
+            ids = {id(s) for s in segments}
+            position = next(i for i, s in enumerate(self._segments) if id(s) in ids)
+            self._segments = [s for s in self._segments if id(s) not in ids]
+            if merged is not None:
+                self._segments.insert(position, merged)
+
+    def _recover(self) -> list[_Segment]:
+        seqs = sorted(int(m.group(1)) for m in map(SEGMENT_PATTERN.match, os.listdir(self.directory)) if m)
+        segments = []
+        for i, seq in enumerate(seqs):
+            segment = _Segment(seq, os.path.join(self.directory, f"segment-{seq:010d}.log"))
+            segment.size = os.path.getsize(segment.path)
+            if os.path.exists(segment.index_path) and i < len(seqs) - 1:
+                with open(segment.index_path, "r", encoding="utf-8") as f:
+                    segment.index = _SegmentIndex.from_dict(json.load(f))
+                segment.sealed = True
+            else:
+                self._rebuild(segment)
+                if i < len(seqs) - 1:
+                    self._seal(segment)
+            segments.append(segment)
+        if not segments:
+            segments.append(self._new_segment(1))
+        return segments
+
+    def _rebuild(self, segment: _Segment):
+        """Re-index a segment from its records, truncating a torn or corrupt tail."""
+        with open(segment.path, "rb") as f:
+            data = f.read()
+        good = 0
+        for offset, ts, payload in _scan(data):
+            segment.index.add(offset, ts, json.loads(payload))
+            good = offset + HEADER.size + len(payload)
+        if good < len(data):
+            logger.warning(f"⚠️ Truncated {len(data) - good} bytes of torn audit records in {segment.path}")
+            os.truncate(segment.path, good)
+        segment.size = good
@@ -0,0 +1,175 @@
+"""
+FinVerse AI — Duplicate Transaction Filter
+Ingest stage that drops re-imported statement rows and retried webhook deliveries
+before they reach the store (and inflate budget spending), and flags look-alike
+charges that may be duplicates without dropping them.
+"""
+
+import heapq
+import itertools
+import logging
+from typing import Optional
+
+from backend.analytics.categorizer import normalize_descriptor
+from backend.storage.ingest import IngestStage
+from backend.streaming.columnar import parse_timestamps
+
+logger = logging.getLogger(__name__)
+
+
+class _UserIndex:
+    __slots__ = ("buckets", "ids", "expiry", "newest")
+
+    def __init__(self):
+        self.buckets: dict[tuple, list[tuple]] = {}  # (amount, merchant, bucket) -> entries
+        self.ids: set[str] = set()
+        self.expiry: list[tuple] = []                # heap of (timestamp, seq, bucket key, entry)
+        self.newest = 0
+
+
+def _entry(txn: dict, ts: int) -> tuple:
+    """What a later look-alike is compared against: (timestamp, id, external id, import batch)."""
+    return ts, txn.get("id"), txn.get("external_id"), txn.get("import_batch")
+
+
+class DuplicateFilter(IngestStage):
+    """
+    Hashed time-window duplicate detection.
+
+    Look-alikes are transactions with the same direction, amount (to the paisa) and
+    normalized merchant within `tolerance_seconds`. Timestamps are bucketed by the
+    tolerance, so a lookup probes at most three hash buckets. Entries older than
+    `retention_seconds` behind the newest timestamp seen for the user are expired,
+    which bounds memory.
+
+    - Dropped: the transaction id was already seen, or a look-alike has the same
+      `external_id` (bank reference), or the look-alike came from another
+      `import_batch` (the same statement row imported twice)
+    - Flagged `possible_duplicate` and kept: any other look-alike, since two ₹20
+      chais or a renewed subscription are genuine repeat charges
+    - Look-alikes with different external ids are distinct charges
+    """
+
+    name = "deduplicator"
+
+    def __init__(self, tolerance_seconds: int = 300, retention_seconds: int = 35 * 86400):
+        self.tolerance = max(int(tolerance_seconds), 1)
+        self.retention = retention_seconds
+        self._users: dict[str, _UserIndex] = {}
+        self._seq = itertools.count()
+        self.duplicates = 0
+        self.possible_duplicates = 0
+
+    def process(self, txn: dict) -> Optional[dict]:
+        verdict, match_id = self.classify(txn)
+        if verdict == "duplicate":
+            self.duplicates += 1
+            logger.info(f"♻️ Dropped duplicate transaction {txn.get('id')} ({txn.get('merchant')}, ₹{txn.get('amount', 0)})")
+            return None
+        if verdict == "possible_duplicate":
+            self.possible_duplicates += 1
+            txn["tags"] = list(txn.get("tags", [])) + ["possible_duplicate"]
+            txn["possible_duplicate_of"] = match_id
+        self.remember(txn)
+        return txn
+
+    def is_duplicate(self, txn: dict) -> bool:
+        return self.classify(txn)[0] == "duplicate"
+
+    def classify(self, txn: dict) -> tuple[Optional[str], Optional[str]]:
+        """("duplicate" | "possible_duplicate" | None, id of the matching transaction)."""
+        index = self._users.get(txn.get("user_id", "default_user"))
+        if index is None:
+            return None, None
+        if txn.get("id") and txn["id"] in index.ids:
+            return "duplicate", txn["id"]
+
+        ts = self._timestamp(txn)
+        if ts is None:
+            return None, None
+        _, _, external_id, batch = _entry(txn, ts)
+        base = self._key(txn)
+        bucket = ts // self.tolerance
+        possible = None
+        for b in (bucket - 1, bucket, bucket + 1):
+            for seen_ts, seen_id, seen_external, seen_batch in index.buckets.get((*base, b), ()):
+                if abs(seen_ts - ts) > self.tolerance:
+                    continue
+                if external_id and seen_external:
+                    if external_id == seen_external:
+                        return "duplicate", seen_id
+                    continue  # Different bank references: distinct charges
+                if batch and seen_batch and batch != seen_batch:
+                    return "duplicate", seen_id  # Same row from an overlapping statement
+                possible = possible or seen_id or ""
+        return ("possible_duplicate", possible) if possible is not None else (None, None)
+
+    def remember(self, txn: dict):
+        """Index a transaction and expire entries that fell out of the retention window."""
+        index = self._users.setdefault(txn.get("user_id", "default_user"), _UserIndex())
+        ts = self._timestamp(txn)
+        if ts is None:
+            if txn.get("id"):
+                index.ids.add(txn["id"])
+            return
+
+        key = (*self._key(txn), ts // self.tolerance)
+        entry = _entry(txn, ts)
+        index.buckets.setdefault(key, []).append(entry)
+        if txn.get("id"):
+            index.ids.add(txn["id"])
+        heapq.heappush(index.expiry, (ts, next(self._seq), key, entry))
+        index.newest = max(index.newest, ts)
+        self._expire(index)
+
+    def _expire(self, index: _UserIndex):
+        horizon = index.newest - self.retention
+        while index.expiry and index.expiry[0][0] < horizon:
+            _, _, key, entry = heapq.heappop(index.expiry)
+            entries = index.buckets.get(key)
+            if entries is not None:
+                entries.remove(entry)
+                if not entries:
+                    del index.buckets[key]
+            index.ids.discard(entry[1])
+
+    # ── Partition lifecycle ─────────────────────────
+
+    def load_user(self, user_id: str, transactions: list[dict]):
+        """Re-index the user's history that is still inside the retention window."""
+        self._users.pop(user_id, None)
+        rows = [t for t in transactions if t.get("timestamp")]
+        if not rows:
+            return
+        stamps = parse_timestamps([t["timestamp"] for t in rows])
+        horizon = stamps.max() - self.retention
+        for txn, ts in zip(rows, stamps.tolist()):
+            if ts >= horizon:
+                self.remember({**txn, "user_id": user_id})
+
+    def evict_user(self, user_id: str):
+        self._users.pop(user_id, None)
+
+    def stats(self) -> dict:
+        return {
+            "duplicates_dropped": self.duplicates,
+            "possible_duplicates": self.possible_duplicates,
+            "indexed": sum(len(u.expiry) for u in list(self._users.values())),
+        }
+
+    # ── Keys ────────────────────────────────────────
+
+    @staticmethod
+    def _key(txn: dict) -> tuple:
+        # Raw descriptor when present: stored rows carry the categorizer's cleaned merchant
+        merchant = normalize_descriptor(txn.get("raw_descriptor") or txn.get("merchant", ""))
+        return (bool(txn.get("is_credit", False)), round(float(txn.get("amount", 0)) * 100), merchant)
+
+    @staticmethod
+    def _timestamp(txn: dict) -> Optional[int]:
+        if not txn.get("timestamp"):
+            return None
+        try:
+            return int(parse_timestamps([txn["timestamp"]])[0])
+        except (ValueError, TypeError):
+            return None
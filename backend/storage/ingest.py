@@ -0,0 +1,67 @@
+"""
+FinVerse AI — Ingestion Pipeline
+Ordered stages that enrich (or reject) each transaction before it is stored.
+"""
+
+import logging
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class IngestStage:
+    """
+    Base class for ingestion stages.
+
+    - `process(txn)` runs per incoming transaction; return None to drop it
+    - `load_user` / `evict_user` let stages keep per-user state only while
+      the user's partition is resident (rebuilt from history on load)
+    """
+
+    name = "stage"
+
+    def process(self, txn: dict) -> Optional[dict]:
+        return txn
+
+    def load_user(self, user_id: str, transactions: list[dict]):
+        pass
+
+    def evict_user(self, user_id: str):
+        pass
+
+
+class IngestPipeline:
+    """Runs transactions through the registered stages in order."""
+
+    def __init__(self, stages: Optional[list[IngestStage]] = None):
+        self.stages: list[IngestStage] = list(stages or [])
+        self.dropped: dict[str, int] = {}
+
+    def add_stage(self, stage: IngestStage):
+        self.stages.append(stage)
+
+    def get_stage(self, name: str) -> Optional[IngestStage]:
+        for stage in self.stages:
+            if stage.name == name:
+                return stage
+        return None
+
+    def process(self, txn: dict) -> Optional[dict]:
+        """Run a transaction through every stage. Returns None if a stage dropped it."""
+        for stage in self.stages:
+            txn = stage.process(txn)
+            if txn is None:
+                self.dropped[stage.name] = self.dropped.get(stage.name, 0) + 1
+                return None
+        return txn
+
+    def load_user(self, user_id: str, transactions: list[dict]):
+        for stage in self.stages:
+            try:
+                stage.load_user(user_id, transactions)
+            except Exception as e:
+                logger.error(f"Ingest stage {stage.name} failed to load {user_id}: {e}")
+
+    def evict_user(self, user_id: str):
+        for stage in self.stages:
+            stage.evict_user(user_id)
@@ -0,0 +1,319 @@
+"""
+FinVerse AI — Per-User Partitions
+Isolates each user's profile, budgets and transaction history, loaded on demand
+into a memory-capped LRU and written back to persistence when evicted.
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Optional
+
+from backend.models.user import UserProfile
+from backend.storage.ingest import IngestPipeline
+from backend.storage.transaction_store import TransactionStore
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_USER_ID = "default_user"
+
+# Rough in-memory footprint used for the memory cap (dict + strings per transaction)
+TRANSACTION_BYTES_ESTIMATE = 1200
+PROFILE_BYTES_ESTIMATE = 8000
+
+
+class UserPartition:
+    """One user's profile and transaction store, guarded by a per-user lock."""
+
+    def __init__(self, user_id: str, profile: UserProfile, store: TransactionStore):
+        self.user_id = user_id
+        self.profile = profile
+        self.store = store
+        self.lock = threading.RLock()
+        self.last_access = time.monotonic()
+        self.dirty = False
+        self.evicted = False
+
+    @property
+    def estimated_bytes(self) -> int:
+        return PROFILE_BYTES_ESTIMATE + len(self.store) * TRANSACTION_BYTES_ESTIMATE
+
+    def apply_spending(self, txn: dict):
+        """Reflect a new expense in the profile's budgets."""
+        if not txn.get("is_credit", False):
+            self.profile.update_spending(txn.get("category", "other"), txn.get("amount", 0))
+
+    def store_verdicts(self, verdicts: list[tuple[dict, dict]]):
+        """Attach recomputed compliance verdicts to stored transactions and mark the partition for write-back."""
+        with self.lock:
+            for txn, verdict in verdicts:
+                txn["compliance"] = verdict
+            self.dirty = True
+
+
+class JsonPartitionStorage:
+    """Persists partitions as one JSON document per user under `data_dir`."""
+
+    def __init__(self, data_dir: str):
+        self.data_dir = data_dir
+
+    def path(self, user_id: str) -> str:
+        safe = re.sub(r"[^A-Za-z0-9_.-]", "_", user_id)
+        return os.path.join(self.data_dir, f"{safe}.json")
+
+    def list_users(self) -> list[str]:
+        """Every persisted partition (by file name, i.e. the sanitized user id)."""
+        if not os.path.isdir(self.data_dir):
+            return []
+        return sorted(name[:-5] for name in os.listdir(self.data_dir) if name.endswith(".json"))
+
+    def load(self, user_id: str) -> Optional[dict]:
+        path = self.path(user_id)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as e:
+            logger.error(f"Failed to load partition for {user_id}: {e}")
+            return None
+
+    def save(self, partition: UserPartition):
+        os.makedirs(self.data_dir, exist_ok=True)
+        path = self.path(partition.user_id)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "profile": partition.profile.model_dump(mode="json"),
+                "transactions": partition.store.all(),
+            }, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+
+class UserPartitionManager:
+    """
+    LRU of hot user partitions with a user-count and memory cap.
+
+    - `get(user_id)` loads a partition from persistence (or seeds a new one) on first use
+    - Cold partitions are evicted least-recently-used first and saved if modified
+    - `ingest()` takes the per-user lock, so concurrent updates to one user are serialized
+    - Every transaction passes through the ingest pipeline before it is stored
+    - Disk reads and write-backs happen outside the manager lock: concurrent `get()`s
+      for a loading user wait on its placeholder, and a reload waits for a pending save
+    """
+
+    def __init__(
+        self,
+        storage: JsonPartitionStorage,
+        max_users: int = 1000,
+        max_memory_mb: float = 512,
+        seed_factory: Optional[Callable[[str], list[dict]]] = None,
+        pipeline: Optional[IngestPipeline] = None,
+    ):
+        self.storage = storage
+        self.pipeline = pipeline or IngestPipeline()
+        self.max_users = max_users
+        self.max_memory_bytes = int(max_memory_mb * 1024 * 1024)
+        self.seed_factory = seed_factory
+        self._partitions: "OrderedDict[str, UserPartition]" = OrderedDict()
+        self._loading: dict[str, Future] = {}           # user_id -> partition being loaded
+        self._saving: dict[str, threading.Event] = {}   # user_id -> evicted, write-back pending
+        self._lock = threading.RLock()
+        self._listeners: list[Callable[[dict], Any]] = []
+        self._bytes = 0
+        self.loads = 0
+        self.evictions = 0
+
+    def add_listener(self, listener: Callable[[dict], Any]):
+        """Call `listener(txn)` for every transaction ingested for any user."""
+        self._listeners.append(listener)
+        with self._lock:
+            for partition in self._partitions.values():
+                partition.store.add_listener(listener)
+
+    def get(self, user_id: str = DEFAULT_USER_ID) -> UserPartition:
+        """Return the user's partition, loading it if it is not resident."""
+        with self._lock:
+            partition = self._partitions.get(user_id)
+            if partition is not None:
+                self._partitions.move_to_end(user_id)
+                partition.last_access = time.monotonic()
+                return partition
+            pending = self._loading.get(user_id)
+            if pending is None:
+                pending = self._loading[user_id] = Future()
+                saving = self._saving.get(user_id)
+                loader = True
+            else:
+                loader = False
+        if not loader:
+            return pending.result()
+
+        try:
+            if saving is not None:
+                saving.wait()  # Evicted moments ago: read the file only once it is written
+            partition = self._load(user_id)
+        except BaseException as e:
+            with self._lock:
+                del self._loading[user_id]
+            pending.set_exception(e)
+            raise
+        with self._lock:
+            del self._loading[user_id]
+            self._partitions[user_id] = partition
+            self._bytes += partition.estimated_bytes
+            self.loads += 1
+            evicted = self._evict_cold(keep=user_id)
+        pending.set_result(partition)
+        self._write_back(evicted)
+        return partition
+
+    def ingest(self, user_id: str, txn: dict, source: Optional[str] = None) -> Optional[dict]:
+        """
+        Run a transaction through the ingest pipeline and append it to the user's
+        history under the per-user lock. Returns None if a stage rejected it.
+
+        `source` labels where the transaction came from (e.g. "simulator"). It always
+        replaces any `source` in the payload, so a record cannot relabel itself.
+        """
+        txn.setdefault("user_id", user_id)
+        txn["source"] = source
+        while True:
+            partition = self.get(user_id)
+            with partition.lock:
+                if partition.evicted:
+                    continue  # Evicted between lookup and lock — reload
+                txn = self.pipeline.process(txn)
+                if txn is None:
+                    return None
+                partition.store.append(txn)
+                partition.dirty = True
+                break
+        with self._lock:
+            evicted = self._evict_cold(keep=user_id)
+        self._write_back(evicted)
+        return txn
+
+    def evict(self, user_id: str) -> bool:
+        """
+        Write back and drop a resident partition.
+        Partitions that are busy (per-user lock held) are skipped.
+        """
+        with self._lock:
+            partition = self._detach(user_id)
+        if partition is None:
+            return False
+        self._write_back([partition])
+        return True
+
+    def _detach(self, user_id: str) -> Optional[UserPartition]:
+        """Drop a partition from the LRU (manager lock held); its write-back is left to the caller."""
+        partition = self._partitions.get(user_id)
+        if partition is None or not partition.lock.acquire(blocking=False):
+            return None
+        try:
+            del self._partitions[user_id]
+            self._bytes -= partition.estimated_bytes
+            partition.evicted = True  # Writers re-check this under the partition lock
+            self.pipeline.evict_user(user_id)
+            self.evictions += 1
+            if partition.dirty:
+                # A reload of this user waits until the file has been written
+                self._saving[user_id] = threading.Event()
+        finally:
+            partition.lock.release()
+        return partition
+
+    def _write_back(self, partitions: list[UserPartition]):
+        """Save detached partitions (manager lock not held)."""
+        for partition in partitions:
+            with self._lock:
+                done = self._saving.get(partition.user_id)
+            if done is None:
+                continue
+            try:
+                with partition.lock:
+                    self.storage.save(partition)
+                    partition.dirty = False
+            except Exception as e:
+                logger.error(f"Failed to save evicted partition for {partition.user_id}: {e}")
+            finally:
+                with self._lock:
+                    if self._saving.get(partition.user_id) is done:
+                        del self._saving[partition.user_id]
+                done.set()
+
+    def flush(self):
+        """Persist every modified partition without evicting it."""
+        with self._lock:
+            partitions = list(self._partitions.values())
+        for partition in partitions:
+            with partition.lock:
+                if partition.dirty:
+                    self.storage.save(partition)
+                    partition.dirty = False
+
+    def resident_users(self) -> list[str]:
+        with self._lock:
+            return list(self._partitions.keys())
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "resident_users": len(self._partitions),
+                "max_users": self.max_users,
+                "estimated_memory_mb": round(self._bytes / (1024 * 1024), 2),
+                "max_memory_mb": round(self.max_memory_bytes / (1024 * 1024), 2),
+                "loads": self.loads,
+                "evictions": self.evictions,
+            }
+
+    def _load(self, user_id: str) -> UserPartition:
+        data = self.storage.load(user_id)
+        if data is not None:
+            profile = UserProfile(**data.get("profile", {}))
+            partition = UserPartition(user_id, profile, TransactionStore(data.get("transactions", [])))
+            self.pipeline.load_user(user_id, partition.store.all())
+        else:
+            partition = UserPartition(user_id, UserProfile(user_id=user_id), TransactionStore())
+            self.pipeline.load_user(user_id, [])
+            if self.seed_factory:
+                for txn in self.seed_factory(user_id):
+                    txn.setdefault("user_id", user_id)
+                    txn = self.pipeline.process(txn)
+                    if txn is None:
+                        continue
+                    partition.store.append(txn)
+                    partition.apply_spending(txn)
+                partition.dirty = True
+
+        # Persisted profiles already include historical spending; only new transactions update it
+        partition.store.add_listener(partition.apply_spending)
+        partition.store.add_listener(self._account_append)
+        for listener in self._listeners:
+            partition.store.add_listener(listener)
+        return partition
+
+    def _account_append(self, txn: dict):
+        with self._lock:
+            self._bytes += TRANSACTION_BYTES_ESTIMATE
+
+    def _over_limit(self) -> bool:
+        return len(self._partitions) > self.max_users or self._bytes > self.max_memory_bytes
+
+    def _evict_cold(self, keep: str) -> list[UserPartition]:
+        # Least recently used first; the partition being served is never evicted
+        evicted = []
+        for user_id in list(self._partitions.keys()):
+            if not self._over_limit():
+                break
+            if user_id != keep:
+                partition = self._detach(user_id)
+                if partition is not None:
+                    evicted.append(partition)
+        return evicted
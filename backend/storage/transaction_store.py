@@ -0,0 +1,145 @@
+"""
+FinVerse AI — Shared Transaction Store
+Single in-memory, versioned transaction store read by every route and agent.
+"""
+
+import logging
+import threading
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class TransactionStore:
+    """
+    Append-only transaction store with a monotonically increasing version.
+
+    - Every append bumps `version`, so derived results (summaries, compliance
+      verdicts, agent outputs) can be cached and keyed on it
+    - Running aggregates make the spending summary O(categories), not O(history)
+    - Listeners (e.g. the feed broadcaster, profile updates) are notified per append
+    """
+
+    def __init__(self, transactions: Optional[list[dict]] = None):
+        self._transactions: list[dict] = []
+        self._version = 0
+        self._lock = threading.RLock()
+        self._listeners: list[Callable[[dict], Any]] = []
+        self._cache: dict[str, tuple[int, Any]] = {}
+
+        # Running aggregates
+        self._total_spent = 0.0
+        self._total_income = 0.0
+        self._categories: dict[str, float] = {}
+        self._flagged_count = 0
+        self._monthly: dict[str, dict] = {}          # "YYYY-MM" -> spent / income / categories
+        self._merchants: dict[str, list] = {}        # merchant -> [count, spent]
+        self._flagged_positions: list[int] = []
+
+        if transactions:
+            self.extend(transactions)
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def __len__(self) -> int:
+        return len(self._transactions)
+
+    def add_listener(self, listener: Callable[[dict], Any]):
+        """Call `listener(txn)` for every transaction appended from now on."""
+        self._listeners.append(listener)
+
+    def append(self, txn: dict) -> dict:
+        """Append a transaction, update aggregates and notify listeners."""
+        with self._lock:
+            self._transactions.append(txn)
+            self._apply(txn)
+            self._version += 1
+
+        for listener in self._listeners:
+            try:
+                listener(txn)
+            except Exception as e:
+                logger.error(f"Transaction listener failed: {e}")
+        return txn
+
+    def extend(self, transactions: list[dict]):
+        """Append several transactions."""
+        for txn in transactions:
+            self.append(txn)
+
+    def all(self) -> list[dict]:
+        """Snapshot of the full history, oldest first."""
+        with self._lock:
+            return list(self._transactions)
+
+    def recent(self, limit: int = 50) -> list[dict]:
+        """The `limit` most recent transactions, oldest first."""
+        with self._lock:
+            return self._transactions[-limit:] if limit > 0 else []
+
+    def summary(self) -> dict:
+        """Spending summary from the running aggregates."""
+        with self._lock:
+            return {
+                "total_spent": round(self._total_spent, 2),
+                "total_income": round(self._total_income, 2),
+                "net": round(self._total_income - self._total_spent, 2),
+                "categories": {k: round(v, 2) for k, v in sorted(self._categories.items(), key=lambda x: -x[1])},
+                "transaction_count": len(self._transactions),
+                "flagged_count": self._flagged_count,
+                "version": self._version,
+            }
+
+    def aggregates(self) -> dict:
+        """Snapshot of the finer-grained running aggregates (monthly, per-merchant, flagged)."""
+        with self._lock:
+            return {
+                "monthly": {
+                    month: {**m, "categories": dict(m["categories"])}
+                    for month, m in self._monthly.items()
+                },
+                "merchants": {k: tuple(v) for k, v in self._merchants.items()},
+                "flagged": [self._transactions[i] for i in self._flagged_positions],
+                "version": self._version,
+            }
+
+    def cached(self, key: str, compute: Callable[[], Any]) -> Any:
+        """
+        Return the value computed for `key` at the current version.
+        `compute()` only runs again once the store has changed.
+        """
+        version = self._version
+        hit = self._cache.get(key)
+        if hit is not None and hit[0] == version:
+            return hit[1]
+
+        value = compute()
+        # Keys may embed their inputs, so entries from older versions are dropped rather than overwritten
+        self._cache = {k: v for k, v in self._cache.items() if v[0] == version}
+        self._cache[key] = (version, value)
+        return value
+
+    def _apply(self, txn: dict):
+        amount = txn.get("amount", 0)
+        month = self._monthly.setdefault(
+            str(txn.get("timestamp", ""))[:7] or "unknown",
+            {"spent": 0.0, "income": 0.0, "count": 0, "categories": {}},
+        )
+        month["count"] += 1
+        if txn.get("is_credit", False):
+            self._total_income += amount
+            month["income"] += amount
+        else:
+            self._total_spent += amount
+            cat = txn.get("category", "other")
+            self._categories[cat] = self._categories.get(cat, 0) + amount
+            month["spent"] += amount
+            month["categories"][cat] = month["categories"].get(cat, 0) + amount
+            merchant = self._merchants.setdefault(txn.get("merchant", "Unknown"), [0, 0.0])
+            merchant[0] += 1
+            merchant[1] += amount
+        if txn.get("is_flagged", False):
+            self._flagged_count += 1
+            self._flagged_positions.append(len(self._transactions) - 1)
@@ -0,0 +1,197 @@
+"""
+FinVerse AI — Vectorized Batch Transaction Simulator
+Seeded, reproducible NumPy generator for high-volume load and capacity testing.
+Emits columnar batches directly (see streaming/columnar.py) instead of one dict at a time.
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import AsyncIterator, Iterator, Optional
+import numpy as np
+
+from backend.models.transaction import TransactionCategory
+from backend.streaming.transaction_simulator import MERCHANTS, LOCATIONS
+from backend.streaming.columnar import columns_to_records
+
+logger = logging.getLogger(__name__)
+
+
+# Same approximate real-world mix as generate_transaction()
+CATEGORY_WEIGHTS = {
+    TransactionCategory.FOOD: 25,
+    TransactionCategory.TRANSPORT: 15,
+    TransactionCategory.SHOPPING: 15,
+    TransactionCategory.ENTERTAINMENT: 10,
+    TransactionCategory.UTILITIES: 10,
+    TransactionCategory.HEALTHCARE: 5,
+    TransactionCategory.SUBSCRIPTION: 5,
+    TransactionCategory.RENT: 3,
+    TransactionCategory.SALARY: 12,
+}
+
+# Relative activity by hour of day (quiet nights, lunch and evening peaks)
+DIURNAL_WEIGHTS = np.array([
+    1.0, 0.5, 0.3, 0.2, 0.2, 0.4, 1.0, 2.5, 4.0, 4.5, 4.5, 5.0,
+    6.5, 6.0, 4.5, 4.0, 4.5, 5.5, 7.0, 8.0, 7.5, 6.0, 4.0, 2.0,
+])
+
+CREDIT_CATEGORIES = {TransactionCategory.SALARY, TransactionCategory.INVESTMENT}
+
+
+class BatchTransactionSimulator:
+    """
+    Vectorized transaction generator.
+
+    - Reproducible: the same seed always yields the same stream of batches
+    - Realistic: weighted category mix, per-merchant amount ranges, diurnal
+      timing, skewed per-user activity and home locations, injected anomalies
+      (ground truth in `is_anomaly`; `is_flagged` is left for the detector)
+    - Fast: millions of rows per second as columnar NumPy batches
+    """
+
+    def __init__(
+        self,
+        seed: int = 42,
+        num_users: int = 1000,
+        days: int = 30,
+        end: Optional[datetime] = None,
+        anomaly_rate: float = 0.05,
+        home_location_rate: float = 0.7,
+    ):
+        self.seed = seed
+        self.num_users = num_users
+        self.days = days
+        self.anomaly_rate = anomaly_rate
+        self.home_location_rate = home_location_rate
+        self._rng = np.random.default_rng(seed)
+
+        end = end or datetime.utcnow()
+        self.end_epoch = int((end - datetime(1970, 1, 1)).total_seconds())
+        self.start_epoch = self.end_epoch - days * 86400
+
+        # Flatten the merchant table into parallel arrays, grouped by category
+        categories = list(CATEGORY_WEIGHTS.keys())
+        self._categories = np.array([c.value for c in categories], dtype=object)
+        weights = np.array([CATEGORY_WEIGHTS[c] for c in categories], dtype=np.float64)
+        self._category_p = weights / weights.sum()
+        self._category_is_credit = np.array([c in CREDIT_CATEGORIES for c in categories])
+
+        names, lows, highs, offsets, counts = [], [], [], [], []
+        for category in categories:
+            merchants = MERCHANTS.get(category, [("Unknown", 100, 1000)])
+            offsets.append(len(names))
+            counts.append(len(merchants))
+            for name, lo, hi in merchants:
+                names.append(name)
+                lows.append(lo)
+                highs.append(hi)
+        self._merchant_names = np.array(names, dtype=object)
+        self._merchant_low = np.array(lows, dtype=np.float64)
+        self._merchant_high = np.array(highs, dtype=np.float64)
+        self._merchant_offset = np.array(offsets, dtype=np.int64)
+        self._merchant_count = np.array(counts, dtype=np.int64)
+
+        self._hour_p = DIURNAL_WEIGHTS / DIURNAL_WEIGHTS.sum()
+        self._locations = np.array(LOCATIONS, dtype=object)
+
+        # Per-user traits: ids, activity skew (a few heavy users) and home city
+        self._user_ids = np.array([f"user_{i:06d}" for i in range(num_users)], dtype=object)
+        activity = self._rng.lognormal(mean=0.0, sigma=1.0, size=num_users)
+        self._user_p = activity / activity.sum()
+        self._user_home = self._rng.integers(0, len(self._locations), size=num_users)
+
+    @property
+    def user_ids(self) -> np.ndarray:
+        return self._user_ids
+
+    def generate(self, count: int, live: bool = False, sort: bool = True) -> dict:
+        """
+        Generate `count` transactions as a columnar batch.
+        With `live=True` transactions are stamped with the current time instead of the simulated window.
+        """
+        rng = self._rng
+
+        users = rng.choice(self.num_users, size=count, p=self._user_p)
+        cat_codes = rng.choice(len(self._categories), size=count, p=self._category_p)
+        merchant_idx = self._merchant_offset[cat_codes] + (
+            rng.random(count) * self._merchant_count[cat_codes]
+        ).astype(np.int64)
+
+        low = self._merchant_low[merchant_idx]
+        high = self._merchant_high[merchant_idx]
+        amount = low + rng.random(count) * (high - low)
+
+        # Anomalies: amount spikes, half of them shifted into the small hours
+        is_anomaly = rng.random(count) < self.anomaly_rate
+        amount = np.where(is_anomaly, amount * rng.uniform(3, 10, size=count), amount)
+        amount = np.round(amount, 2)
+
+        if live:
+            timestamp = np.full(count, int(time.time()), dtype=np.int64)
+        else:
+            day = rng.integers(0, self.days, size=count)
+            hour = rng.choice(24, size=count, p=self._hour_p)
+            night = is_anomaly & (rng.random(count) < 0.5)
+            hour = np.where(night, rng.integers(1, 5, size=count), hour)
+            timestamp = (self.start_epoch - self.start_epoch % 86400 + day * 86400 + hour * 3600
+                         + rng.integers(0, 3600, size=count)).astype(np.int64)
+
+        home = rng.random(count) < self.home_location_rate
+        location_idx = np.where(home, self._user_home[users], rng.integers(0, len(self._locations), size=count))
+
+        columns = {
+            "id": rng.integers(0, np.iinfo(np.int64).max, size=count, dtype=np.int64),
+            "user_id": self._user_ids[users],
+            "amount": amount,
+            "category": self._categories[cat_codes],
+            "merchant": self._merchant_names[merchant_idx],
+            "timestamp": timestamp,
+            "is_credit": self._category_is_credit[cat_codes],
+            "location": self._locations[location_idx],
+            "is_flagged": np.zeros(count, dtype=np.bool_),   # set by the anomaly detector
+            "fraud_score": np.zeros(count, dtype=np.float32),
+            "is_anomaly": is_anomaly,                          # ground truth for benchmarking
+        }
+
+        if sort and not live:
+            order = np.argsort(timestamp, kind="stable")
+            columns = {name: values[order] for name, values in columns.items()}
+        return columns
+
+    def generate_records(self, count: int) -> list[dict]:
+        """Generate `count` transactions as dicts (same shape as generate_transaction)."""
+        return columns_to_records(self.generate(count))
+
+    def iter_batches(self, total: int, batch_size: int = 100_000) -> Iterator[dict]:
+        """Yield `total` transactions in columnar batches of at most `batch_size`."""
+        remaining = total
+        while remaining > 0:
+            n = min(batch_size, remaining)
+            remaining -= n
+            yield self.generate(n)
+
+    async def stream(
+        self,
+        events_per_sec: float,
+        tick: float = 0.1,
+        max_events: Optional[int] = None,
+    ) -> AsyncIterator[dict]:
+        """
+        Yield live columnar batches paced at `events_per_sec`.
+        One batch is emitted per `tick`; if the consumer falls behind, the next batch catches up.
+        """
+        if events_per_sec <= 0:
+            raise ValueError("events_per_sec must be positive")
+
+        started = time.monotonic()
+        emitted = 0
+        while max_events is None or emitted < max_events:
+            await asyncio.sleep(tick)
+            due = int((time.monotonic() - started) * events_per_sec) - emitted
+            if max_events is not None:
+                due = min(due, max_events - emitted)
+            if due > 0:
+                emitted += due
+                yield self.generate(due, live=True)
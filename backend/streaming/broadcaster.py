@@ -0,0 +1,237 @@
+"""
+FinVerse AI — Transaction Feed Broadcaster
+Single-producer, multi-consumer fan-out for the real-time transaction feed.
+Keeps a bounded ring buffer so reconnecting clients can resume from a sequence number.
+"""
+
+import asyncio
+import logging
+import threading
+from collections import deque
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class FeedSubscription:
+    """
+    A single consumer of the transaction feed.
+    Events are queued per subscriber; a subscriber whose queue overflows is marked lagged.
+    """
+
+    def __init__(self, broadcaster: "TransactionBroadcaster", queue_size: int, last_seq: int,
+                 user_id: Optional[str] = None):
+        self._broadcaster = broadcaster
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.user_id = user_id
+        self.last_seq = last_seq
+        self._offered_seq = last_seq  # Highest seq already queued (or skipped) for this subscriber
+        self.lagged = False
+        self.closed = False
+
+    def _offer(self, event: dict) -> bool:
+        """Enqueue an event without blocking the producer. Returns False on overflow."""
+        if self.closed or self.lagged:
+            return not self.closed
+        if event["seq"] <= self._offered_seq:
+            return True  # Already replayed from the ring buffer
+        if self.user_id is not None and event.get("user_id") != self.user_id:
+            self._offered_seq = event["seq"]
+            return True
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.lagged = True
+            return False
+        self._offered_seq = event["seq"]
+        return True
+
+    def close(self):
+        """Stop delivering events and wake up a waiting consumer."""
+        if self.closed:
+            return
+        self.closed = True
+        self._broadcaster.unsubscribe(self)
+        try:
+            self._queue.put_nowait(None)
+        except asyncio.QueueFull:
+            pass
+
+    async def next_event(self, timeout: Optional[float] = None) -> Optional[dict]:
+        """
+        Wait for the next feed event.
+        Returns None on timeout or when the subscription has been closed.
+        """
+        if self.closed and self._queue.empty():
+            return None
+
+        # A lagged subscriber drains what it already has, then catches up from the ring buffer
+        if self.lagged and self._queue.empty():
+            self._resync()
+
+        try:
+            event = await asyncio.wait_for(self._queue.get(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+
+        if event is None:
+            return None
+        if event.get("seq") is not None:
+            self.last_seq = event["seq"]
+        return event
+
+    def _resync(self):
+        """Replay missed events from the ring buffer, or ask the client to reload."""
+        # The buffer may hold events not fanned out yet; `_offer` skips them once replayed
+        missed, complete = self._broadcaster.replay(self._offered_seq)
+        self.lagged = False
+
+        if not complete:
+            # Missed events have already been evicted from the ring buffer
+            self._request_resync()
+            return
+
+        replayed = missed[:self._queue.maxsize]
+        for event in replayed:
+            if self.user_id is None or event.get("user_id") == self.user_id:
+                self._queue.put_nowait(event)
+        if replayed:
+            self._offered_seq = replayed[-1]["seq"]
+        if len(missed) > self._queue.maxsize:
+            # Still too far behind — pick up the remainder on the next drain
+            self.lagged = True
+
+    def _request_resync(self):
+        """Ask the client to reload its state, then continue from the latest seq."""
+        latest = self._broadcaster.last_seq
+        self._queue.put_nowait({"type": "resync", "seq": None, "latest_seq": latest})
+        self.last_seq = self._offered_seq = latest
+
+    async def __aiter__(self):
+        # Events queued before a close are still delivered
+        while True:
+            event = await self.next_event()
+            if event is None:
+                break
+            yield event
+
+
+class TransactionBroadcaster:
+    """
+    Fans out transactions from a single producer to many SSE/WebSocket consumers.
+
+    - Every published transaction gets a monotonically increasing sequence number
+    - The last `buffer_size` events are kept in a ring buffer for resume/replay
+    - Slow consumers never block the producer: they are either dropped
+      ("drop") or caught up from the ring buffer ("resync")
+
+    Consumers live on the event loop thread. `publish` may also be called from
+    worker threads (it is a partition listener): sequence numbers and the ring
+    buffer are updated under a lock, and fan-out hops to the loop in publish order.
+    """
+
+    def __init__(self, buffer_size: int = 1000, subscriber_queue_size: int = 256,
+                 slow_consumer_policy: str = "resync"):
+        if slow_consumer_policy not in ("drop", "resync"):
+            raise ValueError(f"Unknown slow consumer policy: {slow_consumer_policy}")
+        self.buffer_size = buffer_size
+        self.subscriber_queue_size = subscriber_queue_size
+        self.slow_consumer_policy = slow_consumer_policy
+        self._buffer: deque = deque(maxlen=buffer_size)
+        self._seq = 0
+        self._subscribers: set[FeedSubscription] = set()
+        self._lock = threading.Lock()
+        self._pending: deque = deque()  # Published, not yet fanned out
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.dropped_consumers = 0
+
+    @property
+    def last_seq(self) -> int:
+        return self._seq
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def publish(self, transaction: dict) -> int:
+        """Publish a transaction to every subscriber. Returns its sequence number."""
+        with self._lock:
+            self._seq += 1
+            event = {
+                "type": "transaction",
+                "seq": self._seq,
+                "user_id": transaction.get("user_id"),
+                "transaction": transaction,
+            }
+            self._buffer.append(event)
+            self._pending.append(event)
+
+        loop = self._loop
+        if loop is None or _running_loop() is loop:
+            self._fan_out()
+        elif not loop.is_closed():
+            loop.call_soon_threadsafe(self._fan_out)
+        return event["seq"]
+
+    def _fan_out(self):
+        """Deliver pending events to subscribers (event loop thread only)."""
+        while True:
+            with self._lock:
+                if not self._pending:
+                    return
+                event = self._pending.popleft()
+            for sub in list(self._subscribers):
+                if sub._offer(event) or self.slow_consumer_policy == "resync":
+                    continue
+                self.dropped_consumers += 1
+                logger.warning(f"Dropping slow feed consumer at seq {sub.last_seq}")
+                sub.close()
+
+    def subscribe(self, since: Optional[int] = None, user_id: Optional[str] = None) -> FeedSubscription:
+        """
+        Register a new consumer, optionally only for one user's transactions.
+        If `since` is given, events after that sequence number are replayed first.
+        A `since` ahead of the feed (e.g. from before a restart) gets a resync event.
+        """
+        self._loop = _running_loop() or self._loop
+        sub = FeedSubscription(self, self.subscriber_queue_size, last_seq=self._seq, user_id=user_id)
+        if since is not None and since > self._seq:
+            sub._request_resync()
+        elif since is not None and since < self._seq:
+            sub.last_seq = sub._offered_seq = max(0, since)
+            sub.lagged = True  # Forces a replay from the ring buffer on first read
+        self._subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, sub: FeedSubscription):
+        self._subscribers.discard(sub)
+
+    def replay(self, since: int) -> tuple[list[dict], bool]:
+        """
+        Return buffered events with seq > since.
+        The flag is False when some of those events were already evicted.
+        """
+        with self._lock:
+            if since >= self._seq:
+                return [], True
+
+            oldest = self._buffer[0]["seq"] if self._buffer else self._seq + 1
+            complete = since + 1 >= oldest
+            events = [e for e in self._buffer if e["seq"] > since]
+        return events, complete
+
+    def stats(self) -> dict:
+        return {
+            "last_seq": self._seq,
+            "buffered": len(self._buffer),
+            "subscribers": len(self._subscribers),
+            "dropped_consumers": self.dropped_consumers,
+            "slow_consumer_policy": self.slow_consumer_policy,
+        }
+
+
+def _running_loop() -> Optional[asyncio.AbstractEventLoop]:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
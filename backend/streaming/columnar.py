@@ -0,0 +1,124 @@
+"""
+FinVerse AI — Columnar Transaction Batches
+Converts between transaction dicts and NumPy column batches for vectorized analytics.
+"""
+
+import logging
+from datetime import datetime
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+# Column layout shared by the batch simulator, analytics and compliance engines.
+# `timestamp` is always int64 seconds since the Unix epoch (UTC, naive).
+COLUMN_DTYPES = {
+    "id": object,
+    "user_id": object,
+    "amount": np.float64,
+    "category": object,
+    "merchant": object,
+    "timestamp": np.int64,
+    "is_credit": np.bool_,
+    "location": object,
+    "is_flagged": np.bool_,
+    "fraud_score": np.float32,
+    "is_anomaly": np.bool_,
+    "source": object,
+}
+
+NAT = np.iinfo(np.int64).min  # `timestamp` of a row whose timestamp is missing
+
+
+def batch_length(columns: dict) -> int:
+    """Number of rows in a columnar batch."""
+    return len(columns["amount"]) if "amount" in columns else 0
+
+
+def parse_timestamps(values: list) -> np.ndarray:
+    """
+    Parse ISO strings / datetimes into epoch seconds in one vectorized pass where possible.
+    Missing values (None or "") become `NAT`.
+    """
+    if not values:
+        return np.empty(0, dtype=np.int64)
+    try:
+        parsed = np.array([v.isoformat() if isinstance(v, datetime) else v for v in values],
+                          dtype="datetime64[us]")
+        return parsed.astype("datetime64[s]").astype(np.int64)
+    except (ValueError, TypeError):
+        # Timezone-aware or otherwise unusual strings — fall back to per-item parsing
+        out = np.empty(len(values), dtype=np.int64)
+        for i, v in enumerate(values):
+            if v is None or v == "":
+                out[i] = NAT
+                continue
+            ts = datetime.fromisoformat(v) if isinstance(v, str) else v
+            if ts.tzinfo is not None:
+                ts = ts.replace(tzinfo=None) - ts.utcoffset()
+            out[i] = int((ts - datetime(1970, 1, 1)).total_seconds())
+        return out
+
+
+def format_timestamps(epoch_seconds: np.ndarray) -> np.ndarray:
+    """Format epoch seconds as ISO strings compatible with datetime.fromisoformat."""
+    return np.datetime_as_string(np.asarray(epoch_seconds, dtype="datetime64[s]"), unit="s")
+
+
+def records_to_columns(transactions: list[dict]) -> dict:
+    """Convert transaction dicts into a columnar batch."""
+    columns = {}
+    for name, dtype in COLUMN_DTYPES.items():
+        if name == "timestamp":
+            columns[name] = parse_timestamps([t.get("timestamp") for t in transactions])
+        elif name == "user_id":
+            columns[name] = np.array([t.get("user_id", "default_user") for t in transactions], dtype=dtype)
+        elif dtype is object:
+            columns[name] = np.array([t.get(name, "") for t in transactions], dtype=dtype)
+        else:
+            columns[name] = np.array([t.get(name, 0) for t in transactions], dtype=dtype)
+    return columns
+
+
+def columns_to_records(columns: dict, start: int = 0, stop: int = None) -> list[dict]:
+    """Materialize (a slice of) a columnar batch as transaction dicts."""
+    sl = slice(start, stop)
+    timestamps = format_timestamps(columns["timestamp"][sl])
+    ids = columns["id"][sl]
+    if ids.dtype.kind in "iu":
+        ids = [f"{int(i):016x}" for i in ids]
+
+    records = []
+    for i, (txn_id, user_id, amount, category, merchant, is_credit, location, flagged, score) in enumerate(zip(
+        ids, columns["user_id"][sl], columns["amount"][sl].tolist(), columns["category"][sl],
+        columns["merchant"][sl], columns["is_credit"][sl].tolist(), columns["location"][sl],
+        columns["is_flagged"][sl].tolist(), columns["fraud_score"][sl].tolist(),
+    )):
+        merchant = str(merchant)
+        records.append({
+            "id": str(txn_id),
+            "user_id": str(user_id),
+            "amount": round(amount, 2),
+            "category": str(category),
+            "merchant": merchant,
+            "description": f"{'Received from' if is_credit else 'Payment to'} {merchant}",
+            "timestamp": str(timestamps[i]),
+            "is_credit": is_credit,
+            "location": str(location),
+            "is_flagged": flagged,
+            "fraud_score": round(score, 2),
+            "tags": ["anomaly"] if flagged else [],
+        })
+    return records
+
+
+def concat_columns(batches: list[dict]) -> dict:
+    """Concatenate several columnar batches."""
+    if not batches:
+        return {name: np.empty(0, dtype=dtype) for name, dtype in COLUMN_DTYPES.items()}
+    return {name: np.concatenate([b[name] for b in batches]) for name in batches[0]}
+
+
+def take_columns(columns: dict, index) -> dict:
+    """Select rows (boolean mask, index array or slice) from a columnar batch."""
+    return {name: values[index] for name, values in columns.items()}
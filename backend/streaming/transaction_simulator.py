@@ -3,11 +3,14 @@ FinVerse AI — Transaction Simulator
 Generates realistic transaction data for demo/development.
 """
 
+import asyncio
+import logging
 import random
 import uuid
 from datetime import datetime, timedelta
 from backend.models.transaction import Transaction, TransactionCategory
 
+logger = logging.getLogger(__name__)
 
 # Merchant data organized by category
 MERCHANTS = {
@@ -79,7 +82,7 @@ def generate_transaction(bias_category: TransactionCategory = None) -> dict:
     hours_ago = random.randint(0, 720)
     timestamp = datetime.utcnow() - timedelta(hours=hours_ago)
 
-    # Small chance of anomaly (for fraud detection demo)
+    # Small chance of anomaly (for fraud detection demo) — detection itself happens at ingest
     is_anomaly = random.random() < 0.05  # 5% chance
     if is_anomaly:
         amount *= random.uniform(3, 10)  # Spike the amount
@@ -94,9 +97,9 @@ def generate_transaction(bias_category: TransactionCategory = None) -> dict:
         "timestamp": timestamp.isoformat(),
         "is_credit": is_credit,
         "location": random.choice(LOCATIONS),
-        "is_flagged": is_anomaly,
-        "fraud_score": round(random.uniform(0.5, 0.95), 2) if is_anomaly else round(random.uniform(0, 0.2), 2),
-        "tags": ["anomaly"] if is_anomaly else [],
+        "is_flagged": False,
+        "fraud_score": 0.0,
+        "tags": [],
     }
 
 
@@ -114,3 +117,20 @@ def generate_transaction_batch(count: int = 30) -> list[dict]:
     # Sort by timestamp
     transactions.sort(key=lambda x: x["timestamp"])
     return transactions
+
+
+async def simulate_transaction_stream(interval: float, on_transaction):
+    """
+    Emit a fresh transaction every `interval` seconds until cancelled.
+    `on_transaction` receives each new transaction dict (live, timestamped now);
+    it runs in a worker thread, since ingesting may load a partition from disk.
+    """
+    logger.info(f"📡 Transaction simulator streaming every {interval}s")
+    while True:
+        await asyncio.sleep(interval)
+        txn = generate_transaction()
+        txn["timestamp"] = datetime.utcnow().isoformat()
+        try:
+            await asyncio.to_thread(on_transaction, txn)
+        except Exception as e:
+            logger.error(f"Transaction stream handler failed: {e}")
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Tests import the app as `backend.*`, like main.py and the scripts do
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
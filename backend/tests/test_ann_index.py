@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+faiss = pytest.importorskip("faiss")
+
+from backend.rag.ann_index import INDEX_TYPES, describe_index  # noqa: E402
+from backend.rag.vector_store import VectorStore  # noqa: E402
+
+DIM = 32
+PARAMS = {"nlist": 8, "pq_m": 8, "pq_nbits": 4, "hnsw_m": 16, "ef_construction": 64}
+
+
+def _corpus(count=1000, seed=0):
+    vectors = np.random.default_rng(seed).standard_normal((count, DIM)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+@pytest.mark.parametrize("index_type", INDEX_TYPES)
+def test_build_add_search_save_load(tmp_path, index_type):
+    vectors = _corpus()
+    documents = [{"text": f"doc {i}", "metadata": {"i": i}} for i in range(len(vectors))]
+    store = VectorStore(index_dir=str(tmp_path), index_type=index_type, index_params=PARAMS,
+                        nprobe=8, ef_search=64)
+    store.add_documents(documents, embeddings=vectors)
+    assert describe_index(store._index)["index_type"] == index_type
+
+    # Queries are served from the embedding cache, so no model is loaded
+    store.cache.put_many(["doc 7"], vectors[7:8])
+    assert 7 in [r["metadata"]["i"] for r in store.search("doc 7", top_k=5)]
+
+    store.save()
+    loaded = VectorStore(index_dir=str(tmp_path), index_type=index_type, nprobe=8, ef_search=64)
+    loaded.load()
+    stats = loaded.index_stats()
+    assert stats["index_type"] == index_type and stats["vectors"] == len(vectors) and stats["memory_mb"] > 0
+    loaded.cache.put_many(["doc 7"], vectors[7:8])
+    assert 7 in [r["metadata"]["i"] for r in loaded.search("doc 7", top_k=5)]
+
+
+def test_too_small_corpus_falls_back_to_flat(tmp_path):
+    store = VectorStore(index_dir=str(tmp_path), index_type="ivf_pq", index_params=PARAMS)
+    store.add_documents([{"text": f"doc {i}"} for i in range(50)], embeddings=_corpus(50))
+    assert describe_index(store._index)["index_type"] == "flat"
@@ -0,0 +1,37 @@
+import numpy as np
+
+from backend.analytics.anomaly_detector import OnlineAnomalyDetector
+from backend.streaming.columnar import records_to_columns
+
+
+def _history():
+    txns = [{"user_id": "u1", "amount": 100.0 + i, "category": "food", "merchant": "Cafe",
+             "timestamp": f"2025-01-{10 + i:02d}T23:30:00-05:00"} for i in range(6)]  # 04:30 UTC
+    txns += [{"user_id": "u1", "amount": 120.0, "category": "food", "merchant": "Cafe",
+              "timestamp": "2025-01-20T09:00:00"}, {"user_id": "u1", "amount": 90.0, "category": "food",
+                                                    "merchant": "Cafe", "timestamp": None}]
+    return txns
+
+
+def test_streaming_and_backfill_bucket_hours_alike():
+    streamed = OnlineAnomalyDetector()
+    for txn in _history():
+        streamed.observe(dict(txn))
+    backfilled = OnlineAnomalyDetector()
+    backfilled.backfill(records_to_columns(_history()), write_back=False)
+
+    hours = backfilled._users["u1"].hours
+    assert hours.tolist() == streamed._users["u1"].hours.tolist()
+    assert hours[4] == 6 and hours[9] == 1 and hours.sum() == 7  # The row without a timestamp is left out
+    assert backfilled._users["u1"].overall.count == 8
+
+
+def test_backfill_scores_match_streaming():
+    # 04:10 UTC is the user's usual hour, whichever way the earlier timestamps were written
+    txns = _history()[:6] + [{"user_id": "u1", "amount": 105.0, "category": "food", "merchant": "Cafe",
+                              "timestamp": "2025-01-18T04:10:00"}]
+    streamed = OnlineAnomalyDetector(min_history=3)
+    expected = [streamed.process(dict(txn))["fraud_score"] for txn in txns]
+    backfilled = OnlineAnomalyDetector(min_history=3)
+    scores = backfilled.backfill(records_to_columns(txns))
+    assert np.allclose(scores, expected, atol=0.01)
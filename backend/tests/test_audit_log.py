@@ -0,0 +1,48 @@
+import glob
+import os
+
+from backend.storage.audit_log import AuditLog
+
+
+def _fill(log, count, start=0):
+    for i in range(start, start + count):
+        log.append({"txn_id": f"t{i}", "rule_ids": ["AML_001"] if i % 3 == 0 else []})
+    log.flush()
+
+
+def test_torn_tail_is_truncated_on_recovery(tmp_path):
+    log = AuditLog(str(tmp_path))
+    _fill(log, 20)
+    log.close()
+    active = sorted(glob.glob(os.path.join(tmp_path, "segment-*.log")))[-1]
+    intact = os.path.getsize(active)
+    with open(active, "ab") as f:
+        f.write(b"\x00\x07torn-record")
+
+    log = AuditLog(str(tmp_path))
+    assert os.path.getsize(active) == intact
+    assert [r["txn_id"] for r in log.query(limit=0)] == [f"t{i}" for i in range(20)]
+    _fill(log, 5, start=20)
+    assert len(log.query(rule_id="AML_001", limit=0)) == 9
+    log.close()
+
+
+def test_compaction_merges_small_segments_and_keeps_every_record(tmp_path):
+    log = AuditLog(str(tmp_path), segment_bytes=2048)
+    for batch in range(10):
+        _fill(log, 10, start=batch * 10)
+    log.close()
+
+    # A larger segment size leaves the sealed segments undersized
+    log = AuditLog(str(tmp_path), segment_bytes=64 * 1024)
+    before = log.stats()["segments"]
+    assert before > 2
+    log.compact()
+    assert log.stats()["segments"] == 2  # One merged sealed segment + the active one
+    assert [r["txn_id"] for r in log.query(limit=0)] == [f"t{i}" for i in range(100)]
+    assert [r["txn_id"] for r in log.query(txn_id="t42")] == ["t42"]
+    log.close()
+
+    reopened = AuditLog(str(tmp_path))
+    assert len(reopened.query(limit=0)) == 100
+    reopened.close()
@@ -0,0 +1,62 @@
+import math
+import random
+from collections import Counter
+
+import pytest
+
+from backend.rag.hybrid_retriever import BM25Retriever
+
+WORDS = [f"w{i}" for i in range(500)]
+WEIGHTS = [1 / (i + 1) for i in range(500)]  # Zipf-like, so some terms are very common
+
+
+@pytest.fixture(scope="module")
+def corpus():
+    rng = random.Random(1)
+    return [{"text": " ".join(rng.choices(WORDS, WEIGHTS, k=rng.randint(5, 60))), "metadata": {"i": i}}
+            for i in range(1500)]
+
+
+def _brute_force(retriever, docs, query, k, k1=1.5, b=0.75):
+    counts = [Counter(retriever._tokenize(d["text"])) for d in docs]
+    lengths = [sum(c.values()) for c in counts]
+    avg = sum(lengths) / len(lengths)
+    df = Counter(t for c in counts for t in c)
+    scores = []
+    for c, length in zip(counts, lengths):
+        score = 0.0
+        for term in retriever._tokenize(query):
+            if term in c:
+                idf = math.log((len(docs) - df[term] + 0.5) / (df[term] + 0.5) + 1)
+                score += idf * c[term] * (k1 + 1) / (c[term] + k1 * (1 - b + b * length / avg))
+        scores.append(score)
+    return [s for s in sorted(scores, reverse=True)[:k] if s > 0]
+
+
+def test_maxscore_pruning_matches_exhaustive_scoring(corpus):
+    retriever = BM25Retriever()
+    retriever.add_documents(corpus[:1000])
+    retriever.add_documents(corpus[1000:])  # Incremental adds refresh the statistics
+    rng = random.Random(2)
+    for _ in range(40):
+        query = " ".join(rng.choices(WORDS, k=rng.randint(1, 6)))
+        got = [r["score"] for r in retriever.search(query, 5)]
+        assert got == pytest.approx(_brute_force(retriever, corpus, query, 5), abs=1e-9)
+
+
+def test_saved_index_round_trips(tmp_path, corpus):
+    retriever = BM25Retriever()
+    retriever.add_documents(corpus)
+    path = str(tmp_path / "bm25.idx")
+    retriever.save(path)
+
+    loaded = BM25Retriever()
+    assert loaded.load(path, corpus)
+    for query in ["w3 w77 w400", "w0", "w250 w1 w499"]:
+        assert [r["score"] for r in loaded.search(query, 5)] == [r["score"] for r in retriever.search(query, 5)]
+
+    extra = [{"text": "w250 zzz", "metadata": {}}]
+    loaded.add_documents(extra)
+    assert loaded.search("zzz", 1)[0]["text"] == "w250 zzz"
+    # A different corpus invalidates the file instead of serving stale postings
+    assert not BM25Retriever().load(path, corpus[:10])
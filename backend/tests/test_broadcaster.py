@@ -0,0 +1,96 @@
+import asyncio
+import threading
+
+from backend.api.routes import transactions as routes
+from backend.streaming.broadcaster import TransactionBroadcaster
+
+
+class _FakeWebSocket:
+    def __init__(self):
+        self.sent = []
+        self.close_code = None
+
+    async def accept(self):
+        pass
+
+    async def send_json(self, data):
+        self.sent.append(data)
+
+    async def close(self, code=1000, reason=None):
+        self.close_code = code
+
+
+async def _until(condition):
+    while not condition():
+        await asyncio.sleep(0)
+
+
+def test_dropped_websocket_consumer_gets_queued_events_then_1013():
+    async def scenario():
+        broadcaster = TransactionBroadcaster(subscriber_queue_size=3, slow_consumer_policy="drop")
+        routes.init_transactions(None, broadcaster, heartbeat=5.0)
+        websocket = _FakeWebSocket()
+        handler = asyncio.create_task(routes.transactions_websocket(websocket, user_id="u1"))
+        await _until(lambda: broadcaster.subscriber_count == 1)
+
+        # The consumer doesn't run until we yield, so the fourth event overflows its queue
+        for i in range(4):
+            broadcaster.publish({"id": f"t{i}", "user_id": "u1"})
+        await asyncio.wait_for(handler, timeout=1)
+        return broadcaster, websocket
+
+    broadcaster, websocket = asyncio.run(scenario())
+    assert [e["seq"] for e in websocket.sent] == [1, 2, 3]
+    assert websocket.close_code == 1013
+    assert broadcaster.dropped_consumers == 1
+
+
+def test_publish_from_worker_thread_is_delivered_on_the_loop():
+    async def scenario():
+        broadcaster = TransactionBroadcaster()
+        subscription = broadcaster.subscribe()
+        worker = threading.Thread(target=lambda: [broadcaster.publish({"id": f"t{i}"}) for i in range(50)])
+        worker.start()
+        events = [await subscription.next_event(timeout=1) for _ in range(50)]
+        worker.join()
+        return events
+
+    events = asyncio.run(scenario())
+    assert [e["seq"] for e in events] == list(range(1, 51))
+
+
+async def _drain(subscription):
+    events = []
+    while (event := await subscription.next_event(timeout=0.1)) is not None:
+        events.append(event)
+    return events
+
+
+def test_replayed_events_are_not_fanned_out_again():
+    async def scenario():
+        broadcaster = TransactionBroadcaster()
+        broadcaster.subscribe()  # Binds the broadcaster to this loop
+        for i in range(2):
+            broadcaster.publish({"id": f"t{i}"})
+        subscription = broadcaster.subscribe(since=0)
+
+        # Published from a worker: buffered at once, fanned out once the loop gets to it
+        worker = threading.Thread(target=lambda: [broadcaster.publish({"id": f"w{i}"}) for i in range(3)])
+        worker.start()
+        worker.join()
+        return await _drain(subscription)
+
+    assert [e["seq"] for e in asyncio.run(scenario())] == [1, 2, 3, 4, 5]
+
+
+def test_resume_from_a_future_seq_asks_for_resync():
+    async def scenario():
+        broadcaster = TransactionBroadcaster()
+        broadcaster.publish({"id": "t0"})
+        subscription = broadcaster.subscribe(since=500)  # Last-Event-ID from before a restart
+        broadcaster.publish({"id": "t1"})
+        return await _drain(subscription)
+
+    events = asyncio.run(scenario())
+    assert events[0] == {"type": "resync", "seq": None, "latest_seq": 1}
+    assert [e["seq"] for e in events[1:]] == [2]
@@ -0,0 +1,46 @@
+import threading
+
+from backend.models.user import UserProfile
+from backend.storage.partitions import UserPartition
+from backend.storage.transaction_store import TransactionStore
+from backend.tools.compliance_rules import ComplianceEngine
+
+
+def _partition():
+    store = TransactionStore([
+        {"id": "t1", "user_id": "u1", "amount": 250.0, "merchant": "Cafe", "category": "food",
+         "timestamp": "2025-01-15T12:00:00"},
+        {"id": "t2", "user_id": "u1", "amount": 2_000_000.0, "merchant": "Wire", "category": "transfer",
+         "timestamp": "2025-01-15T13:00:00", "compliance": {"ruleset_version": "old"}},
+    ])
+    return UserPartition("u1", UserProfile(user_id="u1"), store)
+
+
+def test_refreshed_verdicts_are_written_back_under_the_partition_lock():
+    engine = ComplianceEngine()
+    partition = _partition()
+    reviews = []
+
+    partition.lock.acquire()
+    reviewer = threading.Thread(target=lambda: reviews.append(
+        engine.review(partition.store.all(), store_verdicts=partition.store_verdicts)))
+    reviewer.start()
+    reviewer.join(0.2)
+    assert reviewer.is_alive()  # Waiting for the partition lock
+    assert partition.store.all()[1]["compliance"] == {"ruleset_version": "old"}
+    partition.lock.release()
+    reviewer.join(5)
+
+    assert partition.dirty
+    assert all(engine.is_current(t["compliance"]) for t in partition.store.all())
+    assert reviews[0]["transactions_checked"] == 2 and reviews[0]["non_compliant"] >= 1
+
+
+def test_current_verdicts_leave_the_partition_clean():
+    engine = ComplianceEngine()
+    partition = _partition()
+    engine.review(partition.store.all(), store_verdicts=partition.store_verdicts)
+    partition.dirty = False
+
+    engine.review(partition.store.all(), store_verdicts=partition.store_verdicts)
+    assert not partition.dirty
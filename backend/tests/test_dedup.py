@@ -0,0 +1,36 @@
+from backend.storage.dedup import DuplicateFilter
+
+
+def _txn(txn_id, timestamp, merchant="Chai Point", amount=20.0, **extra):
+    return {"id": txn_id, "user_id": "u1", "merchant": merchant, "amount": amount,
+            "timestamp": timestamp, "tags": [], **extra}
+
+
+def test_two_identical_legitimate_charges_are_kept():
+    dedup = DuplicateFilter(tolerance_seconds=300)
+    first = dedup.process(_txn("t1", "2025-01-15T09:00:00"))
+    second = dedup.process(_txn("t2", "2025-01-15T09:02:00"))
+
+    assert first is not None and "possible_duplicate" not in first["tags"]
+    assert second is not None
+    assert "possible_duplicate" in second["tags"] and second["possible_duplicate_of"] == "t1"
+    assert dedup.stats()["duplicates_dropped"] == 0
+
+
+def test_same_id_is_dropped():
+    dedup = DuplicateFilter()
+    assert dedup.process(_txn("t1", "2025-01-15T09:00:00")) is not None
+    assert dedup.process(_txn("t1", "2025-01-15T09:00:00")) is None
+
+
+def test_provenance_decides_between_drop_and_keep():
+    dedup = DuplicateFilter()
+    dedup.process(_txn("t1", "2025-01-15T09:00:00", "Spotify", 119.0, external_id="UTR1", import_batch="jan"))
+
+    # Same bank reference under a fresh id: a retried delivery
+    assert dedup.process(_txn("t2", "2025-01-15T09:00:30", "Spotify", 119.0, external_id="UTR1")) is None
+    # Different bank reference: a second genuine charge, not even suspicious
+    kept = dedup.process(_txn("t3", "2025-01-15T09:01:00", "Spotify", 119.0, external_id="UTR2"))
+    assert kept is not None and "possible_duplicate" not in kept["tags"]
+    # Same row in an overlapping statement
+    assert dedup.process(_txn("t4", "2025-01-15T09:00:00", "Spotify", 119.0, import_batch="feb")) is None
@@ -0,0 +1,41 @@
+import sys
+import threading
+from datetime import datetime, timedelta
+
+from backend.analytics.drift import DriftEngine
+
+START = datetime(2025, 1, 1)
+
+
+def _expenses(count):
+    categories = ["food", "shopping", "transport"]
+    return [{"user_id": "u1", "amount": 10.0 + i % 7, "category": categories[(i // 40) % 3],
+             "timestamp": (START + timedelta(hours=i)).isoformat()} for i in range(count)]
+
+
+def _ingest_while_reporting(txns):
+    engine = DriftEngine()
+    ingest = threading.Thread(target=lambda: [engine.observe(t) for t in txns])
+    ingest.start()
+    day = 0
+    while ingest.is_alive():
+        day = day % 160 + 1
+        engine.report("u1", as_of=START + timedelta(days=day))
+    ingest.join()
+    return engine
+
+
+def test_reports_during_ingest_match_a_rebuild():
+    txns = _expenses(4000)
+    rebuilt = DriftEngine()
+    rebuilt.load_user("u1", txns)
+    as_of = START + timedelta(days=200)
+    expected = rebuilt.report("u1", as_of)
+
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)  # Interleave the threads as finely as possible
+    try:
+        for _ in range(5):
+            assert _ingest_while_reporting(txns).report("u1", as_of) == expected
+    finally:
+        sys.setswitchinterval(interval)
@@ -0,0 +1,72 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from backend.rag.embedding_batcher import EmbeddingBatcher, _Request
+from backend.rag.hybrid_retriever import HybridRetriever
+from backend.rag.vector_store import VectorStore
+
+
+def _fake_encode(texts):
+    return np.array([[float(len(t)), 1.0] for t in texts], dtype=np.float32)
+
+
+def test_concurrent_requests_share_batches_and_get_their_own_rows():
+    batcher = EmbeddingBatcher(_fake_encode, max_batch=64, max_wait_ms=20)
+    texts = [f"q{'x' * i}" for i in range(32)]
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        results = list(pool.map(lambda t: batcher.encode([t]), texts))
+    batcher.close()
+
+    for text, vectors in zip(texts, results):
+        assert vectors.tolist() == [[float(len(text)), 1.0]]
+    assert batcher.stats()["batches"] < len(texts)
+
+
+def test_requests_behind_the_sentinel_fail_instead_of_hanging():
+    batcher = EmbeddingBatcher(_fake_encode, max_batch=8, max_wait_ms=1)
+    assert batcher.encode(["warm"]).shape == (1, 2)
+    thread = batcher._thread
+
+    straggler = _Request(["late"])
+    batcher._queue.put(None)
+    batcher._queue.put(straggler)
+    thread.join(timeout=5)
+    with pytest.raises(RuntimeError):
+        straggler.future.result(timeout=1)
+
+    batcher.close()
+    with pytest.raises(RuntimeError):
+        batcher.submit(["after close"])
+
+
+class _ExactIndex:
+    """Inner-product search over a small matrix (stands in for a FAISS flat index)."""
+
+    def __init__(self, vectors):
+        self.vectors = vectors
+
+    def search(self, queries, k):
+        scores = queries @ self.vectors.T
+        order = np.argsort(-scores, axis=1)[:, :k]
+        return np.take_along_axis(scores, order, axis=1), order
+
+
+def test_async_queries_share_batches_beyond_the_retrieval_pool():
+    store = VectorStore(batch_size=64, batch_wait_ms=50)
+    store.batcher.encode_fn = _fake_encode
+    store._documents = [{"text": f"doc {i}"} for i in range(3)]
+    store._index = _ExactIndex(_fake_encode([d["text"] for d in store._documents]))
+    retriever = HybridRetriever(store, max_workers=1)
+
+    async def scenario():
+        return await asyncio.gather(*(retriever.aretrieve(f"query {'x' * i}", top_k=2) for i in range(16)))
+
+    results = asyncio.run(scenario())
+    retriever.close()
+    store.close()
+    assert all(r["results"] for r in results)
+    # One pool thread would cap a blocking caller at batches of one
+    assert store.batcher.stats()["batches"] <= 2
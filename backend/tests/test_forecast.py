@@ -0,0 +1,46 @@
+from datetime import datetime, timedelta
+
+from backend.analytics.forecast import CashFlowForecaster
+from backend.models.user import UserProfile
+from backend.storage.transaction_store import TransactionStore
+
+NOW = datetime(2025, 3, 1, 12, 0, 0)
+
+
+def _store():
+    return TransactionStore([
+        {"id": f"t{i}", "amount": 500.0 + i, "merchant": "Cafe", "category": "food",
+         "timestamp": (NOW - timedelta(days=i)).isoformat()}
+        for i in range(30)
+    ])
+
+
+def test_cache_hits_only_for_identical_inputs():
+    forecaster = CashFlowForecaster(paths=50)
+    store, profile = _store(), UserProfile()
+    first = forecaster.forecast(store, profile, as_of=NOW)
+    assert forecaster.forecast(store, profile, as_of=NOW) is first
+
+    assert forecaster.forecast(store, profile, as_of=NOW + timedelta(days=1))["as_of"] != first["as_of"]
+
+    profile.monthly_income += 1000
+    assert forecaster.forecast(store, profile, as_of=NOW) is not first
+
+    profile.budgets[0].limit += 5000
+    tighter = forecaster.forecast(store, profile, as_of=NOW)
+    assert tighter["budget_scenario"] != first["budget_scenario"]
+
+    series = [{"merchant": "Rent", "period": "monthly", "period_days": 30, "average_amount": 100.0,
+               "is_credit": False, "expected_next": (NOW + timedelta(days=3)).isoformat()}]
+    with_rent = forecaster.forecast(store, profile, series, as_of=NOW)
+    series[0]["average_amount"] = 900.0
+    assert forecaster.forecast(store, profile, series, as_of=NOW) is not with_rent
+
+
+def test_stale_versions_are_dropped_from_the_store_cache():
+    forecaster = CashFlowForecaster(paths=50)
+    store, profile = _store(), UserProfile()
+    forecaster.forecast(store, profile, as_of=NOW)
+    store.append({"id": "new", "amount": 10.0, "timestamp": NOW.isoformat()})
+    forecaster.forecast(store, profile, as_of=NOW)
+    assert len(store._cache) == 1
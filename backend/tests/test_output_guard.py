@@ -0,0 +1,41 @@
+import random
+
+from backend.tools.output_guard import REDACTION, OutputGuard
+
+ANSWER = "This fund offers Guaranteed Returns with no risk, unlike a ponzi scheme."
+REDACTED = f"This fund offers {REDACTION} with {REDACTION}, unlike a {REDACTION} scheme."
+
+
+def _chunks(text, seed):
+    rng, out, i = random.Random(seed), [], 0
+    while i < len(text):
+        size = rng.randint(1, 6)
+        out.append(text[i:i + size])
+        i += size
+    return out
+
+
+def test_phrases_split_across_chunks_are_redacted_before_release():
+    guard = OutputGuard()
+    for seed in range(20):
+        session = guard.session("redact")
+        released = [session.feed(chunk) for chunk in _chunks(ANSWER, seed)] + [session.finish()]
+        assert "".join(released) == REDACTED
+        for i in range(len(released)):
+            sent = "".join(released[:i + 1]).lower()
+            assert "guaranteed returns" not in sent and "ponzi" not in sent
+        assert len(session.violations) == 3
+
+
+def test_abort_releases_only_the_text_before_the_match():
+    session = OutputGuard().session("abort")
+    released = "".join(session.feed(chunk) for chunk in _chunks(ANSWER, 0)) + session.finish()
+    assert session.aborted
+    assert released == "This fund offers "
+
+
+def test_full_text_check_reports_each_phrase_once():
+    assert [v["message"] for v in OutputGuard().check("ponzi, Ponzi and insider tips")] == [
+        "Recommendation contains unsafe term: 'insider'",
+        "Recommendation contains unsafe term: 'ponzi'",
+    ]
@@ -0,0 +1,80 @@
+import threading
+import time
+
+from backend.storage.partitions import JsonPartitionStorage, UserPartitionManager
+
+
+class _SlowStorage(JsonPartitionStorage):
+    """Blocks loads or saves of one user until released."""
+
+    def __init__(self, data_dir, slow_user, slow_op):
+        super().__init__(data_dir)
+        self.slow_user = slow_user
+        self.slow_op = slow_op
+        self.release = threading.Event()
+        self.entered = threading.Event()
+
+    def load(self, user_id):
+        if user_id == self.slow_user and self.slow_op == "load":
+            self.entered.set()
+            self.release.wait(5)
+        return super().load(user_id)
+
+    def save(self, partition):
+        if partition.user_id == self.slow_user and self.slow_op == "save":
+            self.entered.set()
+            self.release.wait(5)
+        super().save(partition)
+
+
+def _txn(i):
+    return {"id": f"t{i}", "amount": 100.0 + i, "merchant": "Cafe", "category": "food",
+            "timestamp": "2025-01-15T12:00:00"}
+
+
+def _timed_get(manager, user_id):
+    started = time.monotonic()
+    manager.get(user_id)
+    return time.monotonic() - started
+
+
+def test_cold_load_does_not_block_hot_users(tmp_path):
+    storage = _SlowStorage(str(tmp_path), slow_user="cold", slow_op="load")
+    manager = UserPartitionManager(storage)
+    manager.get("hot")
+    results = []
+    loader = threading.Thread(target=lambda: results.append(manager.get("cold")))
+    waiter = threading.Thread(target=lambda: results.append(manager.get("cold")))
+    loader.start()
+    assert storage.entered.wait(5)
+    waiter.start()
+
+    assert _timed_get(manager, "hot") < 0.5
+    storage.release.set()
+    loader.join(5)
+    waiter.join(5)
+    assert len(results) == 2 and results[0] is results[1]
+    assert manager.stats()["loads"] == 2
+
+
+def test_write_back_happens_outside_the_lock_and_reload_waits_for_it(tmp_path):
+    storage = _SlowStorage(str(tmp_path), slow_user="a", slow_op="save")
+    manager = UserPartitionManager(storage, max_users=1)
+    manager.ingest("a", _txn(1))
+
+    # Loading "b" evicts "a", whose save blocks
+    evictor = threading.Thread(target=manager.get, args=("b",))
+    evictor.start()
+    assert storage.entered.wait(5)
+    assert manager.resident_users() == ["b"]
+    assert manager.stats()["resident_users"] == 1  # The manager lock is free during the save
+
+    reload = []
+    reloader = threading.Thread(target=lambda: reload.append(manager.get("a")))
+    reloader.start()
+    time.sleep(0.1)
+    assert not reload  # Still waiting for the write-back
+    storage.release.set()
+    evictor.join(5)
+    reloader.join(5)
+    assert [t["id"] for t in reload[0].store.all()] == ["t1"]
@@ -0,0 +1,106 @@
+from backend.analytics.risk_graph import CounterpartyRiskGraph
+from backend.tools.compliance_rules import ComplianceEngine
+
+THRESHOLD = 0.3  # RISK_001 default graph_threshold
+MERCHANTS = [("Starbucks", "food"), ("Uber", "transport"), ("Swiggy", "food"), ("Amazon", "shopping")]
+
+
+def _txn(user, merchant, category, amount=250.0, flagged=False):
+    return {"user_id": user, "merchant": merchant, "category": category, "amount": amount, "is_flagged": flagged}
+
+
+def _ordinary_graph():
+    graph = CounterpartyRiskGraph(high_risk_terms=["casino", "crypto"])
+    for u in range(20):
+        for merchant, category in MERCHANTS:
+            for _ in range(5):
+                graph.observe(_txn(f"u{u}", merchant, category))
+    return graph
+
+
+def test_one_flagged_neighbor_keeps_unrelated_merchants_below_threshold():
+    graph = _ordinary_graph()
+    graph.observe(_txn("u0", "Starbucks", "food", flagged=True))
+    graph.propagate()
+
+    for merchant, category in MERCHANTS:
+        assert graph.counterparty_risk({"merchant": merchant, "category": category}) < THRESHOLD
+
+    engine = ComplianceEngine()
+    engine.risk_graph = graph
+    for merchant, category in MERCHANTS[:2]:
+        result = engine.validate_transaction({**_txn("u1", merchant, category), "timestamp": "2025-01-15T12:00:00"})
+        assert "RISK_001" not in [v["rule_id"] for v in result["violations"]]
+
+
+def test_scores_are_absolute_and_bounded():
+    graph = _ordinary_graph()
+    graph.propagate()
+    # Nothing is risky, so nothing is scaled up to 1.0
+    assert max(r["risk"] for r in graph.top_risks(kind="merchant")) == 0.0
+
+    # A counterparty whose whole volume is flagged stands out on its own
+    for _ in range(10):
+        graph.observe(_txn("mule", "Shady Transfers", "transfer", flagged=True))
+    graph.propagate()
+    risk = graph.counterparty_risk({"merchant": "Shady Transfers", "category": "transfer"})
+    assert THRESHOLD <= risk <= 1.0
+
+
+def test_review_recomputes_verdicts_after_propagation():
+    graph = _ordinary_graph()
+    graph.propagate()
+    engine = ComplianceEngine()
+    engine.risk_graph = graph
+
+    txn = {**_txn("mule", "Shady Transfers", "transfer"), "id": "t1", "timestamp": "2025-01-15T12:00:00"}
+    txn["compliance"] = engine.verdict(txn)
+    assert txn["compliance"]["compliant"]
+
+    for _ in range(10):
+        graph.observe(_txn("mule", "Shady Transfers", "transfer", flagged=True))
+    graph.propagate()
+
+    assert not engine.is_current(txn["compliance"])
+    review = engine.review([txn])
+    assert review["violations_by_rule"].get("RISK_001") == 1
+    assert txn["compliance"]["graph_version"] == graph.version
+
+
+def test_version_only_moves_when_a_node_crosses_the_threshold():
+    graph = _ordinary_graph()
+    graph.propagate()
+    engine = ComplianceEngine()
+    engine.risk_graph = graph
+    txn = {**_txn("u1", "Uber", "transport"), "id": "t1", "timestamp": "2025-01-15T12:00:00"}
+    txn["compliance"] = engine.verdict(txn)
+
+    # More ordinary volume changes scores but no RISK_001 outcome
+    for merchant, category in MERCHANTS:
+        graph.observe(_txn("u21", merchant, category))
+    assert graph.propagate()
+    assert engine.is_current(txn["compliance"])
+
+    for _ in range(10):
+        graph.observe(_txn("mule", "Shady Transfers", "transfer", flagged=True))
+    graph.propagate()
+    assert not engine.is_current(txn["compliance"])
+
+
+def test_least_recently_active_users_are_pruned_above_max_edges():
+    def shop(u, m):
+        return f"Shop {chr(65 + u)}{chr(65 + m)}"
+
+    graph = CounterpartyRiskGraph(max_edges=40)
+    for u in range(20):
+        graph.load_user(f"u{u}", [_txn(f"u{u}", shop(u, m), "shopping") for m in range(4)])
+    stats = graph.stats()
+    assert stats["edges"] <= 40 and stats["pruned_users"] > 0
+
+    # Recent users survive; pruned ones are re-added on their next load
+    graph.propagate(force=True)
+    index = graph._snapshot[0]
+    assert "merchant:SHOP TD" in index and "merchant:SHOP AA" not in index
+    graph.load_user("u0", [_txn("u0", shop(0, 0), "shopping")])
+    assert graph._volume[graph._nodes["merchant:SHOP AA"]] == 250.0
+    assert graph._volume[graph._nodes["user:u19"]] == 1000.0
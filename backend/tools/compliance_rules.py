@@ -3,8 +3,19 @@ FinVerse AI — Compliance Rules Engine
 Validates transactions and recommendations against financial regulations.
 """
 
-from typing import Optional
-from datetime import datetime
+import hashlib
+import json
+import logging
+import re
+from typing import Callable, Optional
+import numpy as np
+
+from backend.storage.ingest import IngestStage
+from backend.streaming.columnar import NAT, batch_length, records_to_columns
+from backend.tools.compliance_windows import WindowedRuleSet, compile_windowed_rules
+from backend.tools.output_guard import OutputGuard, load_terms
+
+logger = logging.getLogger(__name__)
 
 
 # Compliance rule definitions
@@ -24,6 +35,8 @@ COMPLIANCE_RULES = [
         "threshold": 900000,
         "type": "structuring_detection",
         "severity": "high",
+        "window_seconds": 7 * 86400,
+        "min_count": 2,
     },
     {
         "id": "FRAUD_001",
@@ -31,6 +44,8 @@ COMPLIANCE_RULES = [
         "description": "Flag transactions between 1 AM - 5 AM local time",
         "type": "time_anomaly",
         "severity": "medium",
+        "start_hour": 1,
+        "end_hour": 5,
     },
     {
         "id": "FRAUD_002",
@@ -39,6 +54,7 @@ COMPLIANCE_RULES = [
         "threshold": 10,
         "type": "frequency_anomaly",
         "severity": "medium",
+        "window_seconds": 3600,
     },
     {
         "id": "BUDGET_001",
@@ -55,68 +71,356 @@ COMPLIANCE_RULES = [
         "type": "merchant_risk",
         "severity": "medium",
         "high_risk_categories": ["gambling", "crypto", "forex"],
+        "high_risk_terms": ["gambling", "casino", "crypto", "forex", "betting"],
+        "graph_threshold": 0.3,  # Counterparty network risk (when a risk graph is attached)
     },
 ]
 
+SEVERITY_WEIGHTS = {"high": 40, "medium": 20, "low": 10}
+
+_NAT = NAT  # Missing timestamp after parsing
+
+
+class CompiledRule:
+    """
+    A rule definition turned into a vectorized predicate.
+
+    - `predicate(columns, context)` returns a boolean mask over the batch
+    - `describe(columns, i, context)` returns (message, action) for a flagged row
+    """
+
+    def __init__(self, rule: dict, predicate: Callable, describe: Callable):
+        self.rule = rule
+        self.id = rule["id"]
+        self.severity = rule["severity"]
+        self.weight = SEVERITY_WEIGHTS.get(rule["severity"], 10)
+        self.predicate = predicate
+        self.describe = describe
+
+    def violation(self, columns: dict, i: int, context: Optional[dict] = None) -> dict:
+        message, action = self.describe(columns, i, context)
+        return {"rule_id": self.id, "severity": self.severity, "message": message, "action": action}
+
+
+def _compile_amount(rule: dict) -> CompiledRule:
+    threshold = float(rule["threshold"])
+
+    def predicate(columns, context):
+        return columns["amount"] >= threshold
+
+    def describe(columns, i, context):
+        return (f"Transaction of ₹{columns['amount'][i]:,.0f} exceeds AML reporting threshold (₹{threshold:,.0f})",
+                "Report to Financial Intelligence Unit")
+
+    return CompiledRule(rule, predicate, describe)
+
+
+def _compile_time(rule: dict) -> CompiledRule:
+    start, end = int(rule.get("start_hour", 1)), int(rule.get("end_hour", 5))
+
+    def predicate(columns, context):
+        ts = columns["timestamp"]
+        hours = (ts // 3600) % 24
+        return (hours >= start) & (hours <= end) & (ts != _NAT)
+
+    def describe(columns, i, context):
+        hour = int(columns["timestamp"][i] // 3600 % 24)
+        return (f"Transaction at unusual hour ({hour}:00). Potential unauthorized access.",
+                "Verify with account holder")
+
+    return CompiledRule(rule, predicate, describe)
+
+
+def _matches(values: np.ndarray, pattern: re.Pattern) -> np.ndarray:
+    # A batch has few distinct merchants/categories: search each once, then map back
+    values = values.tolist()
+    hits = {v: pattern.search(str(v).lower()) is not None for v in set(values)}
+    return np.fromiter(map(hits.__getitem__, values), dtype=bool, count=len(values))
+
+
+def _compile_merchant_risk(rule: dict) -> CompiledRule:
+    terms = rule.get("high_risk_terms") or rule.get("high_risk_categories", [])
+    pattern = re.compile("|".join(re.escape(t.lower()) for t in terms)) if terms else None
+    graph_threshold = float(rule.get("graph_threshold", 1.0))
+
+    def keyword_hits(columns):
+        if pattern is None:
+            return np.zeros(batch_length(columns), dtype=bool)
+        return _matches(columns["merchant"], pattern) | _matches(columns["category"], pattern)
+
+    def network_risk(columns, context):
+        # Precomputed counterparty risk: context["risk_graph"] is a CounterpartyRiskGraph
+        graph = (context or {}).get("risk_graph")
+        if graph is None:
+            return np.zeros(batch_length(columns))
+        return graph.risk_for(columns["merchant"], columns["category"])
+
+    def predicate(columns, context):
+        if batch_length(columns) == 0:
+            return np.zeros(0, dtype=bool)
+        return keyword_hits(columns) | (network_risk(columns, context) >= graph_threshold)
+
+    def describe(columns, i, context):
+        merchant = str(columns["merchant"][i]).lower()
+        row = {k: columns[k][i:i + 1] for k in ("merchant", "category", "amount")}
+        if keyword_hits(row)[0]:
+            return (f"Transaction with high-risk merchant/category: {merchant}",
+                    "Enhanced due diligence required")
+        return (f"Counterparty {merchant} has network risk {network_risk(row, context)[0]:.2f} "
+                f"from links to flagged or high-risk counterparties",
+                "Enhanced due diligence required")
+
+    return CompiledRule(rule, predicate, describe)
+
+
+def _compile_budget(rule: dict) -> CompiledRule:
+    ratio = float(rule["threshold"])
+
+    def predicate(columns, context):
+        # Needs the user's budgets: context["budgets"] = {category: (limit, spent)}
+        budgets = (context or {}).get("budgets")
+        n = batch_length(columns)
+        if not budgets or n == 0:
+            return np.zeros(n, dtype=bool)
+        over = [cat for cat, (limit, spent) in budgets.items() if limit > 0 and spent >= ratio * limit]
+        return ~columns["is_credit"] & np.isin(columns["category"].astype(str), over)
+
+    def describe(columns, i, context):
+        category = str(columns["category"][i])
+        limit, spent = context["budgets"][category]
+        return (f"{category} spending at {spent / limit * 100:.0f}% of its ₹{limit:,.0f} budget",
+                "Review category budget before further spending")
+
+    return CompiledRule(rule, predicate, describe)
+
+
+# Rule type → compiler. Types not listed here need transaction history and are
+# evaluated by the sliding-window detectors in compliance_windows.
+RULE_COMPILERS = {
+    "transaction_amount": _compile_amount,
+    "time_anomaly": _compile_time,
+    "merchant_risk": _compile_merchant_risk,
+    "budget_check": _compile_budget,
+}
+
+
+def rule_overrides(settings) -> dict:
+    """Per-rule parameter overrides taken from application settings."""
+    if settings is None:
+        return {}
+    start, end = settings.COMPLIANCE_UNUSUAL_HOURS
+    return {
+        "AML_001": {"threshold": settings.COMPLIANCE_LARGE_TXN_THRESHOLD},
+        "AML_002": {
+            "threshold": settings.COMPLIANCE_STRUCTURING_THRESHOLD,
+            "ceiling": settings.COMPLIANCE_LARGE_TXN_THRESHOLD,
+            "window_seconds": settings.COMPLIANCE_STRUCTURING_WINDOW_DAYS * 86400,
+            "min_count": settings.COMPLIANCE_STRUCTURING_MIN_COUNT,
+        },
+        "FRAUD_001": {"start_hour": start, "end_hour": end},
+        "FRAUD_002": {"threshold": settings.COMPLIANCE_MAX_TXN_PER_HOUR},
+        "BUDGET_001": {"threshold": settings.COMPLIANCE_BUDGET_WARN_RATIO},
+        "RISK_001": {
+            "high_risk_terms": settings.COMPLIANCE_HIGH_RISK_TERMS,
+            "graph_threshold": settings.COMPLIANCE_GRAPH_RISK_THRESHOLD,
+        },
+    }
+
+
+def compile_rules(rules: list[dict]) -> list[CompiledRule]:
+    """Compile the stateless rule definitions into vectorized predicates."""
+    return [RULE_COMPILERS[r["type"]](r) for r in rules if r["type"] in RULE_COMPILERS]
+
 
 class ComplianceEngine:
-    """Rule-based compliance validator for financial transactions."""
+    """
+    Rule-based compliance validator for financial transactions.
+
+    Rule definitions are compiled once into vectorized predicates; `validate_batch`
+    screens a whole columnar batch in one pass and `validate_transaction` is the
+    single-row case of the same code path. History-dependent rules (structuring,
+    velocity) keep per-account sliding windows fed by `observe()` at ingest, and
+    are backfilled vectorized when a batch is validated.
+    """
 
-    def __init__(self):
-        self.rules = COMPLIANCE_RULES
+    def __init__(self, settings=None, rules: Optional[list[dict]] = None,
+                 untracked_sources: Optional[list[str]] = None):
+        overrides = rule_overrides(settings)
+        self.rules = [{**r, **overrides.get(r["id"], {})} for r in (rules or COMPLIANCE_RULES)]
+        # Verdicts stored on transactions are only valid for the rule set that produced them
+        self.version = hashlib.sha1(json.dumps(self.rules, sort_keys=True, default=str).encode()).hexdigest()[:12]
+        self.compiled = compile_rules(self.rules)
+        self.output_guard = OutputGuard(
+            load_terms(settings.COMPLIANCE_UNSAFE_TERMS, settings.COMPLIANCE_UNSAFE_TERMS_FILE) if settings else None,
+            policy=settings.COMPLIANCE_OUTPUT_POLICY if settings else "redact",
+        )
+        self.windowed = WindowedRuleSet(compile_windowed_rules(self.rules))
+        # Ingest sources (assigned server-side, see UserPartitionManager.ingest) that are not account activity
+        if untracked_sources is None:
+            untracked_sources = settings.COMPLIANCE_UNTRACKED_SOURCES if settings else ()
+        self.untracked_sources = frozenset(untracked_sources)
+        self.risk_graph = None  # Optional CounterpartyRiskGraph consulted by RISK_001
+        self.rule_ids = [r.id for r in self.compiled] + [r.id for r in self.windowed.rules]
+        self._weights = np.array(
+            [r.weight for r in self.compiled]
+            + [SEVERITY_WEIGHTS.get(r.severity, 10) for r in self.windowed.rules],
+            dtype=np.float64,
+        )
 
-    def validate_transaction(self, transaction: dict) -> dict:
+    def validate_batch(self, columns: dict, context: Optional[dict] = None) -> dict:
         """
-        Validate a transaction against all compliance rules.
-        Returns violations and risk assessment.
+        Evaluate every compiled rule over a columnar batch.
+
+        Returns:
+            violations: uint32 bitmap per row (bit i set = `rule_ids[i]` violated)
+            risk_scores: float per row (severity weights summed, capped at 100)
+            rule_ids, rules_checked
         """
-        violations = []
-        amount = transaction.get("amount", 0)
-
-        # AML_001: Large transaction check
-        if amount >= 1000000:
-            violations.append({
-                "rule_id": "AML_001",
-                "severity": "high",
-                "message": f"Transaction of ₹{amount:,.0f} exceeds AML reporting threshold (₹10,00,000)",
-                "action": "Report to Financial Intelligence Unit",
-            })
+        bitmap = self._stateless_bitmap(columns, context)
 
-        # FRAUD_001: Unusual time check
-        timestamp = transaction.get("timestamp")
-        if timestamp:
-            if isinstance(timestamp, str):
-                timestamp = datetime.fromisoformat(timestamp)
-            hour = timestamp.hour
-            if 1 <= hour <= 5:
-                violations.append({
-                    "rule_id": "FRAUD_001",
-                    "severity": "medium",
-                    "message": f"Transaction at unusual hour ({hour}:00). Potential unauthorized access.",
-                    "action": "Verify with account holder",
-                })
-
-        # RISK_001: High-risk merchant check
-        category = transaction.get("category", "").lower()
-        merchant = transaction.get("merchant", "").lower()
-        high_risk_terms = ["gambling", "casino", "crypto", "forex", "betting"]
-        if any(term in category or term in merchant for term in high_risk_terms):
-            violations.append({
-                "rule_id": "RISK_001",
-                "severity": "medium",
-                "message": f"Transaction with high-risk merchant/category: {merchant}",
-                "action": "Enhanced due diligence required",
-            })
+        # The batch doubles as history for the windowed rules
+        eligible = None
+        if self.untracked_sources and "source" in columns:
+            eligible = ~np.isin(columns["source"].astype(str), list(self.untracked_sources))
+        window_counts = {}
+        for bit, (rule_id, (mask, counts)) in enumerate(self.windowed.backfill(columns, eligible).items(),
+                                                        len(self.compiled)):
+            bitmap |= mask.astype(np.uint32) << np.uint32(bit)
+            window_counts[rule_id] = counts
+
+        return {
+            "violations": bitmap,
+            "risk_scores": self._risk_scores(bitmap),
+            "rule_ids": self.rule_ids,
+            "rules_checked": len(self.rule_ids),
+            "window_counts": window_counts,
+        }
+
+    def violations_for(self, columns: dict, i: int, bitmap: int, context: Optional[dict] = None,
+                       window_counts: Optional[dict] = None) -> list[dict]:
+        """Expand row `i`'s violation bitmap into violation records."""
+        context = self._with_graph(context)
+        violations = [rule.violation(columns, i, context)
+                      for bit, rule in enumerate(self.compiled) if bitmap >> bit & 1]
+        for bit, rule in enumerate(self.windowed.rules, len(self.compiled)):
+            if bitmap >> bit & 1:
+                violations.append(rule.violation(int(window_counts[rule.id][i])))
+        return violations
+
+    def observe(self, transaction: dict) -> list[dict]:
+        """Feed a new transaction to the windowed rules; returns the violations it triggers."""
+        if not self.tracked(transaction):
+            return []
+        return self.windowed.observe(transaction)
+
+    def tracked(self, transaction: dict) -> bool:
+        """Whether a transaction counts toward the windowed rules (demo traffic does not)."""
+        return transaction.get("source") not in self.untracked_sources
+
+    def load_user(self, user_id: str, transactions: list[dict]):
+        """Seed the windowed rules with a user's history."""
+        self.windowed.load_user(user_id, [t for t in transactions if self.tracked(t)])
+
+    def verdict(self, transaction: dict) -> dict:
+        """
+        Verdict for a newly ingested transaction: stateless rules plus the windowed
+        rules' streaming state. Budget checks depend on the profile at query time
+        and are left to `budget_alerts`.
+        """
+        columns = records_to_columns([transaction])
+        bitmap = int(self._stateless_bitmap(columns, None)[0])
+        return self._verdict(self.violations_for(columns, 0, bitmap) + self.observe(transaction))
+
+    @property
+    def graph_version(self) -> Optional[int]:
+        """Propagation version of the attached risk graph (RISK_001 depends on it)."""
+        return self.risk_graph.version if self.risk_graph is not None else None
+
+    def is_current(self, verdict: Optional[dict]) -> bool:
+        """Whether a stored verdict was produced by this rule set and the latest graph propagation."""
+        return bool(verdict) and verdict.get("ruleset_version") == self.version \
+            and verdict.get("graph_version") == self.graph_version
 
-        # Calculate overall risk
-        risk_score = self._calculate_risk_score(violations)
+    def review(self, transactions: list[dict], limit: int = 10,
+               store_verdicts: Optional[Callable[[list[tuple[dict, dict]]], None]] = None) -> dict:
+        """
+        Aggregate the stored verdicts of a transaction history. Verdicts missing, or
+        produced by another rule-set version or before the last risk-graph
+        propagation, are recomputed in one batch pass first.
+
+        Recomputed verdicts are handed to `store_verdicts` as (transaction, verdict)
+        pairs — for shared stores, `UserPartition.store_verdicts` writes them back under
+        the partition lock. Without it they are set on the given dicts directly.
+        """
+        verdicts = [t.get("compliance") for t in transactions]
+        stale = [i for i, verdict in enumerate(verdicts) if not self.is_current(verdict)]
+        if stale:
+            columns = records_to_columns(transactions)
+            result = self.validate_batch(columns)
+            for i in stale:
+                violations = self.violations_for(columns, i, int(result["violations"][i]),
+                                                 window_counts=result["window_counts"])
+                verdicts[i] = self._verdict(violations)
+            refreshed = [(transactions[i], verdicts[i]) for i in stale]
+            if store_verdicts is not None:
+                store_verdicts(refreshed)
+            else:
+                for txn, verdict in refreshed:
+                    txn["compliance"] = verdict
+            logger.info(f"🔁 Recomputed {len(stale)} compliance verdicts (rule set {self.version})")
+
+        flagged = [(t, verdict) for t, verdict in zip(transactions, verdicts) if not verdict["compliant"]]
+        by_rule: dict[str, int] = {}
+        for _, verdict in flagged:
+            for v in verdict["violations"]:
+                by_rule[v["rule_id"]] = by_rule.get(v["rule_id"], 0) + 1
+        return {
+            "ruleset_version": self.version,
+            "graph_version": self.graph_version,
+            "transactions_checked": len(transactions),
+            "non_compliant": len(flagged),
+            "violations_by_rule": by_rule,
+            "max_risk_score": max((verdict["risk_score"] for _, verdict in flagged), default=0.0),
+            "recent_flagged": [
+                {
+                    "id": t.get("id"),
+                    "merchant": t.get("merchant"),
+                    "amount": t.get("amount"),
+                    "timestamp": t.get("timestamp"),
+                    **verdict,
+                }
+                for t, verdict in flagged[-limit:]
+            ],
+            "rules_checked": len(self.rule_ids),
+        }
+
+    def budget_alerts(self, budgets: dict) -> list[dict]:
+        """Budget-rule warnings for categories near their limit ({category: (limit, spent)})."""
+        # One pseudo-row per budgeted category, through the same compiled budget rules
+        columns = {"category": np.array(list(budgets), dtype=object),
+                   "amount": np.zeros(len(budgets)),
+                   "is_credit": np.zeros(len(budgets), dtype=bool)}
+        context = {"budgets": budgets}
+        return [rule.violation(columns, i, context)
+                for rule in self.compiled if rule.rule["type"] == "budget_check"
+                for i in np.flatnonzero(rule.predicate(columns, context))]
+
+    def validate_transaction(self, transaction: dict, context: Optional[dict] = None) -> dict:
+        """
+        Validate a transaction against all compliance rules.
+        Returns violations and risk assessment.
+        """
+        columns = records_to_columns([transaction])
+        result = self.validate_batch(columns, context)
+        violations = self.violations_for(columns, 0, int(result["violations"][0]), context, result["window_counts"])
+        risk_score = float(result["risk_scores"][0])
 
         return {
             "compliant": len(violations) == 0,
             "violations": violations,
             "risk_score": risk_score,
-            "risk_level": "high" if risk_score > 70 else "medium" if risk_score > 30 else "low",
-            "rules_checked": len(self.rules),
+            "risk_level": risk_level(risk_score),
+            "rules_checked": result["rules_checked"],
         }
 
     def validate_recommendation(self, recommendation: str) -> dict:
@@ -124,33 +428,80 @@ class ComplianceEngine:
         Validate that an AI recommendation doesn't violate compliance rules.
         Ensures we never recommend illegal or unsafe financial actions.
         """
-        unsafe_terms = [
-            "guaranteed returns", "no risk", "insider", "tax evasion",
-            "hide income", "unregulated", "ponzi", "pyramid",
-        ]
-
-        violations = []
-        rec_lower = recommendation.lower()
-
-        for term in unsafe_terms:
-            if term in rec_lower:
-                violations.append({
-                    "rule_id": "COMPLIANCE_OUTPUT",
-                    "severity": "high",
-                    "message": f"Recommendation contains unsafe term: '{term}'",
-                    "action": "Rewrite recommendation to remove unsafe language",
-                })
+        violations = self.output_guard.check(recommendation)
 
         return {
             "safe": len(violations) == 0,
             "violations": violations,
         }
 
-    def _calculate_risk_score(self, violations: list) -> float:
-        """Calculate risk score based on violations."""
-        if not violations:
-            return 0.0
+    def _with_graph(self, context: Optional[dict]) -> Optional[dict]:
+        if self.risk_graph is None:
+            return context
+        return {**(context or {}), "risk_graph": self.risk_graph}
+
+    def _stateless_bitmap(self, columns: dict, context: Optional[dict]) -> np.ndarray:
+        context = self._with_graph(context)
+        bitmap = np.zeros(batch_length(columns), dtype=np.uint32)
+        for bit, rule in enumerate(self.compiled):
+            bitmap |= rule.predicate(columns, context).astype(np.uint32) << np.uint32(bit)
+        return bitmap
+
+    def _verdict(self, violations: list[dict]) -> dict:
+        risk_score = min(100.0, float(sum(SEVERITY_WEIGHTS.get(v["severity"], 10) for v in violations)))
+        return {
+            "ruleset_version": self.version,
+            "graph_version": self.graph_version,
+            "compliant": len(violations) == 0,
+            "violations": violations,
+            "risk_score": risk_score,
+            "risk_level": risk_level(risk_score),
+        }
+
+    def _risk_scores(self, bitmap: np.ndarray) -> np.ndarray:
+        """Risk score per row based on the severities of its violations."""
+        bits = (bitmap[:, None] >> np.arange(len(self.rule_ids), dtype=np.uint32)) & 1
+        return np.minimum(100.0, bits @ self._weights)
+
+
+def risk_level(risk_score: float) -> str:
+    return "high" if risk_score > 70 else "medium" if risk_score > 30 else "low"
+
+
+class ComplianceMonitor(IngestStage):
+    """
+    Ingest stage that computes each transaction's compliance verdict once and stores
+    it on the transaction (tagged with the rule-set version), feeding the windowed
+    rules so structuring and velocity violations fire as the stream arrives.
+    Every verdict is also appended to the audit log, if one is configured.
+    """
+
+    name = "compliance"
+
+    def __init__(self, engine: ComplianceEngine, audit_log=None):
+        self.engine = engine
+        self.audit_log = audit_log
+
+    def process(self, txn: dict) -> Optional[dict]:
+        verdict = self.engine.verdict(txn)
+        txn["compliance"] = verdict
+        if self.audit_log is not None:
+            self.audit_log.append({
+                "kind": "verdict",
+                "txn_id": txn.get("id"),
+                "user_id": txn.get("user_id"),
+                "ruleset_version": verdict["ruleset_version"],
+                "rule_ids": [v["rule_id"] for v in verdict["violations"]],
+                "risk_score": verdict["risk_score"],
+            })
+        if verdict["violations"]:
+            txn["tags"] = list(txn.get("tags", [])) + [f"compliance:{v['rule_id']}" for v in verdict["violations"]]
+            for v in verdict["violations"]:
+                logger.info(f"🚨 [{v['rule_id']}] {txn.get('user_id')}: {v['message']}")
+        return txn
+
+    def load_user(self, user_id: str, transactions: list[dict]):
+        self.engine.load_user(user_id, transactions)
 
-        severity_weights = {"high": 40, "medium": 20, "low": 10}
-        total = sum(severity_weights.get(v["severity"], 10) for v in violations)
-        return min(100.0, total)
+    def evict_user(self, user_id: str):
+        self.engine.windowed.evict_user(user_id)
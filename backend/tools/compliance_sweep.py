@@ -0,0 +1,293 @@
+"""
+FinVerse AI — Full-History Compliance Sweep
+Background job that evaluates every compliance rule over every user's complete
+transaction history in a process pool, producing a compact violations report and
+a per-user risk rollup that routes and agents read without recomputation.
+"""
+
+import json
+import logging
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime
+from typing import Optional
+
+import numpy as np
+
+from backend.streaming.columnar import records_to_columns
+from backend.tools.compliance_rules import ComplianceEngine, risk_level
+
+logger = logging.getLogger(__name__)
+
+STATE_FILE = "sweep_state.json"
+PARTIAL_FILE = "violations.partial.jsonl"
+REPORT_FILE = "violations.jsonl"
+ROLLUP_FILE = "risk_rollup.json"
+
+# One engine per worker process, built from the parent's effective rule set
+_worker_engine: Optional[ComplianceEngine] = None
+
+
+def _init_worker(rules: list[dict], untracked_sources: list[str]):
+    global _worker_engine
+    _worker_engine = ComplianceEngine(rules=rules, untracked_sources=untracked_sources)
+
+
+def _sweep_users(paths: list[tuple[str, str]]) -> list[dict]:
+    """Worker task: evaluate the full history of a chunk of users (user_id, partition file)."""
+    return [_sweep_user(_worker_engine, user_id, path) for user_id, path in paths]
+
+
+def _sweep_user(engine: ComplianceEngine, user_id: str, path: str) -> dict:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        return {"user_id": user_id, "error": str(e)}
+
+    # Regulatory rules only: budget warnings describe the present, not the history
+    transactions = data.get("transactions", [])
+    result = engine.validate_batch(records_to_columns(transactions)) if transactions else None
+
+    rollup = {"transactions": len(transactions), "non_compliant": 0, "violations_by_rule": {},
+              "max_risk_score": 0.0, "mean_risk_score": 0.0}
+    violations = []
+    if result is not None:
+        bitmap, scores = result["violations"], result["risk_scores"]
+        flagged = np.flatnonzero(bitmap)
+        rule_ids = result["rule_ids"]
+        for bit, rule_id in enumerate(rule_ids):
+            count = int(np.count_nonzero(bitmap >> np.uint32(bit) & 1))
+            if count:
+                rollup["violations_by_rule"][rule_id] = count
+        rollup.update(
+            non_compliant=int(len(flagged)),
+            max_risk_score=float(scores.max()),
+            mean_risk_score=round(float(scores.mean()), 2),
+        )
+        # Compact rows: [transaction id, timestamp, violated rule ids, risk score]
+        violations = [
+            [transactions[i].get("id"), transactions[i].get("timestamp"),
+             [rule_ids[b] for b in range(len(rule_ids)) if int(bitmap[i]) >> b & 1], float(scores[i])]
+            for i in flagged.tolist()
+        ]
+    rollup["risk_level"] = risk_level(rollup["max_risk_score"])
+    return {"user_id": user_id, "rollup": rollup, "violations": violations}
+
+
+class ComplianceSweep:
+    """
+    Resumable full-history sweep over all persisted user partitions.
+
+    - Users are split into chunks and evaluated in a process pool (vectorized per user)
+    - Each finished chunk is appended to a partial report, so an interrupted sweep
+      resumes with the users it had not reached yet (as long as the rule set is unchanged)
+    - A completed sweep atomically replaces `violations.jsonl` and `risk_rollup.json`
+      under `report_dir`; the rollup is also kept in memory for instant lookups
+    """
+
+    def __init__(self, partitions, engine: ComplianceEngine, report_dir: str,
+                 workers: int = 0, chunk_users: int = 16):
+        self.partitions = partitions
+        self.engine = engine
+        self.report_dir = report_dir
+        self.workers = workers or max((os.cpu_count() or 2) - 1, 1)
+        self.chunk_users = max(chunk_users, 1)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._cancel = threading.Event()
+        self._status = {"state": "idle"}
+        self._rollup: dict[str, dict] = self._read_json(ROLLUP_FILE, {}).get("users", {})
+
+    # ── Control ─────────────────────────────────────
+
+    def start(self, resume: bool = True) -> bool:
+        """Start a sweep in the background; returns False if one is already running."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return False
+            self._cancel.clear()
+            self._status = {"state": "running"}
+            self._thread = threading.Thread(target=self._run, args=(resume,), name="compliance-sweep", daemon=True)
+            self._thread.start()
+            return True
+
+    def cancel(self):
+        """Stop after the chunks in flight; progress so far is kept for resuming."""
+        self._cancel.set()
+
+    def has_unfinished(self) -> bool:
+        return os.path.exists(self._path(STATE_FILE))
+
+    def status(self) -> dict:
+        with self._lock:
+            return dict(self._status)
+
+    # ── Results ─────────────────────────────────────
+
+    def rollup(self, user_id: Optional[str] = None) -> Optional[dict]:
+        """Risk rollup of the last completed sweep (one user, or all of them)."""
+        return self._rollup if user_id is None else self._rollup.get(user_id)
+
+    def violations(self, user_id: str, limit: int = 100) -> list[dict]:
+        """A user's flagged transactions from the last completed sweep, newest last."""
+        path = self._path(REPORT_FILE)
+        if not os.path.exists(path):
+            return []
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                record = json.loads(line)
+                if record["user_id"] == user_id:
+                    rows = record["violations"][-limit:] if limit > 0 else []
+                    return [dict(zip(("id", "timestamp", "rule_ids", "risk_score"), row)) for row in rows]
+        return []
+
+    # ── Job ─────────────────────────────────────────
+
+    def _run(self, resume: bool):
+        os.makedirs(self.report_dir, exist_ok=True)
+        self.partitions.flush()  # Resident changes must be on disk before workers read them
+        users = self.partitions.storage.list_users()
+
+        state = self._read_json(STATE_FILE, None) if resume else None
+        if state is None or state.get("ruleset_version") != self.engine.version:
+            state = {
+                "sweep_id": uuid.uuid4().hex[:12],
+                "ruleset_version": self.engine.version,
+                "started_at": datetime.utcnow().isoformat(),
+            }
+            self._write_json(STATE_FILE, state)
+            open(self._path(PARTIAL_FILE), "w").close()
+        done = self._completed_users()
+        pending = [u for u in users if u not in done]
+
+        self._set_status(state="running", sweep_id=state["sweep_id"], ruleset_version=state["ruleset_version"],
+                         started_at=state["started_at"], finished_at=None, users_total=len(done) + len(pending),
+                         users_done=len(done),
+                         transactions_done=sum(r["transactions"] for r in done.values() if r),
+                         non_compliant=sum(r["non_compliant"] for r in done.values() if r),
+                         errors=sum(1 for r in done.values() if r is None))
+        logger.info(f"🧹 Compliance sweep {state['sweep_id']}: {len(pending)} users to check "
+                    f"({len(done)} already done), {self.workers} workers")
+
+        chunks = [
+            [(u, self.partitions.storage.path(u)) for u in pending[i:i + self.chunk_users]]
+            for i in range(0, len(pending), self.chunk_users)
+        ]
+        started = time.monotonic()
+        try:
+            with ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.engine.rules, sorted(self.engine.untracked_sources)),
+            ) as pool, open(self._path(PARTIAL_FILE), "a", encoding="utf-8") as partial:
+                queue = iter(chunks)
+                in_flight = set()
+                while True:
+                    # Bounded submission keeps cancellation prompt and memory flat
+                    while not self._cancel.is_set() and len(in_flight) < self.workers * 2:
+                        chunk = next(queue, None)
+                        if chunk is None:
+                            break
+                        in_flight.add(pool.submit(_sweep_users, chunk))
+                    if not in_flight:
+                        break
+                    finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        self._record(future.result(), partial)
+
+            if self._cancel.is_set():
+                self._set_status(state="cancelled")
+                logger.info(f"⏸️ Compliance sweep {state['sweep_id']} cancelled; it will resume where it stopped")
+                return
+            self._publish(state)
+            logger.info(f"✅ Compliance sweep {state['sweep_id']} finished in {time.monotonic() - started:.1f}s")
+        except Exception as e:
+            self._set_status(state="failed", error=str(e))
+            logger.error(f"Compliance sweep failed: {e}")
+
+    def _record(self, results: list[dict], partial):
+        transactions = non_compliant = errors = 0
+        for result in results:
+            if "error" in result:
+                errors += 1
+                logger.warning(f"⚠️ Compliance sweep skipped {result['user_id']}: {result['error']}")
+                result = {"user_id": result["user_id"], "rollup": None, "violations": []}
+            else:
+                transactions += result["rollup"]["transactions"]
+                non_compliant += result["rollup"]["non_compliant"]
+            partial.write(json.dumps(result, separators=(",", ":")) + "\n")
+        partial.flush()
+        with self._lock:
+            s = self._status
+            s["users_done"] += len(results)
+            s["transactions_done"] += transactions
+            s["non_compliant"] += non_compliant
+            s["errors"] += errors
+
+    def _publish(self, state: dict):
+        """Turn the partial report into the published report and rollup."""
+        rollup = {}
+        tmp = self._path(REPORT_FILE + ".tmp")
+        with open(self._path(PARTIAL_FILE), "r", encoding="utf-8") as src, open(tmp, "w", encoding="utf-8") as dst:
+            for line in src:
+                record = json.loads(line)
+                if record["rollup"] is None:
+                    continue
+                rollup[record["user_id"]] = record["rollup"]
+                if record["violations"]:
+                    dst.write(json.dumps({"user_id": record["user_id"], "violations": record["violations"]},
+                                         separators=(",", ":")) + "\n")
+        os.replace(tmp, self._path(REPORT_FILE))
+
+        finished_at = datetime.utcnow().isoformat()
+        self._write_json(ROLLUP_FILE, {**state, "finished_at": finished_at, "users": rollup})
+        self._rollup = rollup
+        os.remove(self._path(STATE_FILE))
+        os.remove(self._path(PARTIAL_FILE))
+        self._set_status(state="completed", finished_at=finished_at)
+
+    def _completed_users(self) -> dict[str, Optional[dict]]:
+        """Users already in the partial report; a torn final line is truncated away."""
+        path = self._path(PARTIAL_FILE)
+        if not os.path.exists(path):
+            return {}
+        done, good = {}, 0
+        with open(path, "rb") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                    done[record["user_id"]] = record["rollup"]
+                except (ValueError, KeyError):
+                    break
+                good += len(line)
+        os.truncate(path, good)
+        return done
+
+    # ── Files ───────────────────────────────────────
+
+    def _set_status(self, **fields):
+        with self._lock:
+            self._status.update(fields)
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.report_dir, name)
+
+    def _read_json(self, name: str, default):
+        try:
+            with open(self._path(name), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return default
+
+    def _write_json(self, name: str, data: dict):
+        os.makedirs(self.report_dir, exist_ok=True)
+        tmp = self._path(name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp, self._path(name))
@@ -0,0 +1,212 @@
+"""
+FinVerse AI — Streaming Output Guard
+Aho-Corasick matcher for unsafe phrases in LLM output. Scans streamed tokens
+incrementally (matches may span chunk boundaries) and redacts or aborts mid-stream,
+so answers reach the user without waiting for a full-text compliance pass.
+"""
+
+import logging
+from collections import deque
+from pathlib import Path
+from typing import Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_UNSAFE_TERMS = [
+    "guaranteed returns", "no risk", "insider", "tax evasion",
+    "hide income", "unregulated", "ponzi", "pyramid",
+]
+
+REDACTION = "[redacted]"
+ABORT_NOTICE = "\n\n[Response withheld: it contained content that failed compliance checks.]"
+
+
+def load_terms(terms: Iterable[str], path: str = "") -> list[str]:
+    """Configured terms plus one term per line from `path` (blank lines and # comments skipped)."""
+    merged = [t for t in terms if t and t.strip()]
+    if path:
+        try:
+            lines = Path(path).read_text(encoding="utf-8").splitlines()
+            merged += [line.strip() for line in lines if line.strip() and not line.lstrip().startswith("#")]
+        except OSError as e:
+            logger.warning(f"⚠️ Could not read unsafe terms from {path}: {e}")
+    return merged
+
+
+def _violation(term: str) -> dict:
+    return {
+        "rule_id": "COMPLIANCE_OUTPUT",
+        "severity": "high",
+        "message": f"Recommendation contains unsafe term: '{term}'",
+        "action": "Rewrite recommendation to remove unsafe language",
+    }
+
+
+class PatternMatcher:
+    """
+    Case-insensitive Aho-Corasick automaton over a set of phrases.
+    Construction is linear in the total pattern length; scanning is one transition
+    per character regardless of how many patterns are loaded.
+    """
+
+    def __init__(self, patterns: Iterable[str]):
+        self.patterns = sorted({p.lower() for p in patterns if p})
+        self.max_length = max((len(p) for p in self.patterns), default=0)
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._out: list[tuple[int, ...]] = [()]   # pattern ids ending at each state
+
+        for pid, pattern in enumerate(self.patterns):
+            state = 0
+            for ch in pattern:
+                nxt = self._goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(())
+                state = nxt
+            self._out[state] += (pid,)
+
+        # Breadth-first failure links; outputs inherit their fallback's matches
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                self._out[nxt] += self._out[self._fail[nxt]]
+
+    def step(self, state: int, ch: str) -> int:
+        """Transition on one (lower-cased) character."""
+        while state and ch not in self._goto[state]:
+            state = self._fail[state]
+        return self._goto[state].get(ch, 0)
+
+    def advance(self, state: int, ch: str) -> int:
+        """Transition on one raw character (offsets stay aligned even if lowering expands it)."""
+        for c in ch.lower():
+            state = self.step(state, c)
+        return state
+
+    def matches(self, state: int) -> tuple[int, ...]:
+        return self._out[state]
+
+    def find_all(self, text: str) -> list[tuple[int, str]]:
+        """(start offset, pattern) for every occurrence in `text`."""
+        found, state = [], 0
+        for i, ch in enumerate(text):
+            state = self.advance(state, ch)
+            for pid in self._out[state]:
+                found.append((i - len(self.patterns[pid]) + 1, self.patterns[pid]))
+        return found
+
+    def __len__(self) -> int:
+        return len(self.patterns)
+
+
+class StreamGuard:
+    """
+    One guarded output stream. `feed()` takes raw LLM chunks and returns the text
+    that is safe to forward; the last `max_length - 1` characters are held back so a
+    phrase split across chunks is still caught (and redacted) before it is sent.
+
+    Policies: "redact" replaces matches with a marker and keeps streaming,
+    "abort" stops the stream at the first match.
+    """
+
+    def __init__(self, matcher: PatternMatcher, policy: str = "redact"):
+        self.matcher = matcher
+        self.policy = policy
+        self.aborted = False
+        self.violations: list[dict] = []
+        self._state = 0
+        self._pending = ""                  # scanned, not yet released
+        self._offset = 0                    # absolute position of _pending[0]
+        self._spans: list[list[int]] = []   # absolute [start, end) ranges to redact
+        self._released: list[str] = []
+        self._holdback = max(matcher.max_length - 1, 0)
+
+    def feed(self, chunk: str) -> str:
+        """Scan a chunk; returns the text that can be released now."""
+        if self.aborted or not chunk:
+            return ""
+        base = self._offset + len(self._pending)
+        for i, ch in enumerate(chunk):
+            self._state = self.matcher.advance(self._state, ch)
+            for pid in self.matcher.matches(self._state):
+                pattern = self.matcher.patterns[pid]
+                end = base + i + 1
+                self._record(pattern, end - len(pattern), end)
+                if self.aborted:
+                    # Release what preceded the match, never the match itself
+                    self._pending += chunk[:i + 1]
+                    return self._release(end - len(pattern))
+        self._pending += chunk
+        return self._release(self._offset + len(self._pending) - self._holdback)
+
+    def finish(self) -> str:
+        """Release everything still held back (the stream has ended)."""
+        if self.aborted:
+            return ""
+        return self._release(self._offset + len(self._pending))
+
+    @property
+    def text(self) -> str:
+        """Everything released so far."""
+        return "".join(self._released)
+
+    def _record(self, pattern: str, start: int, end: int):
+        self.violations.append(_violation(pattern))
+        if self.policy == "abort":
+            self.aborted = True
+            return
+        start = max(start, self._offset)  # Overlap with already released text
+        if self._spans and start <= self._spans[-1][1]:
+            self._spans[-1][1] = max(self._spans[-1][1], end)
+        else:
+            self._spans.append([start, end])
+
+    def _release(self, upto: int) -> str:
+        # A completed redaction straddling the cut is released whole
+        for span in self._spans:
+            if span[0] < upto < span[1]:
+                upto = span[1]
+        upto = min(upto, self._offset + len(self._pending))
+        if upto <= self._offset:
+            return ""
+
+        out, cursor = [], self._offset
+        while self._spans and self._spans[0][0] < upto:
+            start, end = self._spans.pop(0)
+            out.append(self._pending[cursor - self._offset:start - self._offset])
+            out.append(REDACTION)
+            cursor = end
+        out.append(self._pending[cursor - self._offset:upto - self._offset])
+
+        self._pending = self._pending[upto - self._offset:]
+        self._offset = upto
+        released = "".join(out)
+        self._released.append(released)
+        return released
+
+
+class OutputGuard:
+    """Compiled unsafe-phrase set shared by full-text checks and streaming sessions."""
+
+    def __init__(self, terms: Optional[Iterable[str]] = None, policy: str = "redact"):
+        self.matcher = PatternMatcher(DEFAULT_UNSAFE_TERMS if terms is None else terms)
+        self.policy = policy
+
+    def check(self, text: str) -> list[dict]:
+        """Violations for a complete text, one per distinct phrase found."""
+        return [_violation(term) for term in sorted({p for _, p in self.matcher.find_all(text)})]
+
+    def session(self, policy: Optional[str] = None) -> StreamGuard:
+        """A new guard for one output stream."""
+        return StreamGuard(self.matcher, policy or self.policy)
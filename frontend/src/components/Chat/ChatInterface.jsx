@@ -9,6 +9,7 @@ import useAppStore from '../../store/appStore';
 
 export default function ChatInterface() {
     const [input, setInput] = useState('');
+    const [streamingText, setStreamingText] = useState('');
     const messagesEndRef = useRef(null);
     const inputRef = useRef(null);
 
@@ -20,7 +21,7 @@ export default function ChatInterface() {
 
     useEffect(() => {
         scrollToBottom();
-    }, [messages, currentEvents, scrollToBottom]);
+    }, [messages, currentEvents, streamingText, scrollToBottom]);
 
     const handleSend = async () => {
         if (!input.trim() || isProcessing) return;
@@ -31,6 +32,7 @@ export default function ChatInterface() {
         setProcessing(true);
         setAvatarState('thinking');
         clearEvents();
+        setStreamingText('');
 
         try {
             const response = await fetch('/api/chat/query', {
@@ -66,11 +68,18 @@ export default function ChatInterface() {
                                 setAvatarState(event.avatar_state);
                             }
 
+                            // Answer tokens (already passed through the output guard)
+                            if (event.type === 'token') {
+                                setStreamingText((text) => text + (event.content?.delta || ''));
+                                continue;
+                            }
+
                             // Add event to stream
                             addEvent(event);
 
                             // If this is the final response, add it as a message
                             if (event.type === 'final' && event.content) {
+                                setStreamingText('');
                                 addMessage({
                                     role: 'assistant',
                                     content: event.content.response || 'Processing complete.',
@@ -92,6 +101,7 @@ export default function ChatInterface() {
                 content: `I apologize, but I encountered an error while processing your request. Please ensure the backend server is running at http://localhost:8000.\n\nError: ${error.message}`,
             });
         } finally {
+            setStreamingText('');
             setProcessing(false);
             setAvatarState('idle');
         }
@@ -148,8 +158,18 @@ export default function ChatInterface() {
                     </div>
                 )}
 
+                {/* Answer streaming in */}
+                {isProcessing && streamingText && (
+                    <div className="chat-message assistant">
+                        <div className="chat-message-avatar">🧠</div>
+                        <div className="chat-message-bubble">
+                            <MessageContent content={streamingText} />
+                        </div>
+                    </div>
+                )}
+
                 {/* Typing indicator */}
-                {isProcessing && (
+                {isProcessing && !streamingText && (
                     <div className="chat-message assistant">
                         <div className="chat-message-avatar">🧠</div>
                         <div className="typing-indicator">
@@ -25,19 +25,63 @@ const CATEGORY_COLORS = [
 export default function Dashboard() {
     const { transactions, setTransactions } = useAppStore();
     const [summary, setSummary] = useState(null);
+    const [recurring, setRecurring] = useState(null);
+    const [complianceRisk, setComplianceRisk] = useState(null);
     const [loading, setLoading] = useState(true);
 
     useEffect(() => {
-        fetchData();
+        let feed = null;
+
+        const connect = async () => {
+            const seq = await fetchData();
+            if (seq === null || typeof EventSource === 'undefined') return;
+
+            // Server-push feed: new transactions arrive without polling
+            feed = new EventSource(`/api/transactions/stream?since=${seq}`);
+            feed.onmessage = (msg) => {
+                const event = JSON.parse(msg.data);
+                if (event.type === 'transaction') {
+                    applyTransaction(event.transaction);
+                } else if (event.type === 'resync') {
+                    // Too far behind the ring buffer — reload a fresh snapshot
+                    feed.close();
+                    connect();
+                }
+            };
+        };
+
+        connect();
+        return () => feed && feed.close();
     }, []);
 
+    const applyTransaction = (txn) => {
+        const { transactions: current } = useAppStore.getState();
+        setTransactions([...current, txn]);
+        setSummary((prev) => {
+            if (!prev) return prev;
+            const next = { ...prev, categories: { ...prev.categories } };
+            if (txn.is_credit) {
+                next.total_income += txn.amount;
+            } else {
+                next.total_spent += txn.amount;
+                next.categories[txn.category] = (next.categories[txn.category] || 0) + txn.amount;
+            }
+            next.net = next.total_income - next.total_spent;
+            next.transaction_count += 1;
+            next.flagged_count += txn.is_flagged ? 1 : 0;
+            return next;
+        });
+    };
+
     const fetchData = async () => {
+        let seq = null;
         try {
             // Fetch transactions
             const txnRes = await fetch('/api/transactions/');
             if (txnRes.ok) {
                 const data = await txnRes.json();
                 setTransactions(data.transactions || []);
+                seq = data.seq ?? null;
             }
 
             // Fetch summary
@@ -46,12 +90,25 @@ export default function Dashboard() {
                 const data = await sumRes.json();
                 setSummary(data);
             }
+
+            // Fetch recurring payments detected at ingest
+            const recRes = await fetch('/api/transactions/recurring');
+            if (recRes.ok) {
+                setRecurring(await recRes.json());
+            }
+
+            // Fetch the risk rollup of the last full-history compliance sweep
+            const riskRes = await fetch('/api/compliance/risk');
+            if (riskRes.ok) {
+                setComplianceRisk((await riskRes.json()).rollup);
+            }
         } catch (e) {
             console.log('Backend not available, using demo data');
             generateDemoData();
         } finally {
             setLoading(false);
         }
+        return seq;
     };
 
     const generateDemoData = () => {
@@ -324,6 +381,76 @@ export default function Dashboard() {
                 </div>
             </div>
 
+            {/* Recurring Payments */}
+            {recurring?.series?.length > 0 && (
+                <div className="panel">
+                    <div className="panel-header">
+                        <span className="panel-title">🔁 Recurring Payments</span>
+                        <span style={{ fontSize: 11, color: 'var(--text-muted)' }}>
+                            ₹{Math.round(recurring.monthly_outflow).toLocaleString()} / month committed
+                        </span>
+                    </div>
+                    <div className="panel-content" style={{ padding: 0 }}>
+                        <div className="transaction-list">
+                            {recurring.series.map((s) => (
+                                <div className="transaction-item" key={`${s.merchant}-${s.is_credit}`}>
+                                    <div className="transaction-icon" style={{
+                                        background: s.is_credit ? 'rgba(0,230,118,0.15)' : 'rgba(108,92,231,0.15)',
+                                        color: s.is_credit ? '#00e676' : '#a29bfe',
+                                    }}>
+                                        {CATEGORY_ICONS[s.category] || '📦'}
+                                    </div>
+                                    <div className="transaction-details">
+                                        <div className="transaction-merchant">{s.merchant}</div>
+                                        <div className="transaction-category">
+                                            {s.period} • next {new Date(s.expected_next).toLocaleDateString()}
+                                        </div>
+                                    </div>
+                                    <div className={`transaction-amount ${s.is_credit ? 'credit' : 'debit'}`}>
+                                        {s.is_credit ? '+' : '-'}₹{Math.round(s.amount).toLocaleString()}
+                                    </div>
+                                </div>
+                            ))}
+                        </div>
+                    </div>
+                </div>
+            )}
+
+            {/* Compliance Risk (full-history sweep) */}
+            {complianceRisk && (
+                <div className="panel">
+                    <div className="panel-header">
+                        <span className="panel-title">🛡️ Compliance Risk</span>
+                        <span style={{ fontSize: 11, color: 'var(--text-muted)' }}>
+                            {complianceRisk.transactions} transactions swept • {complianceRisk.risk_level} risk
+                        </span>
+                    </div>
+                    <div className="panel-content" style={{ padding: 0 }}>
+                        <div className="transaction-list">
+                            {Object.entries(complianceRisk.violations_by_rule).map(([ruleId, count]) => (
+                                <div className="transaction-item" key={ruleId}>
+                                    <div className="transaction-icon" style={{ background: 'rgba(255,82,82,0.15)', color: '#ff5252' }}>
+                                        🚨
+                                    </div>
+                                    <div className="transaction-details">
+                                        <div className="transaction-merchant">{ruleId}</div>
+                                        <div className="transaction-category">flagged transactions</div>
+                                    </div>
+                                    <div className="transaction-amount debit">{count}</div>
+                                </div>
+                            ))}
+                            {complianceRisk.non_compliant === 0 && (
+                                <div className="transaction-item">
+                                    <div className="transaction-details">
+                                        <div className="transaction-merchant">No violations in full history</div>
+                                    </div>
+                                </div>
+                            )}
+                        </div>
+                    </div>
+                </div>
+            )}
+
             {/* Recent Transactions */}
             <div className="panel">
                 <div className="panel-header">